@@ -0,0 +1,1540 @@
+"""Графический интерфейс генератора доменов (PyQt5)"""
+
+import sys, os, time, traceback
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
+                             QLabel, QLineEdit, QPushButton, QProgressBar, QTextEdit, QPlainTextEdit, QSpinBox, 
+                             QFileDialog, QMessageBox, QTabWidget, QStyle, QDialog, QDialogButtonBox,
+                             QGroupBox, QCheckBox, QComboBox, QDoubleSpinBox, QTableWidget, QTableWidgetItem,
+                             QHeaderView)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSettings
+from PyQt5.QtGui import QFont, QColor, QTextCharFormat, QIcon
+from scanner import (create_space, ScanEngine, LogBatcher, Deduplicator, ResultStore, create_scan, resume_scan,
+                     can_resume, RecheckEngine, resume_recheck,
+                     DEFAULT_SETTINGS, DEFAULT_CHARS, DEFAULT_TLDS,
+                     LOG_INFO, LOG_ERROR, LOG_DNS, LOG_HTTP, LOG_FOUND)
+from scanner.metrics import stage_summaries, counter_values, gauge_value
+from scanner.dedupe import UNIQUE_EXTENSIONS
+from scanner.results import parse_filter_tlds
+
+# Категории лога генерации в порядке флажков
+LOG_FILTERS = (
+    (LOG_FOUND, "Найденные"),
+    (LOG_ERROR, "Ошибки"),
+    (LOG_INFO, "Общие"),
+    (LOG_DNS, "DNS"),
+    (LOG_HTTP, "HTTP")
+)
+
+# Строки таблицы метрик: этап (см. scanner.metrics.STAGE_HISTOGRAMS) и название
+METRIC_STAGES = (
+    ('generate', "Генерация (пачка)"),
+    ('dns', "DNS"),
+    ('tcp', "Порты TCP"),
+    ('https', "HTTPS"),
+    ('http', "HTTP"),
+    ('http_stage', "Этап HTTP целиком"),
+    ('write', "Запись")
+)
+
+class SettingsManager:
+    """Класс для управления настройками приложения"""
+    def __init__(self):
+        self.settings = QSettings("DomainGenerator", "AppSettings")
+        self.defaults = {
+            **DEFAULT_SETTINGS,
+            'check_file': 'sites.txt',
+            'always_on_top': False,
+            'log_categories': f"{LOG_FOUND},{LOG_ERROR},{LOG_INFO}",
+            'log_max_lines': 5000,
+            'window_geometry': None
+        }
+    
+    def load(self):
+        """Загрузка настроек"""
+        settings = {}
+        for key, default in self.defaults.items():
+            value = self.settings.value(key, default)
+            
+            # Преобразование типов
+            if isinstance(default, bool):
+                settings[key] = self.settings.value(key, default, type=bool)
+            elif isinstance(default, int):
+                settings[key] = self.settings.value(key, default, type=int)
+            elif isinstance(default, float):
+                settings[key] = self.settings.value(key, default, type=float)
+            elif isinstance(default, str):
+                settings[key] = str(value)
+            else:
+                settings[key] = value
+        
+        return settings
+    
+    def save(self, settings):
+        """Сохранение настроек"""
+        for key, value in settings.items():
+            self.settings.setValue(key, value)
+        self.settings.sync()
+
+class SettingsDialog(QDialog):
+    def __init__(self, settings, parent=None):
+        super().__init__(parent)
+        self.settings = settings
+        self.setWindowTitle("Настройки")
+        self.setWindowIcon(QIcon.fromTheme("preferences-system", QApplication.style().standardIcon(QStyle.SP_FileDialogDetailedView)))
+        self.init_ui()
+        
+    def init_ui(self):
+        layout = QVBoxLayout()
+        layout.setContentsMargins(10, 10, 10, 10)
+        
+        # Настройки файлов
+        file_group = QGroupBox("Настройки файлов")
+        file_layout = QVBoxLayout()
+        
+        # Файл результатов генерации
+        gen_file_layout = QHBoxLayout()
+        gen_file_layout.addWidget(QLabel("Файл результатов:"))
+        self.gen_file_edit = QLineEdit(self.settings['output_file'])
+        gen_file_layout.addWidget(self.gen_file_edit)
+        self.gen_browse_btn = QPushButton("Обзор")
+        self.gen_browse_btn.clicked.connect(lambda: self.browse_file(self.gen_file_edit, is_save=True))
+        gen_file_layout.addWidget(self.gen_browse_btn)
+        file_layout.addLayout(gen_file_layout)
+        
+        # Формат файла результатов
+        format_layout = QHBoxLayout()
+        format_layout.addWidget(QLabel("Формат результатов:"))
+        self.format_combo = QComboBox()
+        self.format_combo.addItem("По расширению файла", 'auto')
+        self.format_combo.addItem("Текст (домен на строку)", 'text')
+        self.format_combo.addItem("JSON Lines (статус, схема, задержка)", 'jsonl')
+        self.format_combo.addItem("SQLite", 'sqlite')
+        self.format_combo.setCurrentIndex(max(0, self.format_combo.findData(self.settings['output_format'])))
+        format_layout.addWidget(self.format_combo)
+        file_layout.addLayout(format_layout)
+        
+        # Файл для проверки дубликатов
+        check_file_layout = QHBoxLayout()
+        check_file_layout.addWidget(QLabel("Файл для проверки:"))
+        self.check_file_edit = QLineEdit(self.settings['check_file'])
+        check_file_layout.addWidget(self.check_file_edit)
+        self.check_browse_btn = QPushButton("Обзор")
+        self.check_browse_btn.clicked.connect(lambda: self.browse_file(self.check_file_edit, is_save=False))
+        check_file_layout.addWidget(self.check_browse_btn)
+        file_layout.addLayout(check_file_layout)
+        
+        # Файл состояния для продолжения проверки
+        checkpoint_file_layout = QHBoxLayout()
+        checkpoint_file_layout.addWidget(QLabel("Файл состояния:"))
+        self.checkpoint_file_edit = QLineEdit(self.settings['checkpoint_file'])
+        self.checkpoint_file_edit.setToolTip("Позиция перебора для продолжения проверки. Пусто - не сохранять")
+        checkpoint_file_layout.addWidget(self.checkpoint_file_edit)
+        file_layout.addLayout(checkpoint_file_layout)
+        
+        # Кэш отрицательных результатов
+        cache_file_layout = QHBoxLayout()
+        cache_file_layout.addWidget(QLabel("Кэш несуществующих доменов:"))
+        self.cache_file_edit = QLineEdit(self.settings['negative_cache_file'])
+        self.cache_file_edit.setToolTip("База SQLite с доменами без DNS или без ответа HTTP. Пусто - не использовать")
+        cache_file_layout.addWidget(self.cache_file_edit)
+        file_layout.addLayout(cache_file_layout)
+        
+        # Результаты перепроверки списка
+        recheck_layout = QHBoxLayout()
+        recheck_layout.addWidget(QLabel("Перепроверка - работают:"))
+        self.alive_file_edit = QLineEdit(self.settings['recheck_alive_file'])
+        recheck_layout.addWidget(self.alive_file_edit)
+        recheck_layout.addWidget(QLabel("не работают:"))
+        self.dead_file_edit = QLineEdit(self.settings['recheck_dead_file'])
+        self.dead_file_edit.setToolTip("В файле .jsonl у каждого домена указана причина: результат DNS или HTTP")
+        recheck_layout.addWidget(self.dead_file_edit)
+        recheck_layout.addWidget(QLabel("не ответили:"))
+        self.unsure_file_edit = QLineEdit(self.settings['recheck_unsure_file'])
+        self.unsure_file_edit.setToolTip("Сайты, которые не ответили из-за сбоя, возможно временного: таймаут, SERVFAIL, закрытые порты")
+        recheck_layout.addWidget(self.unsure_file_edit)
+        file_layout.addLayout(recheck_layout)
+        
+        # Индексы файлов зон
+        zone_layout = QHBoxLayout()
+        zone_layout.addWidget(QLabel("Индексы зон:"))
+        self.zone_indexes_edit = QLineEdit(self.settings['zone_indexes'])
+        self.zone_indexes_edit.setToolTip("Файлы .zidx через \";\" (python site.py zone-import com.zone.gz). "
+                                          "Домены, которых нет в зоне, не проверяются через DNS")
+        zone_layout.addWidget(self.zone_indexes_edit)
+        self.zone_browse_btn = QPushButton("Добавить")
+        self.zone_browse_btn.clicked.connect(self.add_zone_index)
+        zone_layout.addWidget(self.zone_browse_btn)
+        file_layout.addLayout(zone_layout)
+        
+        # Фильтр недавно проверенных доменов
+        seen_layout = QHBoxLayout()
+        seen_layout.addWidget(QLabel("Фильтр проверенных доменов:"))
+        self.seen_file_edit = QLineEdit(self.settings['seen_filter_file'])
+        self.seen_file_edit.setToolTip("Файл фильтра Блума, общий для запусков и процессов: "
+                                       "недавно проверенные домены пропускаются. Пусто - не использовать")
+        seen_layout.addWidget(self.seen_file_edit)
+        file_layout.addLayout(seen_layout)
+        
+        file_group.setLayout(file_layout)
+        layout.addWidget(file_group)
+        
+        # Кнопка очистки файла
+        self.clear_btn = QPushButton("Очистить файл результатов")
+        self.clear_btn.clicked.connect(self.clear_file)
+        layout.addWidget(self.clear_btn)
+        
+        # Настройки производительности
+        perf_group = QGroupBox("Настройки производительности")
+        perf_layout = QVBoxLayout()
+        
+        # Количество обработчиков DNS
+        dns_workers_layout = QHBoxLayout()
+        dns_workers_layout.addWidget(QLabel("Потоков проверки DNS:"))
+        self.dns_workers_spin = QSpinBox()
+        self.dns_workers_spin.setRange(1, 5000)
+        self.dns_workers_spin.setValue(self.settings['dns_workers'])
+        dns_workers_layout.addWidget(self.dns_workers_spin)
+        perf_layout.addLayout(dns_workers_layout)
+        
+        # Количество обработчиков HTTP
+        http_workers_layout = QHBoxLayout()
+        http_workers_layout.addWidget(QLabel("Потоков проверки HTTP:"))
+        self.http_workers_spin = QSpinBox()
+        self.http_workers_spin.setRange(1, 5000)
+        self.http_workers_spin.setValue(self.settings['http_workers'])
+        http_workers_layout.addWidget(self.http_workers_spin)
+        perf_layout.addLayout(http_workers_layout)
+        
+        # Автоподбор числа одновременных запросов
+        self.adaptive_check = QCheckBox("Подбирать число одновременных запросов автоматически")
+        self.adaptive_check.setToolTip("Число запросов DNS и HTTP в работе снижается при таймаутах и ошибках "
+                                       "и растет, пока задержка стабильна; число потоков - верхний предел")
+        self.adaptive_check.setChecked(self.settings['adaptive_concurrency'])
+        perf_layout.addWidget(self.adaptive_check)
+        
+        # Размер очередей между этапами
+        queue_layout = QHBoxLayout()
+        queue_layout.addWidget(QLabel("Размер очередей между этапами:"))
+        self.queue_spin = QSpinBox()
+        self.queue_spin.setRange(10, 100000)
+        self.queue_spin.setValue(self.settings['queue_size'])
+        queue_layout.addWidget(self.queue_spin)
+        perf_layout.addLayout(queue_layout)
+        
+        # Размер батча
+        batch_layout = QHBoxLayout()
+        batch_layout.addWidget(QLabel("Размер батча доменов:"))
+        self.batch_spin = QSpinBox()
+        self.batch_spin.setRange(100, 10000)
+        self.batch_spin.setValue(self.settings['batch_size'])
+        batch_layout.addWidget(self.batch_spin)
+        perf_layout.addLayout(batch_layout)
+        
+        # DNS-серверы
+        nameservers_layout = QHBoxLayout()
+        nameservers_layout.addWidget(QLabel("DNS-серверы:"))
+        self.nameservers_edit = QLineEdit(self.settings['nameservers'])
+        self.nameservers_edit.setToolTip("Адреса через запятую; адрес=N задает свой предел запросов в секунду для сервера")
+        nameservers_layout.addWidget(self.nameservers_edit)
+        perf_layout.addLayout(nameservers_layout)
+        
+        # Пределы частоты запросов
+        dns_rate_layout = QHBoxLayout()
+        dns_rate_layout.addWidget(QLabel("Запросов DNS в секунду на сервер (0 - без ограничения):"))
+        self.dns_qps_spin = QSpinBox()
+        self.dns_qps_spin.setRange(0, 100000)
+        self.dns_qps_spin.setValue(int(self.settings['dns_qps']))
+        dns_rate_layout.addWidget(self.dns_qps_spin)
+        dns_rate_layout.addWidget(QLabel("Запас:"))
+        self.dns_burst_spin = QSpinBox()
+        self.dns_burst_spin.setRange(1, 100000)
+        self.dns_burst_spin.setValue(self.settings['dns_burst'])
+        dns_rate_layout.addWidget(self.dns_burst_spin)
+        perf_layout.addLayout(dns_rate_layout)
+        
+        http_rate_layout = QHBoxLayout()
+        http_rate_layout.addWidget(QLabel("Запросов HTTP в секунду (0 - без ограничения):"))
+        self.http_qps_spin = QSpinBox()
+        self.http_qps_spin.setRange(0, 100000)
+        self.http_qps_spin.setValue(int(self.settings['http_qps']))
+        http_rate_layout.addWidget(self.http_qps_spin)
+        http_rate_layout.addWidget(QLabel("Запас:"))
+        self.http_burst_spin = QSpinBox()
+        self.http_burst_spin.setRange(1, 100000)
+        self.http_burst_spin.setValue(self.settings['http_burst'])
+        http_rate_layout.addWidget(self.http_burst_spin)
+        perf_layout.addLayout(http_rate_layout)
+        
+        # Способ проверки сайта
+        probe_layout = QHBoxLayout()
+        probe_layout.addWidget(QLabel("Запрос к сайту:"))
+        self.probe_combo = QComboBox()
+        self.probe_combo.addItem("HEAD (при отказе - GET)", 'head')
+        self.probe_combo.addItem("GET с чтением начала ответа", 'get')
+        self.probe_combo.setCurrentIndex(max(0, self.probe_combo.findData(self.settings['probe_method'])))
+        probe_layout.addWidget(self.probe_combo)
+        probe_layout.addWidget(QLabel("Перенаправлений:"))
+        self.redirects_spin = QSpinBox()
+        self.redirects_spin.setRange(0, 20)
+        self.redirects_spin.setValue(self.settings['max_redirects'])
+        probe_layout.addWidget(self.redirects_spin)
+        perf_layout.addLayout(probe_layout)
+        
+        # Таймауты HTTP
+        timeout_layout = QHBoxLayout()
+        timeout_layout.addWidget(QLabel("Таймаут соединения (с):"))
+        self.connect_timeout_spin = QDoubleSpinBox()
+        self.connect_timeout_spin.setRange(0.5, 60)
+        self.connect_timeout_spin.setValue(self.settings['connect_timeout'])
+        timeout_layout.addWidget(self.connect_timeout_spin)
+        timeout_layout.addWidget(QLabel("Таймаут чтения (с):"))
+        self.read_timeout_spin = QDoubleSpinBox()
+        self.read_timeout_spin.setRange(0.5, 60)
+        self.read_timeout_spin.setValue(self.settings['read_timeout'])
+        timeout_layout.addWidget(self.read_timeout_spin)
+        perf_layout.addLayout(timeout_layout)
+        
+        self.parallel_probe_check = QCheckBox("Проверять HTTPS и HTTP одновременно")
+        self.parallel_probe_check.setToolTip("Быстрее, но каждый сайт получает два запроса")
+        self.parallel_probe_check.setChecked(self.settings['probe_parallel'])
+        perf_layout.addWidget(self.parallel_probe_check)
+        
+        # Быстрая проверка портов перед HTTP
+        tcp_layout = QHBoxLayout()
+        self.tcp_probe_check = QCheckBox("Проверять порты перед HTTP, таймаут (с):")
+        self.tcp_probe_check.setToolTip("TCP-соединение с портами 443 и 80: сайты с закрытыми портами "
+                                        "отсеиваются без ожидания таймаутов HTTP")
+        self.tcp_probe_check.setChecked(self.settings['tcp_probe'])
+        tcp_layout.addWidget(self.tcp_probe_check)
+        self.tcp_timeout_spin = QDoubleSpinBox()
+        self.tcp_timeout_spin.setRange(0.1, 30)
+        self.tcp_timeout_spin.setSingleStep(0.5)
+        self.tcp_timeout_spin.setValue(self.settings['tcp_probe_timeout'])
+        tcp_layout.addWidget(self.tcp_timeout_spin)
+        self.ipv6_check = QCheckBox("IPv6 (запросы AAAA)")
+        self.ipv6_check.setChecked(self.settings['resolve_ipv6'])
+        tcp_layout.addWidget(self.ipv6_check)
+        perf_layout.addLayout(tcp_layout)
+        
+        # Повтор ответов парковок по адресу
+        memo_layout = QHBoxLayout()
+        memo_layout.addWidget(QLabel("Запоминать ответы адресов (0 - выключено):"))
+        self.ip_memo_spin = QSpinBox()
+        self.ip_memo_spin.setRange(0, 10000000)
+        self.ip_memo_spin.setSingleStep(1000)
+        self.ip_memo_spin.setValue(self.settings['ip_memo_size'])
+        self.ip_memo_spin.setToolTip("Домены на адресе, который одинаково отвечает на любое имя (парковка), "
+                                     "получают его ответ без запроса (только при проверке GET)")
+        memo_layout.addWidget(self.ip_memo_spin)
+        memo_layout.addWidget(QLabel("Повторов до парковки:"))
+        self.ip_memo_hits_spin = QSpinBox()
+        self.ip_memo_hits_spin.setRange(2, 100)
+        self.ip_memo_hits_spin.setValue(self.settings['ip_memo_hits'])
+        memo_layout.addWidget(self.ip_memo_hits_spin)
+        perf_layout.addLayout(memo_layout)
+        
+        # Бюджет памяти
+        memory_layout = QHBoxLayout()
+        memory_layout.addWidget(QLabel("Бюджет памяти, МБ (0 - без ограничения):"))
+        self.memory_spin = QSpinBox()
+        self.memory_spin.setRange(0, 1048576)
+        self.memory_spin.setSingleStep(128)
+        self.memory_spin.setValue(self.settings['max_memory'])
+        self.memory_spin.setToolTip("При приближении к пределу генерация замедляется, при превышении - ждет")
+        memory_layout.addWidget(self.memory_spin)
+        perf_layout.addLayout(memory_layout)
+        
+        # Количество процессов
+        processes_layout = QHBoxLayout()
+        processes_layout.addWidget(QLabel("Процессов проверки (0 - по числу ядер):"))
+        self.processes_spin = QSpinBox()
+        self.processes_spin.setRange(0, 256)
+        self.processes_spin.setValue(self.settings['processes'])
+        processes_layout.addWidget(self.processes_spin)
+        perf_layout.addLayout(processes_layout)
+        
+        # Интервал сохранения состояния
+        checkpoint_layout = QHBoxLayout()
+        checkpoint_layout.addWidget(QLabel("Сохранять состояние каждые (с):"))
+        self.checkpoint_spin = QSpinBox()
+        self.checkpoint_spin.setRange(1, 3600)
+        self.checkpoint_spin.setValue(self.settings['checkpoint_interval'])
+        checkpoint_layout.addWidget(self.checkpoint_spin)
+        perf_layout.addLayout(checkpoint_layout)
+        
+        # Срок хранения записей кэша
+        cache_ttl_layout = QHBoxLayout()
+        cache_ttl_layout.addWidget(QLabel("Срок хранения в кэше (ч):"))
+        self.cache_ttl_spin = QSpinBox()
+        self.cache_ttl_spin.setRange(1, 24 * 365)
+        self.cache_ttl_spin.setValue(self.settings['negative_cache_ttl'])
+        cache_ttl_layout.addWidget(self.cache_ttl_spin)
+        perf_layout.addLayout(cache_ttl_layout)
+        
+        # Размер кэша
+        cache_size_layout = QHBoxLayout()
+        cache_size_layout.addWidget(QLabel("Максимум записей в кэше:"))
+        self.cache_size_spin = QSpinBox()
+        self.cache_size_spin.setRange(1000, 1000000000)
+        self.cache_size_spin.setSingleStep(100000)
+        self.cache_size_spin.setValue(self.settings['negative_cache_size'])
+        cache_size_layout.addWidget(self.cache_size_spin)
+        perf_layout.addLayout(cache_size_layout)
+        
+        # Срок памяти фильтра проверенных доменов
+        seen_ttl_layout = QHBoxLayout()
+        seen_ttl_layout.addWidget(QLabel("Помнить проверенные домены (ч):"))
+        self.seen_ttl_spin = QSpinBox()
+        self.seen_ttl_spin.setRange(1, 24 * 365)
+        self.seen_ttl_spin.setValue(self.settings['seen_filter_ttl'])
+        seen_ttl_layout.addWidget(self.seen_ttl_spin)
+        perf_layout.addLayout(seen_ttl_layout)
+        
+        perf_group.setLayout(perf_layout)
+        layout.addWidget(perf_group)
+        
+        # Настройки окна
+        window_group = QGroupBox("Настройки окна")
+        window_layout = QVBoxLayout()
+        
+        # Окно поверх других
+        self.always_on_top_check = QCheckBox("Окно всегда поверх других окон")
+        self.always_on_top_check.setChecked(self.settings['always_on_top'])
+        window_layout.addWidget(self.always_on_top_check)
+        
+        # Размер лога генерации
+        log_lines_layout = QHBoxLayout()
+        log_lines_layout.addWidget(QLabel("Строк в логе (старые удаляются):"))
+        self.log_lines_spin = QSpinBox()
+        self.log_lines_spin.setRange(100, 1000000)
+        self.log_lines_spin.setSingleStep(1000)
+        self.log_lines_spin.setValue(self.settings['log_max_lines'])
+        log_lines_layout.addWidget(self.log_lines_spin)
+        window_layout.addLayout(log_lines_layout)
+        
+        window_group.setLayout(window_layout)
+        layout.addWidget(window_group)
+        
+        # Кнопки диалога
+        button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        button_box.accepted.connect(self.accept)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+        
+        self.setLayout(layout)
+    
+    def browse_file(self, target_edit, is_save=True):
+        if is_save:
+            filename, _ = QFileDialog.getSaveFileName(
+                self, 
+                "Сохранить файл результатов", 
+                target_edit.text(), 
+                "Текстовые файлы (*.txt);;JSON Lines (*.jsonl);;SQLite (*.db)"
+            )
+        else:
+            filename, _ = QFileDialog.getOpenFileName(
+                self, 
+                "Выберите файл для проверки", 
+                target_edit.text(), 
+                "Текстовые файлы (*.txt)"
+            )
+            
+        if filename:
+            target_edit.setText(filename)
+    
+    def add_zone_index(self):
+        filename, _ = QFileDialog.getOpenFileName(self, "Выберите индекс зоны", "", "Индексы зон (*.zidx)")
+        if filename:
+            paths = [path for path in self.zone_indexes_edit.text().split(';') if path.strip()]
+            self.zone_indexes_edit.setText(';'.join(paths + [filename]))
+    
+    def clear_file(self):
+        filename = self.gen_file_edit.text()
+        if not filename:
+            return
+            
+        reply = QMessageBox.question(
+            self, 
+            "Подтверждение очистки",
+            f"Вы уверены, что хотите очистить файл {filename}? Все данные будут удалены!",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        
+        if reply == QMessageBox.Yes:
+            try:
+                with open(filename, 'w') as f:
+                    f.write("")
+                QMessageBox.information(self, "Успех", f"Файл {filename} успешно очищен")
+            except Exception as e:
+                QMessageBox.critical(self, "Ошибка", f"Ошибка при очистке файла: {str(e)}")
+    
+    def get_settings(self):
+        """Возвращает текущие настройки из диалога"""
+        return {
+            'output_file': self.gen_file_edit.text(),
+            'output_format': self.format_combo.currentData(),
+            'check_file': self.check_file_edit.text(),
+            'always_on_top': self.always_on_top_check.isChecked(),
+            'log_max_lines': self.log_lines_spin.value(),
+            'dns_workers': self.dns_workers_spin.value(),
+            'http_workers': self.http_workers_spin.value(),
+            'queue_size': self.queue_spin.value(),
+            'batch_size': self.batch_spin.value(),
+            'nameservers': self.nameservers_edit.text(),
+            'dns_qps': self.dns_qps_spin.value(),
+            'dns_burst': self.dns_burst_spin.value(),
+            'http_qps': self.http_qps_spin.value(),
+            'http_burst': self.http_burst_spin.value(),
+            'adaptive_concurrency': self.adaptive_check.isChecked(),
+            'probe_method': self.probe_combo.currentData(),
+            'max_redirects': self.redirects_spin.value(),
+            'connect_timeout': self.connect_timeout_spin.value(),
+            'read_timeout': self.read_timeout_spin.value(),
+            'probe_parallel': self.parallel_probe_check.isChecked(),
+            'tcp_probe': self.tcp_probe_check.isChecked(),
+            'tcp_probe_timeout': self.tcp_timeout_spin.value(),
+            'resolve_ipv6': self.ipv6_check.isChecked(),
+            'ip_memo_size': self.ip_memo_spin.value(),
+            'ip_memo_hits': self.ip_memo_hits_spin.value(),
+            'processes': self.processes_spin.value(),
+            'checkpoint_file': self.checkpoint_file_edit.text(),
+            'checkpoint_interval': self.checkpoint_spin.value(),
+            'negative_cache_file': self.cache_file_edit.text(),
+            'negative_cache_ttl': self.cache_ttl_spin.value(),
+            'negative_cache_size': self.cache_size_spin.value(),
+            'recheck_alive_file': self.alive_file_edit.text(),
+            'recheck_dead_file': self.dead_file_edit.text(),
+            'recheck_unsure_file': self.unsure_file_edit.text(),
+            'zone_indexes': self.zone_indexes_edit.text(),
+            'seen_filter_file': self.seen_file_edit.text(),
+            'seen_filter_ttl': self.seen_ttl_spin.value(),
+            'max_memory': self.memory_spin.value()
+        }
+
+class DomainGenerator(QThread):
+    """Запуск движка проверки в отдельном потоке с передачей событий через сигналы Qt"""
+    update_progress = pyqtSignal(object, object)  # Проверено и всего: больше 2^31, int Qt не подходит
+    update_log = pyqtSignal(list)  # Пачка строк [(категория, текст)]
+    update_stats = pyqtSignal(str)
+    update_metrics = pyqtSignal(dict)
+    finished = pyqtSignal()
+    
+    def __init__(self, min_length, max_length, settings, resume=False, log_categories=None):
+        super().__init__()
+        # Лог передается в интерфейс пачками, а не по одной строке
+        self.log_batcher = LogBatcher(categories=log_categories or [category for category, _ in LOG_FILTERS])
+        self.engine = self.create_engine(min_length, max_length, settings, resume)
+    
+    def create_engine(self, min_length, max_length, settings, resume):
+        # При продолжении параметры пространства берутся из файла состояния
+        if resume:
+            return resume_scan(settings, events=self)
+        return create_scan(min_length, max_length, settings, events=self)
+    
+    def flush_log(self):
+        batch = self.log_batcher.take()
+        if batch:
+            self.update_log.emit(batch)
+    
+    def on_log(self, message, category=LOG_INFO):
+        if self.log_batcher.add(message, category):
+            self.flush_log()
+    
+    def on_progress(self, stats):
+        self.flush_log()
+        self.update_progress.emit(stats['checked'], stats['total'])
+        self.update_stats.emit(ScanEngine.format_stats(stats))
+    
+    def on_found(self, record):
+        kind = "Парковка" if record.get('parked') else "Рабочий сайт"
+        self.on_log(f"✓ {kind}: {record['domain']}", LOG_FOUND)
+    
+    def on_checkpoint(self, state):
+        pass
+    
+    def on_metrics(self, snapshot):
+        self.update_metrics.emit(snapshot)
+    
+    def on_finished(self):
+        self.flush_log()
+        self.finished.emit()
+    
+    def run(self):
+        self.engine.run()
+    
+    def stop(self):
+        """Остановка генерации"""
+        self.engine.stop()
+
+class RecheckWorker(DomainGenerator):
+    """Перепроверка списка сайтов в отдельном потоке"""
+    
+    def __init__(self, files, settings, resume=False):
+        self.files = files
+        super().__init__(None, None, settings, resume=resume, log_categories=[LOG_ERROR, LOG_INFO])
+    
+    def create_engine(self, min_length, max_length, settings, resume):
+        if resume:
+            return resume_recheck(settings, events=self)
+        return RecheckEngine(self.files, settings, events=self)
+
+class DedupeWorker(QThread):
+    """Поиск или удаление дубликатов в отдельном потоке"""
+    update_progress = pyqtSignal(str, int)  # Этап и процент
+    done = pyqtSignal(object)  # Итог или None при остановке
+    error = pyqtSignal(str)
+    
+    def __init__(self, filename, remove, memory_limit):
+        super().__init__()
+        self.remove = remove
+        self.deduplicator = Deduplicator(filename, memory_limit=memory_limit, progress=self.on_progress)
+    
+    def on_progress(self, stage, done, total):
+        self.update_progress.emit(stage, int(done * 100 / total) if total else 100)
+    
+    def run(self):
+        try:
+            if self.remove:
+                self.done.emit(self.deduplicator.remove())
+            else:
+                self.done.emit(self.deduplicator.check())
+        except Exception as e:
+            self.error.emit(str(e))
+    
+    def stop(self):
+        self.deduplicator.stop()
+
+class StoreWorker(QThread):
+    """Запрос к базе результатов SQLite в отдельном потоке: stats, check_duplicates или export"""
+    update_progress = pyqtSignal(str, int)
+    done = pyqtSignal(object)
+    error = pyqtSignal(str)
+    
+    def __init__(self, filename, action, *args, **kwargs):
+        super().__init__()
+        self.store = ResultStore(filename, progress=self.on_progress)
+        self.action = getattr(self.store, action)
+        self.args, self.kwargs = args, kwargs
+    
+    def on_progress(self, stage, done, total):
+        self.update_progress.emit(stage, int(done * 100 / total) if total else 100)
+    
+    def run(self):
+        try:
+            self.done.emit(self.action(*self.args, **self.kwargs))
+        except Exception as e:
+            self.error.emit(str(e))
+        finally:
+            self.store.close()
+    
+    def stop(self):
+        self.store.stop()
+
+class CheckerTab(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.worker = None
+        self.store_mode = False  # Файл проверки - база SQLite
+        self.init_ui()
+        
+    def init_ui(self):
+        layout = QVBoxLayout()
+        layout.setContentsMargins(10, 10, 10, 10)
+        
+        # Группа действий
+        action_group = QGroupBox("Действия")
+        action_layout = QVBoxLayout()
+        
+        # Кнопки действий
+        btn_layout = QHBoxLayout()
+        self.check_btn = QPushButton("Проверить дубликаты")
+        self.check_btn.clicked.connect(self.check_duplicates)
+        btn_layout.addWidget(self.check_btn)
+        
+        self.remove_btn = QPushButton("Удалить дубликаты")
+        self.remove_btn.clicked.connect(self.remove_duplicates)
+        self.remove_btn.setEnabled(False)
+        btn_layout.addWidget(self.remove_btn)
+        
+        self.stop_btn = QPushButton("Остановить")
+        self.stop_btn.clicked.connect(self.stop)
+        self.stop_btn.setEnabled(False)
+        btn_layout.addWidget(self.stop_btn)
+        
+        action_layout.addLayout(btn_layout)
+        
+        self.progress = QProgressBar()
+        self.progress.setRange(0, 100)
+        self.progress.setAlignment(Qt.AlignCenter)
+        self.progress.setValue(0)
+        self.progress.setFormat("Ожидание запуска")
+        action_layout.addWidget(self.progress)
+        
+        action_group.setLayout(action_layout)
+        layout.addWidget(action_group)
+        
+        # Запросы к базе результатов
+        store_group = QGroupBox("База результатов (SQLite)")
+        store_layout = QVBoxLayout()
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("Зоны:"))
+        self.tlds_edit = QLineEdit()
+        self.tlds_edit.setPlaceholderText("все, или через запятую: com, org")
+        filter_layout.addWidget(self.tlds_edit)
+        filter_layout.addWidget(QLabel("Длина от:"))
+        self.min_length_spin = QSpinBox()
+        self.min_length_spin.setRange(0, 63)
+        self.min_length_spin.setSpecialValueText("любая")
+        filter_layout.addWidget(self.min_length_spin)
+        filter_layout.addWidget(QLabel("до:"))
+        self.max_length_spin = QSpinBox()
+        self.max_length_spin.setRange(0, 63)
+        self.max_length_spin.setSpecialValueText("любая")
+        filter_layout.addWidget(self.max_length_spin)
+        self.scheme_combo = QComboBox()
+        self.scheme_combo.addItem("Любая схема", None)
+        self.scheme_combo.addItem("HTTPS", 'https')
+        self.scheme_combo.addItem("HTTP", 'http')
+        filter_layout.addWidget(self.scheme_combo)
+        self.alive_check = QCheckBox("Только рабочие")
+        self.alive_check.setChecked(True)
+        filter_layout.addWidget(self.alive_check)
+        self.no_parked_check = QCheckBox("Без парковок")
+        self.no_parked_check.setChecked(True)
+        filter_layout.addWidget(self.no_parked_check)
+        filter_layout.addWidget(QLabel("За дней:"))
+        self.days_spin = QSpinBox()
+        self.days_spin.setRange(0, 36500)
+        self.days_spin.setSpecialValueText("все время")
+        filter_layout.addWidget(self.days_spin)
+        store_layout.addLayout(filter_layout)
+        
+        store_btn_layout = QHBoxLayout()
+        self.stats_btn = QPushButton("Статистика")
+        self.stats_btn.clicked.connect(self.show_stats)
+        store_btn_layout.addWidget(self.stats_btn)
+        self.export_btn = QPushButton("Выгрузить выборку...")
+        self.export_btn.clicked.connect(self.export_results)
+        store_btn_layout.addWidget(self.export_btn)
+        store_layout.addLayout(store_btn_layout)
+        store_group.setLayout(store_layout)
+        layout.addWidget(store_group)
+        
+        # Группа лога
+        log_group = QGroupBox("Лог проверки")
+        log_layout = QVBoxLayout()
+        self.log = QTextEdit()
+        self.log.setReadOnly(True)
+        log_layout.addWidget(self.log)
+        log_group.setLayout(log_layout)
+        layout.addWidget(log_group, 1)
+        
+        self.setLayout(layout)
+    
+    def get_check_file(self):
+        main_window = self.window()
+        if hasattr(main_window, 'app_settings'):
+            return main_window.app_settings['check_file']
+        return 'sites.txt'  # Значение по умолчанию
+    
+    def get_memory_limit(self):
+        main_window = self.window()
+        max_memory = main_window.app_settings['max_memory'] if hasattr(main_window, 'app_settings') else DEFAULT_SETTINGS['max_memory']
+        return max_memory * 1024 * 1024
+    
+    def is_file_in_use(self, filename):
+        """Идет ли генерация с записью в этот же файл"""
+        main_window = self.window()
+        generator = getattr(main_window, 'generator_tab', None)
+        if generator is None or not generator.worker or not generator.worker.isRunning():
+            return False
+        output_file = main_window.app_settings['output_file']
+        return os.path.abspath(output_file) == os.path.abspath(filename)
+    
+    def is_store(self, filename):
+        return os.path.splitext(filename)[1].lower() in UNIQUE_EXTENSIONS
+    
+    def get_filters(self):
+        """Условия выборки из полей вкладки (см. scanner.results.ResultStore)"""
+        days = self.days_spin.value()
+        return {
+            'tlds': parse_filter_tlds(self.tlds_edit.text()),
+            'min_length': self.min_length_spin.value(),
+            'max_length': self.max_length_spin.value(),
+            'scheme': self.scheme_combo.currentData(),
+            'alive': self.alive_check.isChecked(),
+            'since': time.time() - days * 86400 if days else None,
+            'parked': False if self.no_parked_check.isChecked() else None
+        }
+    
+    def get_store_file(self):
+        """Файл проверки, если это база результатов; иначе сообщение в лог и None"""
+        filename = self.get_check_file()
+        if not filename or not os.path.exists(filename):
+            self.log.append("Файл не найден!")
+            return None
+        if not self.is_store(filename):
+            self.log.append("Статистика и выгрузка доступны для базы результатов SQLite (.db, .sqlite)")
+            return None
+        return filename
+    
+    def show_stats(self):
+        filename = self.get_store_file()
+        if filename:
+            self.log.append(f"Статистика базы: {filename}")
+            self.start_store_worker(filename, self.stats_finished, 'stats')
+    
+    def export_results(self):
+        filename = self.get_store_file()
+        if not filename:
+            return
+        target, _ = QFileDialog.getSaveFileName(self, "Выгрузка выборки", "",
+                                                "Текст (*.txt);;JSON Lines (*.jsonl);;SQLite (*.db)")
+        if not target:
+            return
+        if self.is_file_in_use(target):
+            QMessageBox.warning(self, "Выгрузка", "В этот файл сейчас записываются результаты генерации.")
+            return
+        self.log.append(f"Выгрузка из {filename} в {target}")
+        self.start_store_worker(filename, self.export_finished, 'export', target, **self.get_filters())
+    
+    def start_store_worker(self, filename, finished, action, *args, **kwargs):
+        try:
+            self.worker = StoreWorker(filename, action, *args, **kwargs)
+            self.worker.update_progress.connect(self.update_progress)
+            self.worker.done.connect(finished)
+            self.worker.error.connect(self.worker_error)
+            self.set_running(True)
+            self.worker.start()
+        except Exception as e:
+            self.log.append(f"Ошибка при открытии базы: {str(e)}")
+            self.set_running(False)
+    
+    def stats_finished(self, stats):
+        self.set_running(False)
+        self.progress.setValue(100)
+        self.progress.setFormat("Готово")
+        self.log.append(f"Всего сайтов: {stats['total']}, рабочих: {stats['alive']}, парковок: {stats['parked']}")
+        self.log.append(f"Найдено за сутки: {stats['day']}, за неделю: {stats['week']}")
+        if stats['first_found'] is not None:
+            first = time.strftime('%Y-%m-%d %H:%M', time.localtime(stats['first_found']))
+            last = time.strftime('%Y-%m-%d %H:%M', time.localtime(stats['last_found']))
+            self.log.append(f"Первая находка: {first}, последняя: {last}")
+        for title, key in (("По зонам", 'tlds'), ("По длине имени", 'lengths'),
+                           ("По схемам", 'schemes'), ("По статусам", 'statuses')):
+            if stats[key]:
+                self.log.append(f"{title}: " + ", ".join(f"{value}: {count}" for value, count in stats[key][:30]))
+    
+    def export_finished(self, written):
+        self.set_running(False)
+        if written is None:
+            self.progress.setFormat("Остановлено")
+            self.log.append("Выгрузка остановлена, файл не изменен")
+            return
+        self.progress.setValue(100)
+        self.progress.setFormat("Готово")
+        self.log.append(f"Выгружено сайтов: {written}")
+    
+    def check_duplicates(self):
+        self.run_worker(remove=False)
+    
+    def remove_duplicates(self):
+        self.run_worker(remove=True)
+    
+    def run_worker(self, remove):
+        try:
+            filename = self.get_check_file()
+            if not filename or not os.path.exists(filename):
+                self.log.append("Файл не найден!")
+                return
+            
+            if remove and self.is_file_in_use(filename):
+                QMessageBox.warning(self, "Удаление дубликатов",
+                                    "В этот файл сейчас записываются результаты генерации. Остановите генерацию.")
+                return
+            
+            self.store_mode = self.is_store(filename)
+            if self.store_mode:
+                # Домен хранится в базе один раз: проверка - запрос по счетчику находок
+                self.log.append(f"Проверка базы: {filename}")
+                self.start_store_worker(filename, self.check_finished, 'check_duplicates')
+                return
+            
+            self.log.append("Удаление дубликатов..." if remove else f"Проверка файла: {filename}")
+            self.worker = DedupeWorker(filename, remove, self.get_memory_limit())
+            self.worker.update_progress.connect(self.update_progress)
+            self.worker.done.connect(self.removal_finished if remove else self.check_finished)
+            self.worker.error.connect(self.worker_error)
+            self.set_running(True)
+            self.worker.start()
+            
+        except Exception as e:
+            self.log.append(f"Ошибка при запуске проверки: {str(e)}")
+            self.set_running(False)
+    
+    def set_running(self, running):
+        self.check_btn.setEnabled(not running)
+        self.stats_btn.setEnabled(not running)
+        self.export_btn.setEnabled(not running)
+        self.stop_btn.setEnabled(running)
+        if running:
+            self.remove_btn.setEnabled(False)
+    
+    def update_progress(self, stage, percent):
+        self.progress.setValue(percent)
+        self.progress.setFormat(f"{stage}: {percent}%")
+    
+    def check_finished(self, report):
+        self.set_running(False)
+        if report is None:
+            self.progress.setFormat("Остановлено")
+            self.log.append("Проверка остановлена")
+            return
+        
+        if self.store_mode:
+            self.progress.setValue(100)
+            self.progress.setFormat("Готово")
+            self.log.append(f"Проверка завершена:")
+            self.log.append(f"Находок всего: {report['total']}")
+            self.log.append(f"Сайтов в базе: {report['unique']}")
+            self.log.append(f"Повторных находок: {report['duplicates']}")
+            if report['top']:
+                self.log.append("\nПовторные находки (самые частые):")
+                for domain, count in report['top']:
+                    self.log.append(f"  - {domain}: находок {count}")
+            self.log.append("\nВ базе повторные находки уже объединены, удалять нечего")
+            return
+        
+        self.log.append(f"Проверка завершена:")
+        self.log.append(f"Всего сайтов: {report['total']}")
+        self.log.append(f"Уникальных: {report['unique']}")
+        self.log.append(f"Дубликатов: {report['duplicates']}")
+        
+        if report['top']:
+            self.log.append("\nНайдены дубликаты (самые частые):")
+            for domain, count in report['top']:
+                self.log.append(f"  - {domain}: {count} повторений")
+        
+        if report['duplicates'] > 0:
+            self.remove_btn.setEnabled(True)
+            self.log.append("\nНажмите 'Удалить дубликаты' для очистки файла")
+        else:
+            self.remove_btn.setEnabled(False)
+            self.log.append("\nДубликаты не найдены!")
+    
+    def removal_finished(self, report):
+        self.set_running(False)
+        if report is None:
+            self.progress.setFormat("Остановлено")
+            self.log.append("Удаление остановлено, файл не изменен")
+            self.remove_btn.setEnabled(True)
+            return
+        
+        if not report['duplicates']:
+            self.log.append("Дубликаты не найдены, файл не изменен")
+            return
+        self.log.append(f"Удалено дубликатов: {report['duplicates']}")
+        self.log.append(f"Сохранено уникальных: {report['unique']}")
+        self.log.append("Файл успешно обновлен!")
+    
+    def worker_error(self, message):
+        self.set_running(False)
+        self.progress.setFormat("Ошибка")
+        self.log.append(f"Ошибка при обработке файла: {message}")
+    
+    def stop(self):
+        if self.worker:
+            self.worker.stop()
+            self.stop_btn.setEnabled(False)
+
+class GeneratorTab(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.worker = None
+        self.init_ui()
+        
+    def init_ui(self):
+        layout = QVBoxLayout()
+        layout.setContentsMargins(10, 10, 10, 10)
+        
+        settings_group = QGroupBox("Параметры генерации")
+        settings_layout = QVBoxLayout()
+        
+        len_layout = QHBoxLayout()
+        len_layout.addWidget(QLabel("Мин. длина:"))
+        self.min_spin = QSpinBox()
+        self.min_spin.setRange(1, 5)
+        self.min_spin.setValue(3)
+        len_layout.addWidget(self.min_spin)
+        
+        len_layout.addWidget(QLabel("Макс. длина:"))
+        self.max_spin = QSpinBox()
+        self.max_spin.setRange(1, 5)
+        self.max_spin.setValue(4)
+        len_layout.addWidget(self.max_spin)
+        settings_layout.addLayout(len_layout)
+        
+        # Шаблоны имен вместо перебора по длине
+        pattern_layout = QHBoxLayout()
+        pattern_layout.addWidget(QLabel("Шаблоны:"))
+        self.patterns_edit = QLineEdit()
+        self.patterns_edit.setPlaceholderText("пусто - все имена заданной длины")
+        self.patterns_edit.setToolTip("Шаблоны через \";\": ?l - буква, ?d - цифра, ?a - буква или цифра, ?h - также дефис, "
+                                      "?v - гласная, ?c - согласная, [a-f] - набор, {словарь}, {a|b} - варианты. "
+                                      "Например: ?c?v?c; {words}?d")
+        pattern_layout.addWidget(self.patterns_edit)
+        pattern_layout.addWidget(QLabel("Словари:"))
+        self.wordlists_edit = QLineEdit()
+        self.wordlists_edit.setPlaceholderText("имя=файл; ...")
+        self.wordlists_edit.setToolTip("Файлы слов (по слову на строку) для {имя} в шаблонах, через \";\"")
+        pattern_layout.addWidget(self.wordlists_edit)
+        settings_layout.addLayout(pattern_layout)
+        
+        tld_info = QLabel(f"Доменные зоны: {', '.join(DEFAULT_TLDS)} (полный перебор в случайном порядке)")
+        tld_info.setStyleSheet("color: #888; font-style: italic;")
+        settings_layout.addWidget(tld_info)
+        
+        settings_group.setLayout(settings_layout)
+        
+        control_layout = QHBoxLayout()
+        self.start_btn = QPushButton("Начать генерацию")
+        self.start_btn.clicked.connect(self.start)
+        self.resume_btn = QPushButton("Продолжить")
+        self.resume_btn.setToolTip("Продолжить прерванную проверку с места остановки")
+        self.resume_btn.clicked.connect(self.resume)
+        self.stop_btn = QPushButton("Остановить")
+        self.stop_btn.setEnabled(False)
+        self.stop_btn.clicked.connect(self.stop)
+        control_layout.addWidget(self.start_btn)
+        control_layout.addWidget(self.resume_btn)
+        control_layout.addWidget(self.stop_btn)
+        
+        self.progress = QProgressBar()
+        self.progress.setRange(0, 100)
+        self.progress.setAlignment(Qt.AlignCenter)
+        self.progress.setValue(0)
+        self.progress.setFormat("Ожидание запуска")
+        
+        self.status = QLabel("Готов к работе")
+        self.status.setAlignment(Qt.AlignCenter)
+        self.status.setStyleSheet("font-weight: bold;")
+        
+        # Метрики этапов; сворачиваются снятием флажка
+        self.metrics_group = QGroupBox("Метрики")
+        self.metrics_group.setCheckable(True)
+        self.metrics_group.setChecked(False)
+        metrics_layout = QVBoxLayout()
+        self.metrics_table = QTableWidget(len(METRIC_STAGES), 4)
+        self.metrics_table.setHorizontalHeaderLabels(["Этап", "Замеров", "p50, мс", "p99, мс"])
+        self.metrics_table.verticalHeader().setVisible(False)
+        self.metrics_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.metrics_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        for row, (_, title) in enumerate(METRIC_STAGES):
+            self.metrics_table.setItem(row, 0, QTableWidgetItem(title))
+        self.metrics_table.setFixedHeight(self.metrics_table.horizontalHeader().height() +
+                                          self.metrics_table.verticalHeader().length() + 4)
+        metrics_layout.addWidget(self.metrics_table)
+        self.metrics_label = QLabel("Нет данных")
+        self.metrics_label.setWordWrap(True)
+        metrics_layout.addWidget(self.metrics_label)
+        self.metrics_group.setLayout(metrics_layout)
+        self.metrics_group.toggled.connect(self.metrics_table.setVisible)
+        self.metrics_group.toggled.connect(self.metrics_label.setVisible)
+        self.metrics_table.setVisible(False)
+        self.metrics_label.setVisible(False)
+        
+        log_group = QGroupBox("Лог выполнения")
+        log_layout = QVBoxLayout()
+        
+        # Фильтр категорий лога (применяется и во время проверки)
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("Показывать:"))
+        self.log_filters = {}
+        for category, title in LOG_FILTERS:
+            checkbox = QCheckBox(title)
+            checkbox.toggled.connect(self.update_log_filter)
+            filter_layout.addWidget(checkbox)
+            self.log_filters[category] = checkbox
+        filter_layout.addStretch()
+        log_layout.addLayout(filter_layout)
+        
+        # Ограниченный лог: старые строки удаляются автоматически
+        self.log = QPlainTextEdit()
+        self.log.setReadOnly(True)
+        self.log.setMaximumBlockCount(5000)
+        log_layout.addWidget(self.log)
+        log_group.setLayout(log_layout)
+        
+        self.found_format = QTextCharFormat()
+        self.found_format.setForeground(QColor("#00ff00"))
+        self.found_format.setFontWeight(QFont.Bold)
+        self.error_format = QTextCharFormat()
+        self.error_format.setForeground(QColor("#ff5555"))
+        
+        layout.addWidget(settings_group)
+        layout.addLayout(control_layout)
+        layout.addWidget(self.progress)
+        layout.addWidget(self.status)
+        layout.addWidget(self.metrics_group)
+        layout.addWidget(log_group, 1)
+        
+        self.setLayout(layout)
+    
+    def get_output_file(self):
+        main_window = self.window()
+        if hasattr(main_window, 'app_settings'):
+            return main_window.app_settings['output_file']
+        return 'sites.txt'  # Значение по умолчанию
+    
+    def start(self):
+        try:
+            min_len = self.min_spin.value()
+            max_len = self.max_spin.value()
+            patterns = self.patterns_edit.text().strip()
+            file = self.get_output_file()
+            
+            # С шаблонами длина имени задается ими
+            if not patterns and min_len > max_len:
+                QMessageBox.critical(self, "Ошибка", "Минимальная длина не может быть больше максимальной")
+                return
+                
+            if not patterns and (min_len < 1 or max_len > 5):
+                QMessageBox.critical(self, "Ошибка", "Длина домена должна быть от 1 до 5 символов")
+                return
+                
+            if not file: 
+                QMessageBox.critical(self, "Ошибка", "Укажите файл для сохранения результатов в настройках")
+                return
+            
+            self.log.clear()
+            self.set_running(True)
+            self.progress.setValue(0)
+            self.log.appendPlainText("Запуск перебора доменов в случайном порядке...")
+            if patterns:
+                self.log.appendPlainText(f"Шаблоны: {patterns}")
+            else:
+                self.log.appendPlainText(f"Диапазон длины: {min_len}-{max_len} символов")
+            self.log.appendPlainText("Доменные зоны: " + ", ".join(DEFAULT_TLDS))
+            self.log.appendPlainText(f"Файл результатов: {file}")
+            
+            # Безопасное получение настроек
+            main_window = self.window()
+            if hasattr(main_window, 'app_settings'):
+                settings = main_window.app_settings
+                self.log.appendPlainText(f"Настройки производительности: DNS={settings['dns_workers']}, "
+                               f"HTTP={settings['http_workers']}, "
+                               f"Очередь={settings['queue_size']}, "
+                               f"Батч={settings['batch_size']}, "
+                               f"Процессов={settings['processes']}, "
+                               f"DNS в секунду={settings['dns_qps']} на сервер, "
+                               f"HTTP в секунду={settings['http_qps'] or 'без ограничения'}")
+            else:
+                settings = {**DEFAULT_SETTINGS, 'output_file': file}
+            settings = {**settings, 'patterns': patterns, 'wordlists': self.wordlists_edit.text().strip()}
+            
+            if not os.path.exists(file):
+                with open(file, 'w') as f:
+                    self.log.appendPlainText(f"Создан новый файл: {file}")
+            
+            try:
+                total = len(create_space(settings, DEFAULT_CHARS, min_len, max_len, DEFAULT_TLDS))
+            except (OSError, ValueError) as e:
+                QMessageBox.critical(self, "Ошибка", f"Не удалось начать генерацию: {str(e)}")
+                self.set_running(False)
+                return
+            self.log.appendPlainText(f"Всего возможных доменов: {total:,}")
+            
+            self.run_worker(DomainGenerator(min_len, max_len, settings, log_categories=self.log_categories()))
+            
+        except Exception as e:
+            error_msg = f"Ошибка при запуске генерации: {str(e)}\n{traceback.format_exc()}"
+            self.log.appendPlainText(error_msg)
+            print(error_msg)
+            self.set_running(False)
+    
+    def resume(self):
+        try:
+            main_window = self.window()
+            settings = main_window.app_settings if hasattr(main_window, 'app_settings') else dict(DEFAULT_SETTINGS)
+            checkpoint_file = settings['checkpoint_file']
+            
+            if not can_resume(checkpoint_file):
+                QMessageBox.information(self, "Продолжение", "Нет прерванной проверки для продолжения")
+                return
+            
+            self.log.clear()
+            self.set_running(True)
+            self.log.appendPlainText(f"Продолжение проверки из файла состояния: {checkpoint_file}")
+            self.log.appendPlainText(f"Файл результатов: {settings['output_file']}")
+            
+            self.run_worker(DomainGenerator(None, None, settings, resume=True, log_categories=self.log_categories()))
+            
+        except Exception as e:
+            error_msg = f"Ошибка при продолжении генерации: {str(e)}\n{traceback.format_exc()}"
+            self.log.appendPlainText(error_msg)
+            print(error_msg)
+            self.set_running(False)
+    
+    def run_worker(self, worker):
+        self.worker = worker
+        self.worker.update_progress.connect(self.update_progress)
+        self.worker.update_log.connect(self.append_log_batch)
+        self.worker.update_stats.connect(self.status.setText)
+        self.worker.update_metrics.connect(self.update_metrics)
+        self.worker.finished.connect(self.task_finished)
+        self.worker.start()
+    
+    def set_running(self, running):
+        self.start_btn.setEnabled(not running)
+        self.resume_btn.setEnabled(not running)
+        self.stop_btn.setEnabled(running)
+    
+    def update_progress(self, current, total):
+        if total > 0:
+            percent = int(current / total * 100)
+            self.progress.setValue(percent)
+            self.progress.setFormat(f"{percent}% ({current}/{total})")
+    
+    def update_metrics(self, snapshot):
+        """Задержки этапов, очереди и ответы DNS из снимка метрик"""
+        summaries = stage_summaries(snapshot)
+        for row, (stage, _) in enumerate(METRIC_STAGES):
+            summary = summaries[stage]
+            values = (summary['count'], summary['p50_ms'], summary['p99_ms'])
+            for column, value in enumerate(values, start=1):
+                self.metrics_table.setItem(row, column, QTableWidgetItem("-" if value is None else str(value)))
+        
+        queues = '/'.join(str(gauge_value(snapshot, 'queue_depth', queue=name)) for name in ('dns', 'http', 'result'))
+        in_flight = '/'.join(str(gauge_value(snapshot, 'in_flight', stage=stage)) for stage in ('dns', 'http'))
+        rcodes = sorted(counter_values(snapshot, 'dns_queries', 'rcode').items(), key=lambda item: -item[1])
+        text = f"Очереди DNS/HTTP/запись: {queues} | В работе DNS/HTTP: {in_flight}"
+        if rcodes:
+            text += " | Ответы DNS: " + ", ".join(f"{rcode} {count}" for rcode, count in rcodes)
+        self.metrics_label.setText(text)
+    
+    def load_log_settings(self, settings):
+        """Фильтр и размер лога из настроек приложения"""
+        enabled = settings['log_categories'].split(',')
+        for category, checkbox in self.log_filters.items():
+            checkbox.setChecked(category in enabled)
+        self.log.setMaximumBlockCount(settings['log_max_lines'])
+    
+    def log_categories(self):
+        return [category for category, checkbox in self.log_filters.items() if checkbox.isChecked()]
+    
+    def update_log_filter(self):
+        categories = self.log_categories()
+        if self.worker:
+            self.worker.log_batcher.set_categories(categories)
+        main_window = self.window()
+        if hasattr(main_window, 'app_settings'):
+            main_window.app_settings['log_categories'] = ','.join(categories)
+    
+    def append_log_batch(self, batch):
+        """Вывод пачки строк лога одной вставкой (найденные и ошибки выделяются)"""
+        cursor = self.log.textCursor()
+        cursor.movePosition(cursor.End)
+        cursor.beginEditBlock()
+        plain_format = QTextCharFormat()
+        for category, message in batch:
+            if not self.log.document().isEmpty():
+                cursor.insertBlock()
+            if category == LOG_FOUND:
+                cursor.insertText(message, self.found_format)
+            elif category == LOG_ERROR:
+                cursor.insertText(message, self.error_format)
+            else:
+                cursor.insertText(message, plain_format)
+        cursor.endEditBlock()
+        self.log.ensureCursorVisible()
+    
+    def task_finished(self):
+        self.set_running(False)
+        self.log.appendPlainText("Генерация завершена!")
+    
+    def stop(self):
+        if self.worker:
+            self.worker.stop()
+            self.stop_btn.setEnabled(False)
+            self.log.appendPlainText("Остановка генерации... Пожалуйста, подождите")
+
+class RecheckTab(QWidget):
+    """Повторная проверка готового списка сайтов: какие еще работают"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.worker = None
+        self.init_ui()
+    
+    def init_ui(self):
+        layout = QVBoxLayout()
+        layout.setContentsMargins(10, 10, 10, 10)
+        
+        files_group = QGroupBox("Список сайтов")
+        files_layout = QHBoxLayout()
+        self.files_edit = QLineEdit()
+        self.files_edit.setPlaceholderText("Файлы .txt или .jsonl через \";\" (по умолчанию - файл для проверки из настроек)")
+        files_layout.addWidget(self.files_edit)
+        self.browse_btn = QPushButton("Выбрать")
+        self.browse_btn.clicked.connect(self.browse_files)
+        files_layout.addWidget(self.browse_btn)
+        files_group.setLayout(files_layout)
+        layout.addWidget(files_group)
+        
+        control_layout = QHBoxLayout()
+        self.start_btn = QPushButton("Перепроверить")
+        self.start_btn.clicked.connect(self.start)
+        self.resume_btn = QPushButton("Продолжить")
+        self.resume_btn.setToolTip("Продолжить прерванную перепроверку с места остановки")
+        self.resume_btn.clicked.connect(self.resume)
+        self.stop_btn = QPushButton("Остановить")
+        self.stop_btn.setEnabled(False)
+        self.stop_btn.clicked.connect(self.stop)
+        control_layout.addWidget(self.start_btn)
+        control_layout.addWidget(self.resume_btn)
+        control_layout.addWidget(self.stop_btn)
+        layout.addLayout(control_layout)
+        
+        self.progress = QProgressBar()
+        self.progress.setRange(0, 100)
+        self.progress.setAlignment(Qt.AlignCenter)
+        self.progress.setValue(0)
+        self.progress.setFormat("Ожидание запуска")
+        layout.addWidget(self.progress)
+        
+        self.status = QLabel("Готов к работе")
+        self.status.setAlignment(Qt.AlignCenter)
+        self.status.setStyleSheet("font-weight: bold;")
+        layout.addWidget(self.status)
+        
+        log_group = QGroupBox("Лог перепроверки")
+        log_layout = QVBoxLayout()
+        self.log = QPlainTextEdit()
+        self.log.setReadOnly(True)
+        self.log.setMaximumBlockCount(5000)
+        log_layout.addWidget(self.log)
+        log_group.setLayout(log_layout)
+        layout.addWidget(log_group, 1)
+        
+        self.setLayout(layout)
+    
+    def get_settings(self):
+        main_window = self.window()
+        return main_window.app_settings if hasattr(main_window, 'app_settings') else dict(DEFAULT_SETTINGS)
+    
+    def browse_files(self):
+        filenames, _ = QFileDialog.getOpenFileNames(self, "Выберите списки сайтов", "",
+                                                    "Списки сайтов (*.txt *.jsonl *.ndjson);;Все файлы (*)")
+        if filenames:
+            self.files_edit.setText(';'.join(filenames))
+    
+    def start(self):
+        settings = self.get_settings()
+        files = [path.strip() for path in self.files_edit.text().split(';') if path.strip()]
+        files = files or [settings.get('check_file', 'sites.txt')]
+        missing = [path for path in files if not os.path.exists(path)]
+        if missing:
+            QMessageBox.critical(self, "Ошибка", f"Файл не найден: {missing[0]}")
+            return
+        try:
+            worker = RecheckWorker(files, settings)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Ошибка", str(e))
+            return
+        self.log.clear()
+        self.log.appendPlainText(f"Перепроверка: {', '.join(files)}")
+        self.log.appendPlainText(f"Работают: {settings['recheck_alive_file']}, не работают: {settings['recheck_dead_file']}, "
+                                 f"не ответили: {settings['recheck_unsure_file']}")
+        self.run_worker(worker)
+    
+    def resume(self):
+        settings = self.get_settings()
+        if not can_resume(settings['recheck_checkpoint_file']):
+            QMessageBox.information(self, "Продолжение", "Нет прерванной перепроверки для продолжения")
+            return
+        try:
+            worker = RecheckWorker(None, settings, resume=True)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось продолжить перепроверку: {str(e)}")
+            return
+        self.log.clear()
+        self.log.appendPlainText(f"Продолжение перепроверки: {', '.join(worker.engine.paths)}")
+        self.run_worker(worker)
+    
+    def run_worker(self, worker):
+        self.worker = worker
+        self.worker.update_progress.connect(self.update_progress)
+        self.worker.update_log.connect(self.append_log_batch)
+        self.worker.update_stats.connect(self.status.setText)
+        self.worker.finished.connect(self.task_finished)
+        self.set_running(True)
+        self.progress.setValue(0)
+        self.worker.start()
+    
+    def set_running(self, running):
+        self.start_btn.setEnabled(not running)
+        self.resume_btn.setEnabled(not running)
+        self.browse_btn.setEnabled(not running)
+        self.stop_btn.setEnabled(running)
+    
+    def update_progress(self, current, total):
+        if total > 0:
+            percent = int(current / total * 100)
+            self.progress.setValue(percent)
+            self.progress.setFormat(f"{percent}% ({current}/{total})")
+    
+    def append_log_batch(self, batch):
+        for _, message in batch:
+            self.log.appendPlainText(message)
+    
+    def task_finished(self):
+        self.set_running(False)
+        self.log.appendPlainText("Перепроверка завершена!")
+    
+    def stop(self):
+        if self.worker:
+            self.worker.stop()
+            self.stop_btn.setEnabled(False)
+            self.log.appendPlainText("Остановка перепроверки... Пожалуйста, подождите")
+
+class DomainGeneratorApp(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.settings_manager = SettingsManager()
+        self.app_settings = self.settings_manager.load()
+        self.setWindowTitle("Генератор сайтов (Случайный подбор)")
+        self.setWindowIcon(self.style().standardIcon(QStyle.SP_ComputerIcon))
+        self.init_ui()
+        
+    def init_ui(self):
+        central = QWidget()
+        main_layout = QVBoxLayout(central)
+        main_layout.setContentsMargins(5, 5, 5, 5)
+        
+        # Восстановление геометрии окна
+        if self.app_settings.get('window_geometry'):
+            self.restoreGeometry(self.app_settings['window_geometry'])
+        
+        # Установка флага "Поверх других окон"
+        if self.app_settings.get('always_on_top', False):
+            self.setWindowFlags(self.windowFlags() | Qt.WindowStaysOnTopHint)
+        
+        # Создаем панель инструментов в правом верхнем углу
+        toolbar_layout = QHBoxLayout()
+        toolbar_layout.addStretch()  # Добавляем растяжку слева
+        
+        # Кнопка настроек
+        self.settings_btn = QPushButton()
+        self.settings_btn.setIcon(QIcon.fromTheme(
+            "preferences-system", 
+            self.style().standardIcon(QStyle.SP_FileDialogDetailedView)
+        ))
+        self.settings_btn.setToolTip("Настройки")
+        self.settings_btn.clicked.connect(self.open_settings)
+        
+        # Если иконка недоступна, показываем текст
+        if self.settings_btn.icon().isNull():
+            self.settings_btn.setText("Настройки")
+        
+        toolbar_layout.addWidget(self.settings_btn)
+        main_layout.addLayout(toolbar_layout)
+        
+        # Создаем вкладки
+        self.tabs = QTabWidget()
+        
+        # Вкладка генерации
+        self.generator_tab = GeneratorTab()
+        self.generator_tab.load_log_settings(self.app_settings)
+        self.tabs.addTab(self.generator_tab, "Генератор")
+        
+        # Вкладка проверки
+        self.checker_tab = CheckerTab()
+        self.tabs.addTab(self.checker_tab, "Проверка дубликатов")
+        
+        # Вкладка перепроверки списка
+        self.recheck_tab = RecheckTab()
+        self.tabs.addTab(self.recheck_tab, "Перепроверка")
+        
+        main_layout.addWidget(self.tabs)
+        self.setCentralWidget(central)
+        
+        # Устанавливаем начальный размер окна
+        self.resize(800, 600)
+        self.show()
+    
+    def open_settings(self):
+        dialog = SettingsDialog(self.app_settings, self)
+        
+        if dialog.exec_() == QDialog.Accepted:
+            new_settings = dialog.get_settings()
+            
+            # Обновляем настройки
+            self.app_settings.update(new_settings)
+            self.settings_manager.save(self.app_settings)
+            self.generator_tab.load_log_settings(self.app_settings)
+            
+            # Применяем настройку "Поверх других окон"
+            if self.app_settings['always_on_top']:
+                self.setWindowFlags(self.windowFlags() | Qt.WindowStaysOnTopHint)
+            else:
+                self.setWindowFlags(self.windowFlags() & ~Qt.WindowStaysOnTopHint)
+            
+            # Перерисовываем окно
+            self.show()
+    
+    def closeEvent(self, event):
+        # Сохраняем геометрию окна
+        self.app_settings['window_geometry'] = self.saveGeometry()
+        self.settings_manager.save(self.app_settings)
+        
+        # Останавливаем генерацию, если она запущена
+        if hasattr(self.generator_tab, 'worker') and self.generator_tab.worker:
+            self.generator_tab.worker.stop()
+            
+            # Ждем завершения потока, чтобы успело сохраниться состояние (макс 10 секунд)
+            if not self.generator_tab.worker.wait(10000):
+                self.generator_tab.worker.terminate()
+        
+        # Перепроверка тоже сохраняет состояние при остановке
+        if self.recheck_tab.worker and self.recheck_tab.worker.isRunning():
+            self.recheck_tab.worker.stop()
+            if not self.recheck_tab.worker.wait(10000):
+                self.recheck_tab.worker.terminate()
+        
+        # Прерываем обработку дубликатов: исходный файл при этом не меняется
+        if self.checker_tab.worker and self.checker_tab.worker.isRunning():
+            self.checker_tab.worker.stop()
+            self.checker_tab.worker.wait()
+        
+        event.accept()
+
+def main():
+    """Запуск графического интерфейса"""
+    # Глобальный обработчик исключений
+    def handle_exception(exc_type, exc_value, exc_traceback):
+        error_msg = ''.join(traceback.format_exception(exc_type, exc_value, exc_traceback))
+        print(f"Необработанное исключение:\n{error_msg}")
+        
+        # Показываем сообщение об ошибке
+        msg = QMessageBox()
+        msg.setIcon(QMessageBox.Critical)
+        msg.setText("Критическая ошибка")
+        msg.setInformativeText(str(exc_value))
+        msg.setWindowTitle("Ошибка приложения")
+        msg.setDetailedText(error_msg)
+        msg.exec_()
+        
+        # Завершаем приложение
+        sys.exit(1)
+    
+    sys.excepthook = handle_exception
+    
+    app = QApplication(sys.argv)
+    app.setStyle("Fusion")
+    
+    try:
+        window = DomainGeneratorApp()
+        window.show()
+        return app.exec_()
+    except Exception as e:
+        handle_exception(type(e), e, e.__traceback__)
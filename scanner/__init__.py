@@ -0,0 +1,15 @@
+"""Движок генерации и проверки доменов, не зависящий от Qt"""
+
+from .space import DomainSpace, DomainEnumerator, FeistelPermutation
+from .patterns import Pattern, PatternSpace, create_space
+from .engine import (ScanEngine, ScanEvents, DEFAULT_SETTINGS, DEFAULT_CHARS, DEFAULT_TLDS,
+                     LOG_INFO, LOG_ERROR, LOG_DNS, LOG_HTTP, LOG_FOUND, LOG_CATEGORIES)
+from .sharding import ShardedScan, create_scan, resume_scan
+from .recheck import RecheckEngine, resume_recheck
+from .distributed import Coordinator, RemoteWorker, resume_coordinator
+from .checkpoint import save_checkpoint, load_checkpoint, can_resume
+from .logbatch import LogBatcher
+from .dedupe import Deduplicator
+from .results import ResultStore
+from .metrics import LatencyHistogram, ScanMetrics
+from .bench import Benchmark
@@ -0,0 +1,363 @@
+"""Нагрузочный тест движка на локальных заглушках DNS и HTTP/HTTPS.
+
+Заглушки работают в отдельном процессе, чтобы время процессора и память
+движка измерялись без них. DNS-заглушка отвечает на запросы по UDP с
+заданной задержкой, долей несуществующих доменов и отказов (SERVFAIL,
+потерянный ответ). Веб-серверы HTTP и HTTPS отвечают с задержкой, долей
+ошибок и зависаний; HTTPS работает с самоподписанным сертификатом, если его
+удалось создать через openssl, иначе порт HTTPS закрыт.
+
+Судьба домена (существует ли он, есть ли HTTPS, отвечает ли сайт)
+определяется его именем, поэтому повторный запрос получает тот же ответ;
+отказы DNS случайны, как и в жизни. Отчет - скорость проверки, p50/p99
+задержки этапов, время процессора и пиковая память - сохраняется в JSON,
+чтобы сравнивать запуски.
+"""
+
+import asyncio, hashlib, json, multiprocessing, os, platform, queue, random, shutil, signal, socket, ssl, struct, subprocess, sys, tempfile, time
+from datetime import datetime
+
+from .engine import ScanEngine, ScanEvents, LOG_INFO, LOG_ERROR
+from .memory import current_rss
+from .metrics import stage_summaries, counter_values
+
+BENCH_TLD = '.bench.test'
+
+# Параметры заглушек по умолчанию
+DEFAULT_STUB = {
+    'dns_servers': 2,  # DNS-серверов (отдельных портов)
+    'dns_latency': 5.0,  # Задержка ответа DNS (мс)
+    'dns_jitter': 5.0,  # Случайная добавка к задержке (мс, до)
+    'nxdomain': 0.7,  # Доля несуществующих доменов
+    'dns_servfail': 0.0,  # Доля ответов SERVFAIL
+    'dns_drop': 0.0,  # Доля запросов без ответа
+    'http_latency': 20.0,  # Задержка ответа сайта (мс)
+    'http_jitter': 20.0,
+    'http_only': 0.3,  # Доля сайтов без HTTPS (рукопожатие TLS отклоняется)
+    'http_errors': 0.2,  # Доля сайтов, отвечающих статусом 500
+    'http_hang': 0.0,  # Доля сайтов, которые не отвечают вовсе
+}
+
+# Настройки движка, которые в отчет не попадают (временные пути)
+UNREPORTED_SETTINGS = ('output_file', 'ca_file', 'checkpoint_file', 'negative_cache_file', 'nameservers')
+
+DNS_TYPE_A = 1
+DNS_RCODE_SERVFAIL = 2
+DNS_RCODE_NXDOMAIN = 3
+LOCALHOST = '127.0.0.1'
+
+
+def share(name, salt):
+    """Устойчивое псевдослучайное число 0..1 для имени (независимое для разных salt)"""
+    digest = hashlib.blake2b(name.encode(), digest_size=8, key=salt.encode()).digest()
+    return int.from_bytes(digest, 'big') / 2 ** 64
+
+
+def delay(latency, jitter):
+    """Задержка (с) по среднему и случайной добавке в мс"""
+    return (latency + random.random() * jitter) / 1000.0
+
+
+class DnsStub(asyncio.DatagramProtocol):
+    """DNS-сервер заглушки: A 127.0.0.1 или NXDOMAIN по имени домена"""
+
+    def __init__(self, options):
+        self.options = options
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        try:
+            response = self.answer(data)
+        except (ValueError, IndexError, struct.error):
+            return  # Не запрос DNS
+        if response is not None:
+            options = self.options
+            asyncio.get_running_loop().call_later(
+                delay(options['dns_latency'], options['dns_jitter']), self.transport.sendto, response, addr)
+
+    def answer(self, data):
+        query_id, flags, questions = struct.unpack('!HHH', data[:6])
+        if questions != 1:
+            raise ValueError("Ожидался один вопрос")
+        labels, offset = [], 12
+        while data[offset]:
+            length = data[offset]
+            labels.append(data[offset + 1:offset + 1 + length].decode('ascii', 'replace'))
+            offset += 1 + length
+        query_type, _ = struct.unpack('!HH', data[offset + 1:offset + 5])
+        question = data[12:offset + 5]
+        name = '.'.join(labels).lower()
+
+        if random.random() < self.options['dns_drop']:
+            return None
+        records = b''
+        if random.random() < self.options['dns_servfail']:
+            rcode = DNS_RCODE_SERVFAIL
+        elif share(name, 'dns') < self.options['nxdomain']:
+            rcode = DNS_RCODE_NXDOMAIN
+        else:
+            rcode = 0
+            if query_type == DNS_TYPE_A:
+                # Имя - ссылка на вопрос (смещение 12), класс IN, TTL 60
+                records = b'\xc0\x0c' + struct.pack('!HHIH', DNS_TYPE_A, 1, 60, 4) + socket.inet_aton(LOCALHOST)
+        # Ответ (QR), рекурсия доступна (RA), флаг RD из запроса
+        header = struct.pack('!HHHHHH', query_id, 0x8080 | (flags & 0x0100) | rcode,
+                             1, 1 if records else 0, 0, 0)
+        return header + question + records
+
+
+def make_certificate(directory):
+    """Самоподписанный сертификат для *.bench.test: (cert, key) или None без openssl"""
+    openssl = shutil.which('openssl')
+    if not openssl:
+        return None
+    cert, key = os.path.join(directory, 'cert.pem'), os.path.join(directory, 'key.pem')
+    host = BENCH_TLD.lstrip('.')
+    try:
+        subprocess.run(
+            [openssl, 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+             '-keyout', key, '-out', cert, '-subj', f'/CN={host}',
+             '-addext', f'subjectAltName=DNS:*.{host},DNS:{host}'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True, timeout=60
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return cert, key
+
+
+def listen_socket():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((LOCALHOST, 0))
+    sock.listen(1024)
+    return sock
+
+
+def closed_port():
+    """Свободный порт, на котором никто не слушает"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((LOCALHOST, 0))
+        return sock.getsockname()[1]
+
+
+async def run_stub(options, certificate, ready, stop):
+    from aiohttp import web
+
+    async def handle(request):
+        host = request.url.host or ''
+        if share(host, 'hang') < options['http_hang']:
+            await asyncio.sleep(3600)
+        await asyncio.sleep(delay(options['http_latency'], options['http_jitter']))
+        status = 500 if share(host, 'errors') < options['http_errors'] else 200
+        return web.Response(status=status, text="bench")
+
+    def select_host(sslobj, name, context):
+        # Сайты без HTTPS: рукопожатие отклоняется, клиент переходит на HTTP
+        if name and share(name.lower(), 'https') < options['http_only']:
+            return ssl.ALERT_DESCRIPTION_HANDSHAKE_FAILURE
+        return None
+
+    loop = asyncio.get_running_loop()
+    dns_ports = []
+    for _ in range(options['dns_servers']):
+        transport, _ = await loop.create_datagram_endpoint(lambda: DnsStub(options), local_addr=(LOCALHOST, 0))
+        dns_ports.append(transport.get_extra_info('sockname')[1])
+
+    app = web.Application()
+    app.router.add_route('*', '/{tail:.*}', handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    http_socket = listen_socket()
+    await web.SockSite(runner, http_socket).start()
+    https_port = None
+    if certificate:
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(*certificate)
+        context.sni_callback = select_host
+        https_socket = listen_socket()
+        await web.SockSite(runner, https_socket, ssl_context=context).start()
+        https_port = https_socket.getsockname()[1]
+
+    ready.put({'dns_ports': dns_ports, 'http_port': http_socket.getsockname()[1], 'https_port': https_port})
+    await loop.run_in_executor(None, stop.wait)
+    await runner.cleanup()
+
+
+def serve_stub(options, certificate, ready, stop):
+    """Точка входа процесса заглушек"""
+    # Ctrl+C останавливает проверку, заглушки останавливает родитель
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(run_stub(options, certificate, ready, stop))
+
+
+def peak_rss():
+    """Пиковая память процесса в байтах по данным ОС или None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux сообщает в килобайтах, macOS - в байтах
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class BenchEvents(ScanEvents):
+    """Последние счетчики движка и пиковая память по замерам"""
+
+    def __init__(self, log=None):
+        self.log = log
+        self.stats = {}
+        self.peak = current_rss() or 0
+
+    def sample_memory(self):
+        rss = current_rss()
+        if rss and rss > self.peak:
+            self.peak = rss
+
+    def on_log(self, message, category=LOG_INFO):
+        if self.log and category in (LOG_INFO, LOG_ERROR):
+            self.log(message)
+
+    def on_progress(self, stats):
+        self.stats = stats
+        self.sample_memory()
+
+
+class Benchmark:
+    """Проверка пространства <имя>.bench.test движком в одном процессе.
+
+    settings - настройки движка (адреса заглушек подставляются сами),
+    stub - параметры заглушек (см. DEFAULT_STUB), log(message) получает
+    общие сообщения и ошибки.
+    """
+
+    def __init__(self, min_length, max_length, settings=None, stub=None, log=None):
+        self.min_length, self.max_length = min_length, max_length
+        self.settings = dict(settings or {})
+        self.stub = {**DEFAULT_STUB, **(stub or {})}
+        self.log = log
+        self.engine = None
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+        if self.engine:
+            self.engine.stop()
+
+    def run(self):
+        """Запуск заглушек и проверки; отчет (словарь)"""
+        context = multiprocessing.get_context('spawn')
+        with tempfile.TemporaryDirectory(prefix='site-bench-') as directory:
+            certificate = make_certificate(directory)
+            if certificate is None and self.log:
+                self.log("openssl не найден: заглушка HTTPS не запущена, все сайты проверяются по HTTP")
+            ready, stop = context.Queue(), context.Event()
+            server = context.Process(target=serve_stub, args=(self.stub, certificate, ready, stop), daemon=True)
+            server.start()
+            try:
+                try:
+                    ports = ready.get(timeout=60)
+                except queue.Empty:
+                    raise RuntimeError("Заглушки DNS и HTTP не запустились")
+                return self.run_engine(directory, certificate, ports)
+            finally:
+                stop.set()
+                server.join(10)
+                if server.is_alive():
+                    server.terminate()
+
+    def run_engine(self, directory, certificate, ports):
+        settings = {
+            **self.settings,
+            'nameservers': ', '.join(f"{LOCALHOST}:{port}" for port in ports['dns_ports']),
+            'http_port': ports['http_port'],
+            'https_port': ports['https_port'] or closed_port(),
+            'ca_file': certificate[0] if certificate else '',
+            'self_test': False,
+            'output_file': os.path.join(directory, 'found.txt'),
+            'checkpoint_file': '',
+            'negative_cache_file': '',
+            'processes': 1
+        }
+        events = BenchEvents(self.log)
+        self.engine = engine = ScanEngine(self.min_length, self.max_length, settings, tlds=[BENCH_TLD], events=events)
+        if self.stopped:
+            engine.stop()
+
+        started_at = datetime.now().isoformat(timespec='seconds')
+        cpu, started = time.process_time(), time.perf_counter()
+        engine.run()
+        elapsed = time.perf_counter() - started
+        cpu = time.process_time() - cpu
+
+        events.sample_memory()
+        snapshot = engine.collect_metrics()
+        peak = max(events.peak, peak_rss() or 0)
+        return {
+            'started_at': started_at,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'space': {
+                'min_length': self.min_length,
+                'max_length': self.max_length,
+                'tld': BENCH_TLD,
+                'domains': engine.total_domains
+            },
+            'stub': {**self.stub, 'https': certificate is not None},
+            'settings': {key: value for key, value in engine.settings.items() if key not in UNREPORTED_SETTINGS},
+            'completed': engine.finished,
+            'checked': engine.checked_count,
+            'found': engine.valid_count,
+            'elapsed_s': round(elapsed, 3),
+            'domains_per_sec': round(engine.checked_count / elapsed, 1) if elapsed else None,
+            'cpu_s': round(cpu, 3),
+            'cpu_percent': round(cpu / elapsed * 100, 1) if elapsed else None,
+            'peak_memory_mb': round(peak / (1024 * 1024), 1),
+            'stages': stage_summaries(snapshot),
+            'dns_rcodes': counter_values(snapshot, 'dns_queries', 'rcode'),
+            'stats': events.stats
+        }
+
+
+def save_report(path, report):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def format_report(report, baseline=None):
+    """Строки сводки; с baseline - изменение относительно прошлого отчета"""
+    def change(value, old):
+        if baseline is None or value is None or not old:
+            return ""
+        return f" ({(value - old) / old * 100:+.1f}%)"
+
+    old = baseline or {}
+    old_stages = old.get('stages', {})
+    lines = [
+        f"Проверено: {report['checked']}/{report['space']['domains']} за {report['elapsed_s']} с, рабочих: {report['found']}",
+        f"Скорость: {report['domains_per_sec']} доменов/с{change(report['domains_per_sec'], old.get('domains_per_sec'))}",
+        f"Процессор: {report['cpu_s']} с ({report['cpu_percent']}%){change(report['cpu_s'], old.get('cpu_s'))}",
+        f"Пиковая память: {report['peak_memory_mb']} МБ{change(report['peak_memory_mb'], old.get('peak_memory_mb'))}"
+    ]
+    for stage, summary in report['stages'].items():
+        if not summary['count']:
+            continue
+        previous = old_stages.get(stage, {})
+        lines.append(
+            f"{stage}: p50 {summary['p50_ms']} мс{change(summary['p50_ms'], previous.get('p50_ms'))}, "
+            f"p99 {summary['p99_ms']} мс{change(summary['p99_ms'], previous.get('p99_ms'))}, "
+            f"замеров {summary['count']}"
+        )
+    return lines
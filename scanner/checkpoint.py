@@ -0,0 +1,63 @@
+"""Сохранение и загрузка состояния проверки для продолжения после остановки.
+
+Состояние - небольшой JSON-файл: параметры пространства, зерно порядка
+обхода и для каждой части пространства позиция обхода, счетчики и позиции
+доменов, проверка которых была начата, но не завершена. Файл заменяется
+атомарно, поэтому при аварийном завершении остается предыдущая целая копия.
+"""
+
+import json, os, time
+
+CHECKPOINT_VERSION = 1
+
+
+def sync_directory(directory):
+    """Фиксация переименований в каталоге (на Windows недоступно)"""
+    if hasattr(os, 'O_DIRECTORY'):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def save_checkpoint(path, state):
+    """Атомарная запись состояния: временный файл, fsync, замена"""
+    state = {**state, 'version': CHECKPOINT_VERSION, 'saved_at': time.time()}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    sync_directory(os.path.dirname(os.path.abspath(path)))
+
+
+def load_checkpoint(path):
+    """Загрузка состояния; ValueError, если файл поврежден или несовместим"""
+    with open(path) as f:
+        try:
+            state = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Файл состояния поврежден: {str(e)}")
+    if state.get('version') != CHECKPOINT_VERSION:
+        raise ValueError("Неподдерживаемая версия файла состояния")
+    if state.get('mode') == 'recheck':
+        # Перепроверка списка хранит файлы вместо параметров пространства
+        required = ('files', 'sizes', 'shards')
+    else:
+        required = ('min_length', 'max_length', 'tlds', 'seed', 'shards')
+    for key in required:
+        if key not in state:
+            raise ValueError(f"В файле состояния нет поля {key}")
+    return state
+
+
+def can_resume(path):
+    """Есть ли незавершенная проверка, которую можно продолжить"""
+    if not path or not os.path.exists(path):
+        return False
+    try:
+        return not load_checkpoint(path).get('finished', False)
+    except (OSError, ValueError):
+        return False
@@ -0,0 +1,499 @@
+"""Консольный режим (без Qt).
+
+Прогресс и события выводятся в stderr построчно в формате JSON, чтобы их
+было удобно разбирать скриптами и системами мониторинга.
+"""
+
+import argparse, json, os, signal, sys, time
+from datetime import datetime
+
+from .engine import ScanEvents, DEFAULT_SETTINGS, DEFAULT_TLDS, LOG_INFO, LOG_ERROR
+from .sharding import create_scan, resume_scan
+from .recheck import RecheckEngine, resume_recheck
+from .distributed import Coordinator, RemoteWorker, resume_coordinator
+from .sinks import SINK_FORMATS
+from .resolvers import parse_nameservers
+from .probe import PROBE_METHODS
+from .bench import Benchmark, DEFAULT_STUB, save_report, load_report, format_report
+from .metrics import MetricsServer, summarize
+from .profiling import PROFILERS
+from .zoneindex import ZoneImporter, ImportStopped, INDEX_EXTENSION
+
+
+class JsonLinesEvents(ScanEvents):
+    """Вывод событий движка в поток построчно в формате JSON"""
+    
+    def __init__(self, stream=None, verbose=False, metrics_server=None, metrics_file=None):
+        self.stream = stream or sys.stderr
+        self.verbose = verbose
+        self.metrics_server = metrics_server
+        self.metrics_file = metrics_file
+    
+    def emit(self, event, **data):
+        record = {'event': event, 'time': round(time.time(), 3), **data}
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.stream.flush()
+    
+    def on_log(self, message, category=LOG_INFO):
+        # Без -v выводятся только общие сообщения и ошибки
+        if self.verbose or category in (LOG_INFO, LOG_ERROR):
+            self.emit('log', category=category, message=message)
+    
+    def on_progress(self, stats):
+        self.emit('progress', **stats)
+    
+    def on_found(self, record):
+        self.emit('found', **record)
+    
+    def on_metrics(self, snapshot):
+        if self.metrics_server:
+            self.metrics_server.update(snapshot)
+        if self.metrics_file:
+            self.save_metrics(snapshot)
+    
+    def save_metrics(self, snapshot):
+        """Снимок метрик в JSON; файл заменяется целиком, чтобы читатель не увидел его недописанным"""
+        temp_path = self.metrics_file + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'time': round(time.time(), 3), **summarize(snapshot)}, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.metrics_file)
+        except OSError as e:
+            self.emit('log', category=LOG_ERROR, message=f"Ошибка при записи метрик: {str(e)}")
+    
+    def on_finished(self):
+        self.emit('finished')
+
+
+def parse_tlds(value):
+    """'com,net' -> ['.com', '.net']"""
+    tlds = ['.' + tld.strip().lstrip('.').lower() for tld in value.split(',') if tld.strip()]
+    if not tlds:
+        raise argparse.ArgumentTypeError("Список доменных зон пуст")
+    return tlds
+
+
+def add_tuning_arguments(parser):
+    """Ключи производительности и способа проверки, общие для scan и bench"""
+    parser.add_argument('--dns-workers', type=int, default=DEFAULT_SETTINGS['dns_workers'])
+    parser.add_argument('--http-workers', type=int, default=DEFAULT_SETTINGS['http_workers'])
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_SETTINGS['queue_size'])
+    parser.add_argument('--dns-qps', type=float, default=DEFAULT_SETTINGS['dns_qps'], help="Запросов в секунду к каждому DNS-серверу (0 - без ограничения)")
+    parser.add_argument('--dns-burst', type=int, default=DEFAULT_SETTINGS['dns_burst'], help="Запас запросов DNS сверх средней частоты")
+    parser.add_argument('--dns-timeout', type=float, default=DEFAULT_SETTINGS['dns_timeout'], help="Таймаут запроса к одному DNS-серверу (с)")
+    parser.add_argument('--http-qps', type=float, default=DEFAULT_SETTINGS['http_qps'], help="Запросов HTTP в секунду всего (0 - без ограничения)")
+    parser.add_argument('--http-burst', type=int, default=DEFAULT_SETTINGS['http_burst'], help="Запас запросов HTTP сверх средней частоты")
+    parser.add_argument('--no-adaptive', dest='adaptive', action='store_false', help="Не подбирать число одновременных запросов (всегда --dns-workers/--http-workers)")
+    parser.add_argument('--probe', choices=PROBE_METHODS, default=DEFAULT_SETTINGS['probe_method'], help="Запрос к сайту: head (при 405/501 - GET) или get с чтением начала ответа")
+    parser.add_argument('--probe-bytes', type=int, default=DEFAULT_SETTINGS['probe_bytes'], help="Сколько байт тела читать при --probe get")
+    parser.add_argument('--max-redirects', type=int, default=DEFAULT_SETTINGS['max_redirects'], help="Максимум перенаправлений (0 - не следовать)")
+    parser.add_argument('--connect-timeout', type=float, default=DEFAULT_SETTINGS['connect_timeout'], help="Таймаут соединения HTTP (с)")
+    parser.add_argument('--read-timeout', type=float, default=DEFAULT_SETTINGS['read_timeout'], help="Таймаут чтения ответа HTTP (с)")
+    parser.add_argument('--parallel-probe', action='store_true', help="Проверять HTTPS и HTTP одновременно")
+    parser.add_argument('--tcp-probe', action='store_true', help="Перед HTTP проверять TCP-соединением, открыт ли порт HTTPS или HTTP")
+    parser.add_argument('--tcp-timeout', type=float, default=DEFAULT_SETTINGS['tcp_probe_timeout'], help="Таймаут проверки портов на все адреса домена (с)")
+    parser.add_argument('--tcp-workers', type=int, default=DEFAULT_SETTINGS['tcp_workers'])
+    parser.add_argument('--ipv6', action='store_true', help="Запрашивать также AAAA и проверять сайты по IPv6")
+    parser.add_argument('--ip-memo', type=int, default=DEFAULT_SETTINGS['ip_memo_size'], help="Запоминать ответы до N адресов: домены на адресе парковки не запрашиваются (только с --probe get; 0 - выключено)")
+    parser.add_argument('--ip-memo-ttl', type=int, default=DEFAULT_SETTINGS['ip_memo_ttl'], help="Срок запоминания ответа адреса (с)")
+    parser.add_argument('--ip-memo-hits', type=int, default=DEFAULT_SETTINGS['ip_memo_hits'], help="Одинаковых ответов адреса подряд, после которых он считается парковкой")
+    parser.add_argument('--max-memory', type=int, default=DEFAULT_SETTINGS['max_memory'], help="Бюджет памяти в МБ на все процессы (0 - без ограничения)")
+    parser.add_argument('--profile', choices=PROFILERS, help="Профилировать проверку (yappi нужно установить отдельно)")
+    parser.add_argument('--profile-file', default=DEFAULT_SETTINGS['profile_file'], help="Файл профиля pstats (у процессов - с номером в конце)")
+
+
+def add_pattern_arguments(parser):
+    parser.add_argument('--pattern', action='append', default=[], help="Шаблон имени вместо --min/--max: ?l ?d ?a ?h ?v ?c, [a-f], {словарь}, {a|b}; можно указать несколько раз")
+    parser.add_argument('--wordlist', action='append', default=[], metavar='NAME=FILE', help="Словарь для {NAME} в шаблонах; можно указать несколько раз")
+
+
+def pattern_settings(args):
+    return {'patterns': ';'.join(args.pattern), 'wordlists': ';'.join(args.wordlist)}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='site.py', description="Генератор сайтов (консольный режим)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    scan = commands.add_parser('scan', help="Перебор и проверка доменов")
+    scan.add_argument('--min', type=int, default=3, dest='min_length', help="Минимальная длина имени")
+    scan.add_argument('--max', type=int, default=4, dest='max_length', help="Максимальная длина имени")
+    scan.add_argument('--tld', type=parse_tlds, default=DEFAULT_TLDS, help="Доменные зоны через запятую")
+    add_pattern_arguments(scan)
+    scan.add_argument('--out', default=DEFAULT_SETTINGS['output_file'], help="Файл для рабочих сайтов")
+    scan.add_argument('--format', choices=SINK_FORMATS, default=DEFAULT_SETTINGS['output_format'], help="Формат файла результатов (auto - по расширению)")
+    add_tuning_arguments(scan)
+    scan.add_argument('--nameservers', default=DEFAULT_SETTINGS['nameservers'], help="DNS-серверы через запятую; адрес=N задает свой предел запросов в секунду")
+    scan.add_argument('--no-self-test', dest='self_test', action='store_false', help="Не проверять google.com перед началом")
+    scan.add_argument('--processes', type=int, default=DEFAULT_SETTINGS['processes'], help="Процессов проверки (0 - по числу ядер)")
+    scan.add_argument('--checkpoint', default=DEFAULT_SETTINGS['checkpoint_file'], help="Файл состояния для продолжения (пусто - не сохранять)")
+    scan.add_argument('--checkpoint-interval', type=int, default=DEFAULT_SETTINGS['checkpoint_interval'], help="Интервал сохранения состояния (с)")
+    scan.add_argument('--resume', action='store_true', help="Продолжить проверку из файла состояния (--min/--max/--tld берутся из него)")
+    scan.add_argument('--cache', default=DEFAULT_SETTINGS['negative_cache_file'], help="Кэш отрицательных результатов SQLite (пусто - без кэша)")
+    scan.add_argument('--cache-ttl', type=int, default=DEFAULT_SETTINGS['negative_cache_ttl'], help="Срок хранения записей кэша (ч)")
+    scan.add_argument('--cache-size', type=int, default=DEFAULT_SETTINGS['negative_cache_size'], help="Максимум записей в кэше")
+    scan.add_argument('--seed', type=int, default=0, help="Зерно порядка перебора (0 - случайное)")
+    scan.add_argument('--zone-index', action='append', default=[], help="Индекс файла зоны (см. zone-import): домены вне зоны не проверяются; можно указать несколько раз")
+    scan.add_argument('--seen-filter', default=DEFAULT_SETTINGS['seen_filter_file'], help="Файл фильтра недавно проверенных доменов, общий для запусков и процессов (пусто - без фильтра)")
+    scan.add_argument('--seen-capacity', type=int, default=DEFAULT_SETTINGS['seen_filter_capacity'], help="Емкость нового фильтра (доменов)")
+    scan.add_argument('--seen-error', type=float, default=DEFAULT_SETTINGS['seen_filter_error'], help="Доля ложных срабатываний нового фильтра")
+    scan.add_argument('--seen-ttl', type=int, default=DEFAULT_SETTINGS['seen_filter_ttl'], help="Сколько помнить проверенный домен (ч)")
+    scan.add_argument('--metrics-port', type=int, help="Отдавать метрики по HTTP на 127.0.0.1:PORT (/metrics - Prometheus, /metrics.json)")
+    scan.add_argument('--metrics-file', help="Периодически сохранять метрики в файл JSON")
+    scan.add_argument('--metrics-interval', type=float, default=DEFAULT_SETTINGS['metrics_interval'], help="Интервал обновления метрик (с)")
+    scan.add_argument('-v', '--verbose', action='store_true', help="Выводить также результаты DNS и HTTP для каждого домена")
+    
+    recheck = commands.add_parser('recheck', help="Повторная проверка списка сайтов: какие еще работают")
+    recheck.add_argument('files', nargs='*', help="Текстовые файлы или JSON Lines со списком доменов")
+    recheck.add_argument('--alive', default=DEFAULT_SETTINGS['recheck_alive_file'], help="Файл для работающих сайтов")
+    recheck.add_argument('--dead', default=DEFAULT_SETTINGS['recheck_dead_file'], help="Файл для точно неработающих (в JSON Lines - с причиной)")
+    recheck.add_argument('--unsure', default=DEFAULT_SETTINGS['recheck_unsure_file'], help="Файл для не ответивших из-за сбоя, возможно временного (в JSON Lines - с причиной)")
+    recheck.add_argument('--format', choices=SINK_FORMATS, default=DEFAULT_SETTINGS['output_format'], help="Формат файлов результатов (auto - по расширению)")
+    add_tuning_arguments(recheck)
+    recheck.add_argument('--nameservers', default=DEFAULT_SETTINGS['nameservers'], help="DNS-серверы через запятую; адрес=N задает свой предел запросов в секунду")
+    recheck.add_argument('--no-self-test', dest='self_test', action='store_false', help="Не проверять google.com перед началом")
+    recheck.add_argument('--checkpoint', default=DEFAULT_SETTINGS['recheck_checkpoint_file'], help="Файл состояния для продолжения (пусто - не сохранять)")
+    recheck.add_argument('--checkpoint-interval', type=int, default=DEFAULT_SETTINGS['checkpoint_interval'], help="Интервал сохранения состояния (с)")
+    recheck.add_argument('--resume', action='store_true', help="Продолжить перепроверку из файла состояния (файлы берутся из него)")
+    recheck.add_argument('-v', '--verbose', action='store_true', help="Выводить также результаты DNS и HTTP для каждого домена")
+    
+    coordinate = commands.add_parser('coordinate', help="Координатор распределенной проверки: раздает участки исполнителям")
+    coordinate.add_argument('--min', type=int, default=3, dest='min_length', help="Минимальная длина имени")
+    coordinate.add_argument('--max', type=int, default=4, dest='max_length', help="Максимальная длина имени")
+    coordinate.add_argument('--tld', type=parse_tlds, default=DEFAULT_TLDS, help="Доменные зоны через запятую")
+    add_pattern_arguments(coordinate)
+    coordinate.add_argument('--out', default=DEFAULT_SETTINGS['output_file'], help="Файл для рабочих сайтов")
+    coordinate.add_argument('--format', choices=SINK_FORMATS, default=DEFAULT_SETTINGS['output_format'], help="Формат файла результатов (auto - по расширению)")
+    coordinate.add_argument('--host', default=DEFAULT_SETTINGS['coordinator_host'], help="Адрес для исполнителей (0.0.0.0 - все интерфейсы)")
+    coordinate.add_argument('--port', type=int, default=DEFAULT_SETTINGS['coordinator_port'], help="Порт для исполнителей")
+    coordinate.add_argument('--token', default=DEFAULT_SETTINGS['coordinator_token'], help="Общий токен исполнителей (пусто - без проверки)")
+    coordinate.add_argument('--lease-size', type=int, default=DEFAULT_SETTINGS['lease_size'], help="Позиций в одном участке")
+    coordinate.add_argument('--lease-ttl', type=int, default=DEFAULT_SETTINGS['lease_ttl'], help="Через сколько секунд без отчета участок выдается другому исполнителю")
+    coordinate.add_argument('--checkpoint', default=DEFAULT_SETTINGS['coordinator_checkpoint_file'], help="Файл состояния для продолжения (пусто - не сохранять)")
+    coordinate.add_argument('--checkpoint-interval', type=int, default=DEFAULT_SETTINGS['checkpoint_interval'], help="Интервал сохранения состояния (с)")
+    coordinate.add_argument('--resume', action='store_true', help="Продолжить проверку из файла состояния (--min/--max/--tld берутся из него)")
+    coordinate.add_argument('--seed', type=int, default=0, help="Зерно порядка перебора (0 - случайное)")
+    
+    worker = commands.add_parser('worker', help="Исполнитель распределенной проверки: берет участки у координатора")
+    worker.add_argument('url', help="Адрес координатора, например http://127.0.0.1:8765")
+    worker.add_argument('--name', help="Имя исполнителя в статистике координатора (по умолчанию хост-pid)")
+    worker.add_argument('--token', default=DEFAULT_SETTINGS['coordinator_token'], help="Токен координатора")
+    add_tuning_arguments(worker)
+    worker.add_argument('--nameservers', default=DEFAULT_SETTINGS['nameservers'], help="DNS-серверы через запятую; адрес=N задает свой предел запросов в секунду")
+    worker.add_argument('--no-self-test', dest='self_test', action='store_false', help="Не проверять google.com перед началом")
+    worker.add_argument('--cache', default='', help="Кэш отрицательных результатов SQLite на этом узле (пусто - без кэша)")
+    worker.add_argument('--zone-index', action='append', default=[], help="Индекс файла зоны на этом узле; можно указать несколько раз")
+    worker.add_argument('-v', '--verbose', action='store_true', help="Выводить также результаты DNS и HTTP для каждого домена")
+    
+    zone = commands.add_parser('zone-import', help="Создание индекса зарегистрированных имен из файла зоны реестра")
+    zone.add_argument('zone_file', help="Файл зоны (можно .gz)")
+    zone.add_argument('--out', help="Файл индекса (по умолчанию - имя файла зоны с расширением .zidx)")
+    zone.add_argument('--tld', help="Зона (по умолчанию - из $ORIGIN или записи SOA)")
+    zone.add_argument('--max-memory', type=int, default=256, help="Память на сортировку в МБ")
+    
+    bench = commands.add_parser('bench', help="Нагрузочный тест на локальных заглушках DNS и HTTP/HTTPS")
+    bench.add_argument('--min', type=int, default=1, dest='min_length', help="Минимальная длина имени")
+    bench.add_argument('--max', type=int, default=3, dest='max_length', help="Максимальная длина имени")
+    add_tuning_arguments(bench)
+    # Частота DNS по умолчанию не ограничена: измеряется сам движок
+    bench.set_defaults(dns_qps=0)
+    bench.add_argument('--dns-servers', type=int, default=DEFAULT_STUB['dns_servers'], help="DNS-серверов заглушки")
+    bench.add_argument('--dns-latency', type=float, default=DEFAULT_STUB['dns_latency'], help="Задержка ответа DNS (мс)")
+    bench.add_argument('--dns-jitter', type=float, default=DEFAULT_STUB['dns_jitter'], help="Случайная добавка к задержке DNS (мс)")
+    bench.add_argument('--nxdomain', type=float, default=DEFAULT_STUB['nxdomain'], help="Доля несуществующих доменов")
+    bench.add_argument('--dns-servfail', type=float, default=DEFAULT_STUB['dns_servfail'], help="Доля ответов SERVFAIL")
+    bench.add_argument('--dns-drop', type=float, default=DEFAULT_STUB['dns_drop'], help="Доля запросов DNS без ответа")
+    bench.add_argument('--http-latency', type=float, default=DEFAULT_STUB['http_latency'], help="Задержка ответа сайта (мс)")
+    bench.add_argument('--http-jitter', type=float, default=DEFAULT_STUB['http_jitter'], help="Случайная добавка к задержке сайта (мс)")
+    bench.add_argument('--http-only', type=float, default=DEFAULT_STUB['http_only'], help="Доля сайтов без HTTPS")
+    bench.add_argument('--http-errors', type=float, default=DEFAULT_STUB['http_errors'], help="Доля сайтов, отвечающих статусом 500")
+    bench.add_argument('--http-hang', type=float, default=DEFAULT_STUB['http_hang'], help="Доля сайтов, которые не отвечают")
+    bench.add_argument('--seed', type=int, default=0, help="Зерно порядка перебора (0 - случайное)")
+    bench.add_argument('--report', help="Файл отчета JSON (по умолчанию bench-<дата>-<время>.json)")
+    bench.add_argument('--baseline', help="Отчет прошлого запуска для сравнения")
+    return parser
+
+
+def tuning_settings(args):
+    return {
+        'dns_workers': args.dns_workers,
+        'http_workers': args.http_workers,
+        'queue_size': args.queue_size,
+        'dns_qps': args.dns_qps,
+        'dns_burst': args.dns_burst,
+        'dns_timeout': args.dns_timeout,
+        'http_qps': args.http_qps,
+        'http_burst': args.http_burst,
+        'probe_method': args.probe,
+        'probe_bytes': args.probe_bytes,
+        'max_redirects': args.max_redirects,
+        'connect_timeout': args.connect_timeout,
+        'read_timeout': args.read_timeout,
+        'probe_parallel': args.parallel_probe,
+        'tcp_probe': args.tcp_probe,
+        'tcp_probe_timeout': args.tcp_timeout,
+        'tcp_workers': args.tcp_workers,
+        'resolve_ipv6': args.ipv6,
+        'ip_memo_size': args.ip_memo,
+        'ip_memo_ttl': args.ip_memo_ttl,
+        'ip_memo_hits': args.ip_memo_hits,
+        'adaptive_concurrency': args.adaptive,
+        'max_memory': args.max_memory,
+        'profile': args.profile or '',
+        'profile_file': args.profile_file,
+    }
+
+
+def settings_from_args(args):
+    return {
+        **tuning_settings(args),
+        'output_file': args.out,
+        'output_format': args.format,
+        'nameservers': args.nameservers,
+        'self_test': args.self_test,
+        'metrics_interval': args.metrics_interval,
+        'processes': args.processes,
+        'checkpoint_file': args.checkpoint,
+        'checkpoint_interval': args.checkpoint_interval,
+        'negative_cache_file': args.cache,
+        'negative_cache_ttl': args.cache_ttl,
+        'negative_cache_size': args.cache_size,
+        'zone_indexes': ';'.join(args.zone_index),
+        'seen_filter_file': args.seen_filter,
+        'seen_filter_capacity': args.seen_capacity,
+        'seen_filter_error': args.seen_error,
+        'seen_filter_ttl': args.seen_ttl,
+        **pattern_settings(args),
+        'seed': args.seed,
+    }
+
+
+def run_scan(args):
+    if not 1 <= args.min_length <= args.max_length:
+        print("Некорректный диапазон длины домена", file=sys.stderr)
+        return 2
+    try:
+        parse_nameservers(args.nameservers, args.dns_qps)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    
+    metrics_server = None
+    if args.metrics_port is not None:
+        try:
+            metrics_server = MetricsServer(args.metrics_port)
+        except OSError as e:
+            print(f"Не удалось открыть порт метрик {args.metrics_port}: {str(e)}", file=sys.stderr)
+            return 2
+    
+    events = JsonLinesEvents(verbose=args.verbose, metrics_server=metrics_server, metrics_file=args.metrics_file)
+    if args.resume:
+        try:
+            engine = resume_scan(settings_from_args(args), events=events)
+        except (OSError, ValueError) as e:
+            print(f"Не удалось продолжить проверку: {str(e)}", file=sys.stderr)
+            return 2
+    else:
+        try:
+            engine = create_scan(args.min_length, args.max_length, settings_from_args(args), tlds=args.tld, events=events)
+        except (OSError, ValueError) as e:
+            print(f"Не удалось начать проверку: {str(e)}", file=sys.stderr)
+            return 2
+    events.emit('start', total=engine.total_domains, seed=engine.seed, output_file=args.out, resume=args.resume)
+    
+    # Ctrl+C и SIGTERM завершают проверку штатно
+    signal.signal(signal.SIGINT, lambda *_: engine.stop())
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, lambda *_: engine.stop())
+    
+    try:
+        engine.run()
+    finally:
+        if metrics_server:
+            metrics_server.close()
+    return 0
+
+
+def run_recheck(args):
+    try:
+        parse_nameservers(args.nameservers, args.dns_qps)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    if not args.resume and not args.files:
+        print("Укажите файлы для перепроверки или --resume", file=sys.stderr)
+        return 2
+    
+    settings = {
+        **tuning_settings(args),
+        'recheck_alive_file': args.alive,
+        'recheck_dead_file': args.dead,
+        'recheck_unsure_file': args.unsure,
+        'recheck_checkpoint_file': args.checkpoint,
+        'output_format': args.format,
+        'nameservers': args.nameservers,
+        'self_test': args.self_test,
+        'checkpoint_interval': args.checkpoint_interval,
+    }
+    events = JsonLinesEvents(verbose=args.verbose)
+    try:
+        if args.resume:
+            engine = resume_recheck(settings, events=events)
+        else:
+            engine = RecheckEngine(args.files, settings, events=events)
+    except (OSError, ValueError) as e:
+        print(f"Не удалось начать перепроверку: {str(e)}", file=sys.stderr)
+        return 2
+    events.emit('start', files=engine.paths, alive_file=args.alive, dead_file=args.dead, resume=args.resume)
+    
+    signal.signal(signal.SIGINT, lambda *_: engine.stop())
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, lambda *_: engine.stop())
+    engine.run()
+    return 0
+
+
+def run_coordinate(args):
+    if not 1 <= args.min_length <= args.max_length:
+        print("Некорректный диапазон длины домена", file=sys.stderr)
+        return 2
+    
+    settings = {
+        'output_file': args.out,
+        'output_format': args.format,
+        'coordinator_host': args.host,
+        'coordinator_port': args.port,
+        'coordinator_token': args.token,
+        'coordinator_checkpoint_file': args.checkpoint,
+        'checkpoint_interval': args.checkpoint_interval,
+        'lease_size': args.lease_size,
+        'lease_ttl': args.lease_ttl,
+        **pattern_settings(args),
+        'seed': args.seed,
+    }
+    events = JsonLinesEvents()
+    try:
+        if args.resume:
+            coordinator = resume_coordinator(settings, events=events)
+        else:
+            coordinator = Coordinator(args.min_length, args.max_length, settings, tlds=args.tld, events=events)
+    except (OSError, ValueError) as e:
+        print(f"Не удалось запустить координатор: {str(e)}", file=sys.stderr)
+        return 2
+    events.emit('start', total=coordinator.total_domains, seed=coordinator.seed, chunks=len(coordinator.chunks),
+                output_file=args.out, resume=args.resume)
+    
+    signal.signal(signal.SIGINT, lambda *_: coordinator.stop())
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, lambda *_: coordinator.stop())
+    coordinator.run()
+    return 0
+
+
+def run_worker(args):
+    try:
+        parse_nameservers(args.nameservers, args.dns_qps)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    
+    settings = {
+        **tuning_settings(args),
+        'nameservers': args.nameservers,
+        'self_test': args.self_test,
+        'coordinator_token': args.token,
+        'negative_cache_file': args.cache,
+        'zone_indexes': ';'.join(args.zone_index),
+    }
+    events = JsonLinesEvents(verbose=args.verbose)
+    worker = RemoteWorker(args.url, settings, events=events, name=args.name)
+    events.emit('start', coordinator=worker.url, worker=worker.name)
+    
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    worker.run()
+    return 0
+
+
+def default_index_path(zone_file):
+    """com.zone.gz -> com.zidx"""
+    name = os.path.basename(zone_file)
+    for extension in ('.gz', '.zone', '.txt'):
+        if name.lower().endswith(extension):
+            name = name[:-len(extension)]
+    return os.path.join(os.path.dirname(zone_file), name + INDEX_EXTENSION)
+
+
+def run_zone_import(args):
+    events = JsonLinesEvents()
+    importer = ZoneImporter(
+        args.zone_file,
+        args.out or default_index_path(args.zone_file),
+        tld=args.tld,
+        memory_limit=args.max_memory * 1024 * 1024,
+        progress=lambda stage, done, total: events.emit('progress', stage=stage, done=done, total=total)
+    )
+    signal.signal(signal.SIGINT, lambda *_: importer.stop())
+    try:
+        report = importer.run()
+    except ImportStopped:
+        events.emit('log', category=LOG_ERROR, message="Импорт прерван")
+        return 1
+    except (OSError, ValueError, EOFError) as e:
+        events.emit('log', category=LOG_ERROR, message=f"Ошибка импорта зоны: {str(e)}")
+        return 1
+    events.emit('finished', index=importer.index_path, **report)
+    return 0
+
+
+def run_bench(args):
+    if not 1 <= args.min_length <= args.max_length:
+        print("Некорректный диапазон длины домена", file=sys.stderr)
+        return 2
+    baseline = None
+    if args.baseline:
+        try:
+            baseline = load_report(args.baseline)
+        except (OSError, ValueError) as e:
+            print(f"Не удалось прочитать отчет {args.baseline}: {str(e)}", file=sys.stderr)
+            return 2
+    
+    stub = {key: getattr(args, key) for key in DEFAULT_STUB}
+    settings = {**tuning_settings(args), 'seed': args.seed}
+    benchmark = Benchmark(args.min_length, args.max_length, settings, stub=stub,
+                          log=lambda message: print(message, file=sys.stderr))
+    signal.signal(signal.SIGINT, lambda *_: benchmark.stop())
+    try:
+        report = benchmark.run()
+    except RuntimeError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    
+    path = args.report or datetime.now().strftime('bench-%Y%m%d-%H%M%S.json')
+    try:
+        save_report(path, report)
+    except OSError as e:
+        print(f"Не удалось сохранить отчет: {str(e)}", file=sys.stderr)
+        return 1
+    for line in format_report(report, baseline):
+        print(line)
+    print(f"Отчет: {path}")
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == 'scan':
+        return run_scan(args)
+    if args.command == 'recheck':
+        return run_recheck(args)
+    if args.command == 'coordinate':
+        return run_coordinate(args)
+    if args.command == 'worker':
+        return run_worker(args)
+    if args.command == 'zone-import':
+        return run_zone_import(args)
+    if args.command == 'bench':
+        return run_bench(args)
+    return 2
@@ -0,0 +1,86 @@
+"""Быстрая проверка открытых портов перед запросом HTTP.
+
+С адресами домена устанавливаются TCP-соединения на порты HTTPS и HTTP
+(порты одного адреса - одновременно) с коротким таймаутом, соединение сразу
+закрывается. Адреса перебираются по схеме happy eyeballs (RFC 8305): IPv6 и
+IPv4 чередуются, следующий адрес пробуется, если предыдущий не ответил за
+happy_eyeballs_delay или отказал, а первое удачное соединение отменяет
+остальные попытки.
+
+До этапа HTTP доходят только домены с открытым портом, а запрос идет сразу
+на открытую схему и на ответивший адрес. Недоступный или закрытый
+брандмауэром хост занимает обработчик на tcp_probe_timeout секунд, а не на
+таймауты запросов HTTPS и HTTP.
+"""
+
+import asyncio, itertools, time
+
+
+def interleave_addresses(addresses):
+    """IPv6 и IPv4 по очереди, начиная с IPv6"""
+    ipv6 = [address for address in addresses if ':' in address]
+    ipv4 = [address for address in addresses if ':' not in address]
+    return [address for pair in itertools.zip_longest(ipv6, ipv4) for address in pair if address is not None]
+
+
+class PortProbe:
+    """Проверка портов по настройкам tcp_probe_timeout, happy_eyeballs_delay,
+    https_port и http_port"""
+
+    def __init__(self, settings, metrics=None):
+        self.metrics = metrics
+        self.timeout = settings['tcp_probe_timeout']
+        self.delay = settings['happy_eyeballs_delay']
+        self.ports = {'https': settings['https_port'], 'http': settings['http_port']}
+
+    async def connect(self, address, port):
+        transport, _ = await asyncio.get_running_loop().create_connection(asyncio.Protocol, address, port)
+        transport.abort()
+
+    async def check(self, addresses):
+        """(открытые схемы, ответивший адрес); пустое множество и None, если ни один порт не открыт"""
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        queue = interleave_addresses(addresses)
+        attempts = {}  # Задача -> (адрес, схема)
+        schemes, winner, grace = set(), None, None
+        try:
+            while True:
+                if winner is None and queue:
+                    address = queue.pop(0)
+                    for scheme, port in self.ports.items():
+                        attempts[asyncio.ensure_future(self.connect(address, port))] = (address, scheme)
+                if winner is None:
+                    pending = [task for task in attempts if not task.done()]
+                    wait = deadline - loop.time()
+                    if queue:
+                        wait = min(wait, self.delay)
+                else:
+                    # Остальным портам ответившего адреса - немного времени вдогонку
+                    pending = [task for task, (address, _) in attempts.items() if address == winner and not task.done()]
+                    wait = grace - loop.time()
+                if not pending or wait <= 0:
+                    break
+                # Ответ, отказ или задержка - повод попробовать следующий адрес
+                done, _ = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    address, scheme = attempts[task]
+                    if task.exception() is None and winner in (None, address):
+                        if winner is None:
+                            winner, grace = address, min(deadline, loop.time() + self.delay)
+                        schemes.add(scheme)
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # Отказы соединений ожидаемы
+        self.record(started, bool(schemes))
+        return schemes, winner
+
+    def record(self, started, opened):
+        if self.metrics is not None:
+            result = 'open' if opened else 'closed'
+            self.metrics.observe('tcp_probe', time.monotonic() - started, result=result)
+            self.metrics.inc('tcp_probes', result=result)
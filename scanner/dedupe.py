@@ -0,0 +1,205 @@
+"""Поиск и удаление повторяющихся доменов в больших файлах результатов.
+
+Файл читается потоком. Если все домены помещаются в отведенную память,
+повторы ищутся за один проход по множеству. Иначе домены раскладываются
+по хэшу во временные файлы-разделы, каждый раздел проверяется в памяти
+отдельно, а номера повторяющихся строк сливаются при записи нового файла.
+Остается первое вхождение каждого домена, порядок строк сохраняется, файл
+заменяется атомарно.
+"""
+
+import collections, heapq, json, operator, os, shutil, tempfile, zlib
+
+from .checkpoint import sync_directory
+
+# Оценка расхода памяти на домен во множестве относительно длины строки в файле
+MEMORY_FACTOR = 8
+MAX_PARTITIONS = 512
+# Через сколько строк сообщать о прогрессе и проверять остановку
+PROGRESS_STEP = 65536
+
+# Форматы, в которых дубликатов не бывает
+UNIQUE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+
+class DedupeStopped(Exception):
+    """Обработка прервана вызовом stop()"""
+
+
+def line_key(line):
+    """Ключ сравнения строки: домен в нижнем регистре (пусто для пустой строки)"""
+    line = line.strip()
+    if line.startswith(b'{'):
+        # Строка JSON Lines - сравниваем по полю domain
+        try:
+            return str(json.loads(line)['domain']).strip().lower().encode('utf-8')
+        except (ValueError, KeyError, TypeError):
+            pass
+    return line.lower()
+
+
+def output_line(line, key):
+    """Строка для нового файла: запись JSON без изменений, домен в нижнем регистре"""
+    line = line.strip()
+    return line + b'\n' if line.startswith(b'{') else key + b'\n'
+
+
+class Deduplicator:
+    """Поиск и удаление дубликатов в текстовом файле или файле JSON Lines.
+
+    progress(stage, done, total) вызывается с числом обработанных байт
+    текущего этапа. stop() можно вызвать из другого потока: check() и
+    remove() вернут None, исходный файл не изменится.
+    """
+
+    def __init__(self, path, memory_limit=256 * 1024 * 1024, progress=None, top=100):
+        self.path = path
+        self.memory_limit = memory_limit
+        self.progress = progress
+        self.top = top
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def partition_count(self):
+        """Число разделов, при котором один раздел помещается в память"""
+        size = os.path.getsize(self.path) * MEMORY_FACTOR
+        return max(1, min(MAX_PARTITIONS, -(-size // max(1, self.memory_limit))))
+
+    def check(self):
+        """Статистика повторов без изменения файла"""
+        try:
+            return self.run(None)
+        except DedupeStopped:
+            return None
+
+    def remove(self):
+        """Удаление повторов с атомарной заменой файла; статистика или None"""
+        tmp_path = f"{self.path}.dedupe.tmp"
+        try:
+            with open(tmp_path, 'wb') as output:
+                report = self.run(output)
+                output.flush()
+                os.fsync(output.fileno())
+            if report['duplicates']:
+                shutil.copymode(self.path, tmp_path)
+                os.replace(tmp_path, self.path)
+                sync_directory(os.path.dirname(os.path.abspath(self.path)))
+            return report
+        except DedupeStopped:
+            return None
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def run(self, output):
+        if os.path.splitext(self.path)[1].lower() in UNIQUE_EXTENSIONS:
+            raise ValueError("В базе SQLite каждый домен хранится один раз, дубликатов нет")
+        partitions = self.partition_count()
+        if partitions == 1:
+            return self.dedupe_in_memory(output)
+        return self.dedupe_partitioned(partitions, output)
+
+    def read_lines(self, path, stage):
+        """Строки файла с отчетом о прогрессе и проверкой остановки"""
+        total = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            for number, line in enumerate(f):
+                if number % PROGRESS_STEP == 0:
+                    if not self.running:
+                        raise DedupeStopped()
+                    self.report_progress(stage, f.tell(), total)
+                yield number, line
+        self.report_progress(stage, total, total)
+
+    def report_progress(self, stage, done, total):
+        if self.progress:
+            self.progress(stage, done, total)
+
+    def make_report(self, total, unique, repeats):
+        """Итог: всего строк, уникальных, лишних повторов и самые частые домены"""
+        top = heapq.nlargest(self.top, repeats, key=operator.itemgetter(1))
+        return {
+            'total': total,
+            'unique': unique,
+            'duplicates': total - unique,
+            'top': [(key.decode('utf-8', 'replace'), count + 1) for key, count in top]
+        }
+
+    def dedupe_in_memory(self, output):
+        seen, repeats = set(), collections.Counter()
+        total = 0
+        for _, line in self.read_lines(self.path, "Чтение файла"):
+            key = line_key(line)
+            if not key:
+                continue
+            total += 1
+            if key in seen:
+                repeats[key] += 1
+            else:
+                seen.add(key)
+                if output is not None:
+                    output.write(output_line(line, key))
+        return self.make_report(total, len(seen), repeats.items())
+
+    def dedupe_partitioned(self, partitions, output):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with tempfile.TemporaryDirectory(prefix='dedupe-', dir=directory) as tmp:
+            part_paths = [os.path.join(tmp, f"{i}.part") for i in range(partitions)]
+            drop_paths = [os.path.join(tmp, f"{i}.drop") for i in range(partitions)]
+
+            # Проход 1: номер строки и ключ - в раздел по хэшу ключа
+            total = 0
+            parts = [open(path, 'wb') for path in part_paths]
+            try:
+                for number, line in self.read_lines(self.path, "Разбиение на разделы"):
+                    key = line_key(line)
+                    if key:
+                        total += 1
+                        parts[zlib.crc32(key) % partitions].write(b'%d\t%s\n' % (number, key))
+            finally:
+                for part in parts:
+                    part.close()
+
+            # Проход 2: повторы внутри каждого раздела; номера лишних строк
+            # записываются по возрастанию
+            unique, top = 0, []
+            parts_size = sum(os.path.getsize(path) for path in part_paths)
+            done = 0
+            for part_path, drop_path in zip(part_paths, drop_paths):
+                if not self.running:
+                    raise DedupeStopped()
+                seen, repeats = set(), collections.Counter()
+                with open(part_path, 'rb') as part, open(drop_path, 'wb') as drop:
+                    for entry in part:
+                        number, key = entry.rstrip(b'\n').split(b'\t', 1)
+                        if key in seen:
+                            repeats[key] += 1
+                            drop.write(number + b'\n')
+                        else:
+                            seen.add(key)
+                unique += len(seen)
+                top = heapq.nlargest(self.top, top + list(repeats.items()), key=operator.itemgetter(1))
+                done += os.path.getsize(part_path)
+                os.remove(part_path)
+                self.report_progress("Поиск повторов", done, parts_size)
+            report = self.make_report(total, unique, top)
+
+            # Проход 3: исходный файл без строк из слитого списка номеров
+            if output is not None and report['duplicates']:
+                drops = [open(path, 'rb') for path in drop_paths]
+                try:
+                    skip = heapq.merge(*(map(int, drop) for drop in drops))
+                    next_skip = next(skip, None)
+                    for number, line in self.read_lines(self.path, "Запись файла"):
+                        if number == next_skip:
+                            next_skip = next(skip, None)
+                            continue
+                        key = line_key(line)
+                        if key:
+                            output.write(output_line(line, key))
+                finally:
+                    for drop in drops:
+                        drop.close()
+            return report
@@ -0,0 +1,478 @@
+"""Распределенная проверка: координатор раздает участки пространства узлам.
+
+Координатор делит пространство обхода на участки по lease_size позиций и
+выдает их в аренду исполнителям по HTTP с телами в JSON:
+
+    POST /lease  {"worker": имя}
+        -> {"lease": id, "state": состояние участка, параметры пространства}
+           {"wait": с} - свободных участков пока нет, {"done": true} - все проверены
+    POST /report {"lease": id, "state": ..., "records": [...], "stats": {...}, "final": bool}
+        -> {"ok": true} или код 409 {"lost": true}, если аренда истекла
+    GET /status  -> сводные счетчики
+
+Исполнитель проверяет участок обычным движком и каждые lease_ttl/4 секунд
+отправляет найденные сайты и состояние участка (то же, что в файле
+состояния). Отчет продлевает аренду. Если отчетов нет дольше lease_ttl,
+участок выдается другому исполнителю с последнего присланного состояния:
+повторно проверяются только домены, проверенные после последнего отчета.
+Найденные сайты координатор пишет в один файл, а его состояние позволяет
+продолжить всю проверку после перезапуска.
+"""
+
+import asyncio, json, os, random, socket, threading, time, traceback, uuid, urllib.error, urllib.request
+from aiohttp import web
+
+from .engine import ScanEvents, DEFAULT_SETTINGS, DEFAULT_CHARS, DEFAULT_TLDS, LOG_INFO, LOG_ERROR
+from .patterns import create_space
+from .sharding import ShardEngine, check_space
+from .checkpoint import save_checkpoint, load_checkpoint
+from .sinks import ResultBuffer
+
+WAIT_DELAY = 2.0  # Через сколько исполнителю снова спросить участок (с)
+FINISH_GRACE = 10.0  # Сколько координатор отвечает "done" после окончания проверки (с)
+REQUEST_TIMEOUT = 30.0
+STATE_KEYS = ('start', 'stop', 'position', 'in_flight', 'checked', 'valid')
+
+
+def chunk_ranges(total, size):
+    """Участки [start, stop) по size позиций"""
+    return [(start, min(start + size, total)) for start in range(0, total, max(1, size))]
+
+
+def chunk_finished(state):
+    return state['position'] >= state['stop'] and not state['in_flight']
+
+
+class Coordinator:
+    """Координатор распределенной проверки.
+
+    Интерфейс как у ScanEngine: run() блокирует до окончания проверки всех
+    участков или вызова stop(), события приходят в events. resume -
+    загруженное состояние координатора (см. resume_coordinator).
+    """
+
+    def __init__(self, min_length, max_length, settings=None, tlds=None, events=None, resume=None):
+        self.settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.events = events or ScanEvents()
+        self.output_file = self.settings['output_file']
+        if resume:
+            self.min_length, self.max_length = resume['min_length'], resume['max_length']
+            self.tlds, self.seed = resume['tlds'], resume['seed']
+            self.chunks = [{key: shard[key] for key in STATE_KEYS} for shard in resume['shards']]
+        else:
+            self.min_length, self.max_length = min_length, max_length
+            self.tlds = list(tlds or DEFAULT_TLDS)
+            self.seed = self.settings.get('seed') or random.getrandbits(64)
+        self.total_domains = len(create_space(self.settings, DEFAULT_CHARS, self.min_length, self.max_length, self.tlds))
+        if not resume:
+            self.chunks = [
+                {'start': start, 'stop': stop, 'position': start, 'in_flight': [], 'checked': 0, 'valid': 0}
+                for start, stop in chunk_ranges(self.total_domains, self.settings['lease_size'])
+            ]
+        self.leases = {}  # id аренды -> {'chunk': номер участка, 'worker': имя, 'expires': срок}
+        self.worker_stats = {}  # Имя -> (время отчета, счетчики движка)
+        self.valid_count = sum(chunk['valid'] for chunk in self.chunks)
+        self.running = True
+        self.results = None
+        self.last_checkpoint = 0
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return all(chunk_finished(chunk) for chunk in self.chunks)
+
+    def get_stats(self):
+        """Счетчики участков и сумма счетчиков исполнителей, приславших отчет за lease_ttl"""
+        now = time.monotonic()
+        stats = {}
+        workers = 0
+        for reported, worker_stats in self.worker_stats.values():
+            if now - reported > self.settings['lease_ttl']:
+                continue
+            workers += 1
+            for key, value in worker_stats.items():
+                if key not in ('checked', 'total', 'valid') and isinstance(value, (int, float)):
+                    stats[key] = stats.get(key, 0) + value
+        stats.update(
+            checked=sum(chunk['checked'] for chunk in self.chunks),
+            total=self.total_domains,
+            valid=self.valid_count,
+            workers=workers,
+            chunks=len(self.chunks),
+            chunks_done=sum(1 for chunk in self.chunks if chunk_finished(chunk)),
+            leased=len(self.leases)
+        )
+        return stats
+
+    def save_checkpoint(self, force=False):
+        """Сохранение состояния участков (не чаще checkpoint_interval)"""
+        path = self.settings['coordinator_checkpoint_file']
+        now = time.monotonic()
+        if not path or (not force and now - self.last_checkpoint < self.settings['checkpoint_interval']):
+            return
+        self.last_checkpoint = now
+        try:
+            # Все сайты, учтенные в состоянии участков, должны быть уже на диске
+            self.results.sync()
+            save_checkpoint(path, {
+                'mode': 'coordinator',
+                'min_length': self.min_length,
+                'max_length': self.max_length,
+                'tlds': self.tlds,
+                'patterns': self.settings['patterns'],
+                'wordlists': self.settings['wordlists'],
+                'seed': self.seed,
+                'finished': self.finished,
+                'shards': self.chunks
+            })
+        except Exception as e:
+            self.events.on_log(f"Ошибка при сохранении состояния: {str(e)}", LOG_ERROR)
+
+    def expire_leases(self):
+        now = time.monotonic()
+        for lease_id, lease in list(self.leases.items()):
+            if lease['expires'] < now:
+                del self.leases[lease_id]
+                self.events.on_log(f"Аренда участка {lease['chunk']} у {lease['worker']} истекла: участок будет выдан снова", LOG_ERROR)
+
+    def free_chunk(self):
+        """Номер непроверенного участка без аренды или None"""
+        leased = {lease['chunk'] for lease in self.leases.values()}
+        for index, chunk in enumerate(self.chunks):
+            if index not in leased and not chunk_finished(chunk):
+                return index
+        return None
+
+    @web.middleware
+    async def check_token(self, request, handler):
+        token = self.settings['coordinator_token']
+        if token and request.headers.get('Authorization') != f"Bearer {token}":
+            return web.json_response({'error': "Неверный ключ"}, status=401)
+        return await handler(request)
+
+    async def read_json(self, request):
+        try:
+            data = await request.json()
+        except ValueError:
+            raise web.HTTPBadRequest(text="Ожидается JSON")
+        if not isinstance(data, dict):
+            raise web.HTTPBadRequest(text="Ожидается объект JSON")
+        return data
+
+    async def handle_lease(self, request):
+        data = await self.read_json(request)
+        if not self.running:
+            return web.json_response({'done': True})
+        self.expire_leases()
+        index = self.free_chunk()
+        if index is None:
+            return web.json_response({'done': True} if self.finished else {'wait': WAIT_DELAY})
+        lease_id = uuid.uuid4().hex
+        worker = str(data.get('worker', '?'))
+        self.leases[lease_id] = {'chunk': index, 'worker': worker,
+                                 'expires': time.monotonic() + self.settings['lease_ttl']}
+        chunk = self.chunks[index]
+        self.events.on_log(f"Участок {index} ({chunk['position']}-{chunk['stop']}) выдан {worker}")
+        return web.json_response({
+            'lease': lease_id,
+            'lease_ttl': self.settings['lease_ttl'],
+            'min_length': self.min_length,
+            'max_length': self.max_length,
+            'tlds': self.tlds,
+            'patterns': self.settings['patterns'],
+            'wordlists': self.settings['wordlists'],
+            'total': self.total_domains,
+            'seed': self.seed,
+            'state': chunk
+        })
+
+    async def handle_report(self, request):
+        data = await self.read_json(request)
+        lease = self.leases.get(data.get('lease'))
+        if lease is None:
+            # Участок мог уйти другому исполнителю с прежнего состояния: его
+            # сайты найдутся снова, а запись этих дала бы повторы
+            return web.json_response({'lost': True}, status=409)
+        for record in data.get('records') or []:
+            if isinstance(record, dict) and isinstance(record.get('domain'), str):
+                self.add_found(record)
+
+        index = lease['chunk']
+        state = data.get('state')
+        if isinstance(state, dict) and all(key in state for key in STATE_KEYS) \
+                and (state['start'], state['stop']) == (self.chunks[index]['start'], self.chunks[index]['stop']):
+            self.chunks[index] = {key: state[key] for key in STATE_KEYS}
+        if isinstance(data.get('stats'), dict):
+            self.worker_stats[lease['worker']] = (time.monotonic(), data['stats'])
+        if data.get('final'):
+            del self.leases[data['lease']]
+            if chunk_finished(self.chunks[index]):
+                self.events.on_log(f"Участок {index} проверен ({lease['worker']})")
+        else:
+            lease['expires'] = time.monotonic() + self.settings['lease_ttl']
+        self.save_checkpoint()
+        return web.json_response({'ok': True})
+
+    def add_found(self, record):
+        """Сайт из отчета исполнителя"""
+        try:
+            self.results.add(record)
+        except Exception as e:
+            # Запись осталась в буфере и повторится при следующем сбросе; ошибка
+            # в ответе заставила бы исполнителя прислать уже принятые записи снова
+            self.events.on_log(f"Ошибка при сохранении {record['domain']}: {str(e)}", LOG_ERROR)
+        self.valid_count += 1
+        self.events.on_found(record)
+
+    async def handle_status(self, request):
+        return web.json_response(self.get_stats())
+
+    def create_app(self):
+        app = web.Application(middlewares=[self.check_token], client_max_size=64 * 1024 * 1024)
+        app.router.add_post('/lease', self.handle_lease)
+        app.router.add_post('/report', self.handle_report)
+        app.router.add_get('/status', self.handle_status)
+        return app
+
+    def run(self):
+        """Запуск координатора в текущем потоке (блокирует до завершения)"""
+        loop = asyncio.new_event_loop()
+        try:
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.run_async())
+        except Exception as e:
+            self.events.on_log(f"Критическая ошибка координатора: {str(e)}\n{traceback.format_exc()}", LOG_ERROR)
+        finally:
+            loop.close()
+            self.events.on_finished()
+
+    async def run_async(self):
+        self.results = ResultBuffer(
+            self.output_file,
+            sink_format=self.settings['output_format'],
+            max_records=self.settings['write_buffer'],
+            max_delay=self.settings['write_interval'] / 1000.0
+        )
+        runner = web.AppRunner(self.create_app(), access_log=None)
+        await runner.setup()
+        try:
+            host, port = self.settings['coordinator_host'], self.settings['coordinator_port']
+            await web.TCPSite(runner, host, port).start()
+            self.events.on_log(f"Координатор: http://{host}:{port}, участков {len(self.chunks)}, "
+                               f"всего доменов {self.total_domains}")
+            while self.running:
+                await asyncio.sleep(1)
+                self.results.flush_if_due()
+                self.expire_leases()
+                self.events.on_progress(self.get_stats())
+                self.save_checkpoint()
+                if self.finished:
+                    # Исполнители, ждущие участка, должны успеть узнать об окончании
+                    if self.finished_at is None:
+                        self.finished_at = time.monotonic()
+                        self.events.on_log("Все участки проверены")
+                    elif time.monotonic() - self.finished_at >= FINISH_GRACE:
+                        break
+        finally:
+            await runner.cleanup()
+            try:
+                self.save_checkpoint(force=True)
+                self.results.close()
+            except Exception as e:
+                self.events.on_log(f"Ошибка при записи результатов: {str(e)}", LOG_ERROR)
+            self.events.on_log(f"Завершено! Рабочих сайтов: {self.valid_count}")
+
+    def stop(self):
+        """Остановка координатора (можно вызывать из любого потока)"""
+        self.running = False
+        self.events.on_log("Запрос на остановку отправлен...")
+
+
+class LeaseEvents(ScanEvents):
+    """События движка участка: найденные сайты и состояние копятся для отчета"""
+
+    def __init__(self, worker):
+        self.worker = worker
+
+    def on_log(self, message, category=LOG_INFO):
+        self.worker.events.on_log(message, category)
+
+    def on_progress(self, stats):
+        self.worker.stats = stats
+        self.worker.events.on_progress(stats)
+
+    def on_found(self, record):
+        with self.worker.lock:
+            self.worker.found.append(record)
+        self.worker.events.on_found(record)
+
+    def on_metrics(self, snapshot):
+        self.worker.events.on_metrics(snapshot)
+
+
+class LeaseEngine(ShardEngine):
+    """Движок участка: состояние для отчета публикуется вместе с учтенными в нем сайтами"""
+
+    def __init__(self, worker, *args, **kwargs):
+        self.worker = worker
+        super().__init__(*args, **kwargs)
+
+    def checkpoint_state(self):
+        state = super().checkpoint_state()
+        # Сайты, найденные после снимка, уйдут только со следующим состоянием
+        with self.worker.lock:
+            self.worker.records.extend(self.worker.found)
+            self.worker.found = []
+            self.worker.state = state
+        return state
+
+
+class RemoteWorker:
+    """Исполнитель: берет участки у координатора url и проверяет их.
+
+    run() блокирует, пока координатор не сообщит об окончании проверки или
+    не будет вызван stop(). Пространство и порядок обхода задает
+    координатор, настройки производительности у каждого исполнителя свои.
+    """
+
+    def __init__(self, url, settings=None, events=None, name=None):
+        self.url = url.rstrip('/')
+        self.settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.events = events or ScanEvents()
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.running = True
+        self.stopped = threading.Event()
+        self.engine = None
+        self.lock = threading.Lock()
+        self.lease = None
+        self.records = []  # Учтены в state
+        self.found = []  # Найдены после снимка state
+        self.state = None
+        self.stats = {}
+        self.valid_count = 0
+
+    def request(self, path, payload):
+        """POST на координатор; ответ 409 (аренда потеряна) - тоже ответ"""
+        headers = {'Content-Type': 'application/json'}
+        if self.settings['coordinator_token']:
+            headers['Authorization'] = f"Bearer {self.settings['coordinator_token']}"
+        request = urllib.request.Request(self.url + path, data=json.dumps(payload).encode('utf-8'), headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as e:
+            if e.code == 409:
+                return json.load(e)
+            raise
+
+    def report(self, final=False):
+        """Отправка найденного и состояния: True - принято, False - аренда потеряна, None - координатор недоступен"""
+        with self.lock:
+            records, self.records = self.records, []
+            state = self.state
+        payload = {'lease': self.lease, 'worker': self.name, 'state': state,
+                   'records': records, 'stats': self.stats, 'final': final}
+        try:
+            reply = self.request('/report', payload)
+        except (OSError, ValueError) as e:
+            with self.lock:
+                self.records = records + self.records
+            self.events.on_log(f"Координатор недоступен: {str(e)}", LOG_ERROR)
+            return None
+        self.valid_count += len(records)
+        return not reply.get('lost')
+
+    def report_loop(self, done, interval, ttl):
+        """Периодические отчеты; без связи дольше срока аренды участок уже не наш"""
+        last_success = time.monotonic()
+        while not done.wait(interval):
+            result = self.report()
+            if result:
+                last_success = time.monotonic()
+            elif result is False or time.monotonic() - last_success > ttl:
+                self.events.on_log("Аренда участка потеряна: проверка участка прервана", LOG_ERROR)
+                self.engine.stop()
+                return
+
+    def run_lease(self, lease):
+        state = lease['state']
+        ttl = lease['lease_ttl']
+        interval = max(1.0, ttl / 4)
+        with self.lock:
+            self.lease, self.state, self.records, self.found = lease['lease'], state, [], []
+        # Словари шаблонов должны лежать на узле по тем же путям, что и у координатора
+        settings = {**self.settings, 'seed': lease['seed'], 'patterns': lease['patterns'], 'wordlists': lease['wordlists'],
+                    'checkpoint_file': '', 'checkpoint_interval': interval}
+        self.engine = LeaseEngine(self, lease['min_length'], lease['max_length'], settings, tlds=lease['tlds'],
+                                  events=LeaseEvents(self), start=state['start'], stop=state['stop'], resume=state)
+        if len(self.engine.space) != lease['total']:
+            raise ValueError("Пространство доменов не совпадает с координатором: проверьте словари на узле")
+        if not self.running:
+            self.engine.stop()  # stop() пришел, пока движок создавался
+        done = threading.Event()
+        reporter = threading.Thread(target=self.report_loop, args=(done, interval, ttl), daemon=True)
+        reporter.start()
+        try:
+            self.engine.run()
+        finally:
+            done.set()
+            reporter.join()
+        # Итоговый отчет освобождает участок (при остановке - для другого исполнителя)
+        deadline = time.monotonic() + ttl
+        while self.report(final=True) is None and time.monotonic() < deadline:
+            if self.stopped.wait(WAIT_DELAY):
+                break
+
+    def run(self):
+        """Запуск исполнителя в текущем потоке (блокирует до завершения)"""
+        failing_since = None
+        first_lease = True
+        try:
+            while self.running:
+                try:
+                    lease = self.request('/lease', {'worker': self.name})
+                except (OSError, ValueError) as e:
+                    if isinstance(e, urllib.error.HTTPError) and e.code in (401, 403):
+                        self.events.on_log("Координатор отклонил токен исполнителя", LOG_ERROR)
+                        break
+                    failing_since = failing_since or time.monotonic()
+                    if time.monotonic() - failing_since > self.settings['lease_ttl']:
+                        self.events.on_log(f"Координатор недоступен: {str(e)}", LOG_ERROR)
+                        break
+                    self.stopped.wait(WAIT_DELAY)
+                    continue
+                failing_since = None
+                if lease.get('done'):
+                    self.events.on_log("Координатор: все участки проверены")
+                    break
+                if 'lease' not in lease:
+                    self.stopped.wait(lease.get('wait', WAIT_DELAY))
+                    continue
+                self.run_lease(lease)
+                if first_lease:
+                    # Сеть уже проверена на первом участке
+                    first_lease = False
+                    self.settings['self_test'] = False
+            self.events.on_log(f"Исполнитель завершил работу. Рабочих сайтов: {self.valid_count}")
+        except Exception as e:
+            self.events.on_log(f"Критическая ошибка исполнителя: {str(e)}\n{traceback.format_exc()}", LOG_ERROR)
+        finally:
+            self.events.on_finished()
+
+    def stop(self):
+        """Остановка исполнителя (можно вызывать из любого потока)"""
+        self.running = False
+        self.stopped.set()
+        if self.engine:
+            self.engine.stop()
+
+
+def resume_coordinator(settings=None, events=None):
+    """Координатор, продолжающий проверку из файла coordinator_checkpoint_file"""
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    state = load_checkpoint(settings['coordinator_checkpoint_file'])
+    if state.get('mode') != 'coordinator':
+        raise ValueError("Файл состояния не относится к координатору")
+    settings['patterns'], settings['wordlists'] = state.get('patterns', ''), state.get('wordlists', '')
+    check_space(state, create_space(settings, DEFAULT_CHARS, state['min_length'], state['max_length'], state['tlds']))
+    return Coordinator(None, None, settings, events=events, resume=state)
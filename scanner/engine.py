@@ -0,0 +1,890 @@
+"""Движок перебора и проверки доменов без зависимости от Qt.
+
+Вся работа с сетью выполняется здесь, а о ходе проверки движок сообщает
+через объект событий (см. ScanEvents). Графический интерфейс и консольный
+режим - лишь разные получатели этих событий.
+"""
+
+import asyncio, aiohttp, aiodns, string, random, time, traceback
+
+from .space import DomainEnumerator
+from .patterns import create_space
+from .checkpoint import save_checkpoint
+from .negative_cache import NegativeCache, NEGATIVE_NXDOMAIN, NEGATIVE_NODATA, NEGATIVE_DEAD, NEGATIVE_UNREACHABLE
+from .sinks import BufferedResultWriter, make_record
+from .limits import AdaptiveLimit
+from .ratelimit import TokenBucket
+from .resolvers import ResolverPool, ScanResultResolver, parse_nameservers
+from .probe import Prober
+from .connect import PortProbe
+from .ipmemo import AddressMemo
+from .memory import MemoryBudget
+from .metrics import ScanMetrics
+from .profiling import create_profiler
+from .zoneindex import ZoneFilter, split_indexes
+from .seen import SeenFilter
+
+DEFAULT_CHARS = string.ascii_lowercase + string.digits
+DEFAULT_TLDS = ['.com', '.org', '.net']
+
+# Настройки движка по умолчанию (интерфейс добавляет к ним свои)
+DEFAULT_SETTINGS = {
+    'output_file': 'sites.txt',
+    'output_format': 'auto',  # auto, text, jsonl или sqlite
+    'write_buffer': 500,  # Записей в буфере до сброса на диск
+    'write_interval': 1000,  # Максимальная задержка записи (мс)
+    'dns_workers': 200,
+    'http_workers': 100,
+    'queue_size': 2000,
+    'batch_size': 2000,
+    'nameservers': '8.8.8.8, 1.1.1.1, 9.9.9.9, 1.0.0.1',  # Адрес или адрес=запросов в секунду
+    'dns_qps': 500,  # Запросов в секунду к каждому DNS-серверу (0 - без ограничения)
+    'dns_burst': 100,  # Запас запросов сверх средней частоты
+    'dns_timeout': 2.0,  # Таймаут запроса к одному серверу (с); при отказе запрос уходит на другой
+    'http_qps': 0,  # Запросов HTTP в секунду всего (0 - без ограничения)
+    'http_burst': 100,
+    'probe_method': 'head',  # head (при 405/501 - GET) или get (чтение probe_bytes байт)
+    'probe_bytes': 1024,
+    'max_redirects': 3,  # 0 - не следовать перенаправлениям (3xx считается ответом)
+    'connect_timeout': 5.0,  # в секундах
+    'read_timeout': 5.0,
+    'probe_parallel': False,  # HTTPS и HTTP одновременно
+    'tcp_probe': False,  # Перед HTTP проверять TCP-соединением, открыт ли порт HTTPS или HTTP (см. connect)
+    'tcp_probe_timeout': 1.5,  # На все адреса домена, в секундах
+    'tcp_workers': 500,
+    'happy_eyeballs_delay': 0.25,  # Через сколько секунд без ответа пробовать следующий адрес
+    'resolve_ipv6': False,  # Запрашивать также AAAA: сайты, доступные только по IPv6
+    'ip_memo_size': 0,  # Адресов в памяти для повтора ответов парковок (см. ipmemo; 0 - выключено)
+    'ip_memo_ttl': 600,  # в секундах
+    'ip_memo_hits': 5,  # Одинаковых ответов подряд, после которых адрес считается парковкой
+    'http_port': 80,
+    'https_port': 443,
+    'ca_file': '',  # Дополнительные корневые сертификаты (PEM)
+    'self_test': True,  # Проверить google.com по DNS и HTTPS перед началом
+    'metrics_interval': 2.0,  # Как часто отправлять снимок метрик (с)
+    'profile': '',  # cprofile или yappi - профилировать проверку
+    'profile_file': 'scan.prof',
+    'adaptive_concurrency': True,  # Подбирать число запросов в работе (до dns_workers/http_workers)
+    'max_memory': 512,  # Бюджет памяти процесса в MB (0 - без ограничения)
+    'processes': 1,  # Процессов для параллельной проверки частей пространства
+    'checkpoint_file': 'scan_state.json',  # Пустая строка - без сохранения состояния
+    'checkpoint_interval': 30,  # в секундах
+    'negative_cache_file': 'negative_cache.db',  # Пустая строка - без кэша
+    'negative_cache_ttl': 24,  # в часах
+    'negative_cache_size': 5000000,  # Максимум записей
+    'recheck_alive_file': 'alive.txt',  # Перепроверка списка: сайты, которые еще работают
+    'recheck_dead_file': 'dead.txt',  # точно неработающие (в JSON Lines - с причиной)
+    'recheck_unsure_file': 'unsure.txt',  # и не ответившие из-за сбоя, возможно временного
+    'recheck_checkpoint_file': 'recheck_state.json',
+    'lease_size': 100000,  # Распределенная проверка: позиций в участке, который получает исполнитель
+    'lease_ttl': 120,  # Через сколько секунд без отчетов участок выдается другому исполнителю
+    'coordinator_host': '127.0.0.1',
+    'coordinator_port': 8765,
+    'coordinator_token': '',  # Общий ключ координатора и исполнителей (пусто - без проверки)
+    'coordinator_checkpoint_file': 'coordinator_state.json',
+    'zone_indexes': '',  # Индексы файлов зон через ";" (см. zoneindex): незарегистрированные домены не проверяются
+    'seen_filter_file': '',  # Фильтр недавно проверенных доменов (см. seen); пустая строка - без фильтра
+    'seen_filter_capacity': 10000000,  # Доменов в фильтре (задается при создании файла)
+    'seen_filter_error': 0.001,  # Доля ложных срабатываний: столько непроверенных доменов будет пропущено
+    'seen_filter_ttl': 168,  # Сколько помнить проверенный домен, в часах
+    'patterns': '',  # Шаблоны имен через ";" (см. patterns); пустая строка - все имена длины min-max
+    'wordlists': '',  # Словари для шаблонов: имя=файл через ";"
+}
+
+# Категории сообщений лога (для фильтрации в интерфейсе)
+LOG_INFO = 'info'    # Общие сообщения о ходе работы
+LOG_ERROR = 'error'  # Ошибки
+LOG_DNS = 'dns'      # Результат DNS для отдельного домена
+LOG_HTTP = 'http'    # Результат HTTP для отдельного домена
+LOG_FOUND = 'found'  # Найденные рабочие сайты
+LOG_CATEGORIES = (LOG_FOUND, LOG_ERROR, LOG_INFO, LOG_DNS, LOG_HTTP)
+
+# Коды ошибок c-ares -> короткое имя результата DNS
+DNS_ERROR_NAMES = {1: 'NODATA', 3: 'SERVFAIL', 4: 'NXDOMAIN', 6: 'REFUSED', 11: 'CONNREFUSED', 12: 'TIMEOUT'}
+
+# Результаты DNS, которые запоминаются в кэше отрицательных результатов
+NEGATIVE_DNS_RESULTS = {'NXDOMAIN': NEGATIVE_NXDOMAIN, 'NODATA': NEGATIVE_NODATA}
+
+# Результаты DNS, говорящие о перегрузке резолвера или сети
+DNS_OVERLOAD_RESULTS = ('TIMEOUT', 'SERVFAIL', 'REFUSED', 'CONNREFUSED', 'ERROR')
+
+
+class ScanEvents:
+    """Получатель событий движка.
+    
+    Методы вызываются из потока, в котором работает движок, и по умолчанию
+    ничего не делают - достаточно переопределить нужные.
+    """
+    
+    def on_log(self, message, category=LOG_INFO):
+        pass
+    
+    def on_progress(self, stats):
+        pass
+    
+    def on_found(self, record):
+        """Найден рабочий сайт: record - словарь domain, status, scheme, latency, found_at"""
+        pass
+    
+    def on_checkpoint(self, state):
+        pass
+    
+    def on_metrics(self, snapshot):
+        """Снимок метрик (см. scanner.metrics): периодически и по завершении"""
+        pass
+    
+    def on_finished(self):
+        pass
+
+
+class ScanEngine:
+    """Перебор пространства доменов с проверкой DNS и HTTP/HTTPS.
+    
+    Параметры start/stop ограничивают проверку диапазоном позиций обхода
+    (используется при разделении пространства между процессами). Параметр
+    resume - сохраненное состояние части пространства (см. checkpoint_state),
+    с которого проверка продолжается без повторной проверки завершенного.
+    """
+    
+    def __init__(self, min_length, max_length, settings=None, tlds=None, events=None, start=0, stop=None, resume=None):
+        self.min_length, self.max_length = min_length, max_length
+        self.settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.events = events or ScanEvents()
+        self.output_file = self.settings['output_file']
+        self.running = True
+        self.checked_count, self.valid_count = 0, 0
+        self.chars = DEFAULT_CHARS
+        self.tlds = list(tlds or DEFAULT_TLDS)
+        self.result_writer = None
+        self.loop = None
+        self.resolver = None
+        self.http_resolver = None
+        self.negative_cache = None
+        self.zone_filter = None
+        self.zone_skipped = 0
+        self.seen_filter = None
+        self.seen_skipped = 0
+        self.ports_closed = 0
+        self.tasks = []  # Для отслеживания активных задач
+        # Число запросов в работе; число обработчиков - верхний предел
+        adaptive = self.settings['adaptive_concurrency']
+        self.dns_limit = AdaptiveLimit(self.settings['dns_workers'], adaptive=adaptive)
+        self.http_limit = AdaptiveLimit(self.settings['http_workers'], adaptive=adaptive)
+        # Доля общих пределов частоты, приходящаяся на этот процесс
+        self.rate_share = self.settings.get('rate_share', 1.0)
+        self.metrics = ScanMetrics()
+        self.queues = {}
+        self.prober = Prober(self.settings, metrics=self.metrics)
+        self.port_probe = PortProbe(self.settings, metrics=self.metrics) if self.settings['tcp_probe'] else None
+        self.address_memo = None
+        if self.prober.fingerprints:
+            self.address_memo = AddressMemo(self.settings['ip_memo_size'], self.settings['ip_memo_ttl'],
+                                            self.settings['ip_memo_hits'], metrics=self.metrics)
+        self.memory = MemoryBudget(self.settings['max_memory'])
+        self.memory_paused = False
+        self.http_rate = TokenBucket(self.settings['http_qps'] * self.rate_share,
+                                     self.settings['http_burst'] * self.rate_share)
+        self.domains = self.create_domains(start, stop)
+        self.total_domains = self.calculate_total()
+        
+        # Домены, выданные перебором, но еще не проверенные: домен -> позиция
+        self.in_flight = {}
+        self.resumed = []
+        if resume:
+            self.domains.seek(resume['position'])
+            self.checked_count, self.valid_count = resume['checked'], resume['valid']
+            for position in resume['in_flight']:
+                domain = self.domains.domain_at(position)
+                self.in_flight[domain] = position
+                self.resumed.append(domain)
+    
+    def create_domains(self, start, stop):
+        """Источник доменов: полный перебор пространства в псевдослучайном порядке без повторов"""
+        self.space = create_space(self.settings, self.chars, self.min_length, self.max_length, self.tlds)
+        self.seed = self.settings.get('seed') or random.getrandbits(64)
+        return DomainEnumerator(self.space, seed=self.seed, start=start, stop=stop)
+    
+    def calculate_total(self):
+        return len(self.domains)
+    
+    def generate_domains_batch(self, batch_size):
+        start = self.domains.position
+        domains = self.domains.take(batch_size)
+        for offset, domain in enumerate(domains):
+            self.in_flight[domain] = start + offset
+        return domains
+    
+    async def check_dns(self, domain):
+        """Проверка A-записи (и AAAA при resolve_ipv6): (найден ли домен, строка лога, результат DNS, адреса)"""
+        try:
+            if not self.running:  # Проверяем флаг перед выполнением запроса
+                return False, "Запрос отменен", 'CANCELLED', []
+            
+            if self.settings['resolve_ipv6']:
+                answers = await asyncio.gather(self.resolver.query(domain, 'A'), self.resolver.query(domain, 'AAAA'),
+                                               return_exceptions=True)
+                addresses = [record.host for answer in answers if not isinstance(answer, Exception) for record in answer]
+                # Без адресов результат DNS - ответ на запрос A
+                if not addresses and isinstance(answers[0], Exception):
+                    raise answers[0]
+            else:
+                addresses = [record.host for record in await self.resolver.query(domain, 'A')]
+            if addresses:
+                return True, f"DNS найден: {domain}", 'NOERROR', addresses
+            return False, f"DNS не найден: {domain}", 'NODATA', []
+        except aiodns.error.DNSError as e:
+            rcode = DNS_ERROR_NAMES.get(e.args[0], 'ERROR')
+            if rcode == 'NXDOMAIN':
+                return False, f"DNS домен не существует: {domain}", rcode, []
+            return False, f"DNS ошибка для {domain}: {str(e)}", rcode, []
+        except asyncio.CancelledError:
+            # Домен остается незавершенным и будет проверен при продолжении
+            raise
+        except Exception as e:
+            return False, f"Общая DNS ошибка для {domain}: {str(e)}", 'ERROR', []
+    
+    async def check_http(self, session, domain, addresses, schemes=None):
+        """Проверка сайта: (доступен ли, строка лога, статус/схема/задержка ответа).
+        
+        Если первый адрес домена известен как парковка, ответ берется из памяти
+        без запроса (см. ipmemo).
+        """
+        if self.address_memo:
+            return await self.address_memo.probe(
+                addresses[0], domain, lambda: self.fetch_http(session, domain, addresses, schemes))
+        return await self.fetch_http(session, domain, addresses, schemes)
+    
+    async def fetch_http(self, session, domain, addresses, schemes):
+        """Запрос к сайту с учетом ограничений частоты и числа запросов в работе"""
+        await self.http_rate.take()
+        await self.http_limit.acquire()
+        self.http_resolver.remember(domain, addresses)
+        result = None
+        try:
+            outcome = await self.prober.probe(session, domain, schemes)
+            result = outcome[2]
+            return outcome
+        finally:
+            self.http_resolver.forget(domain)
+            self.http_limit.release()
+            # Без ответа (таймаут, обрыв соединения) - признак перегрузки
+            self.http_limit.record(result['latency'] if result else None, error=result is None)
+    
+    async def open_results(self):
+        self.result_writer = self.open_result_writer()
+        if self.result_writer:
+            await self.result_writer.open()
+    
+    async def sync_results(self):
+        """Запись буферов результатов на диск"""
+        if self.result_writer:
+            await self.result_writer.sync()
+    
+    async def close_results(self):
+        if self.result_writer:
+            await self.result_writer.close()
+    
+    def open_result_writer(self):
+        """Буферизованная запись найденных сайтов в output_file"""
+        return BufferedResultWriter(
+            self.output_file,
+            sink_format=self.settings['output_format'],
+            max_records=self.settings['write_buffer'],
+            max_delay=self.settings['write_interval'] / 1000.0
+        )
+    
+    def domain_done(self, domain, remember=True):
+        """Учет завершенной проверки домена (на любом этапе)"""
+        self.in_flight.pop(domain, None)
+        self.checked_count += 1
+        if remember and self.seen_filter:
+            self.seen_filter.add(domain)
+    
+    async def domain_dead(self, domain, reason, result=None):
+        """Домен не прошел проверку: reason - результат DNS или 'HTTP', result - ответ сайта"""
+        self.domain_done(domain)
+    
+    @property
+    def finished(self):
+        """Пространство проверено полностью"""
+        return self.domains.remaining == 0 and not self.in_flight
+    
+    def checkpoint_state(self):
+        """Состояние части пространства для продолжения проверки"""
+        return {
+            'start': self.domains.start,
+            'stop': self.domains.stop,
+            'position': self.domains.position,
+            'in_flight': sorted(self.in_flight.values()),
+            'checked': self.checked_count,
+            'valid': self.valid_count
+        }
+    
+    def checkpoint_header(self):
+        """Параметры источника доменов в файле состояния"""
+        return {
+            'min_length': self.min_length,
+            'max_length': self.max_length,
+            'tlds': self.tlds,
+            'patterns': self.settings['patterns'],
+            'wordlists': self.settings['wordlists'],
+            'seed': self.seed
+        }
+    
+    def save_checkpoint(self, state=None):
+        """Сохранение состояния в файл из настроек checkpoint_file"""
+        state = state or self.checkpoint_state()
+        path = self.settings['checkpoint_file']
+        if path:
+            try:
+                save_checkpoint(path, {
+                    **self.checkpoint_header(),
+                    'finished': self.finished,
+                    'shards': [state]
+                })
+            except OSError as e:
+                self.events.on_log(f"Ошибка при сохранении состояния: {str(e)}", LOG_ERROR)
+        self.events.on_checkpoint(state)
+    
+    def get_stats(self):
+        """Текущие счетчики проверки"""
+        stats = {
+            'checked': self.checked_count,
+            'total': self.total_domains,
+            'valid': self.valid_count,
+            'dns_limit': self.dns_limit.limit,
+            'http_limit': self.http_limit.limit
+        }
+        if self.resolver:
+            stats.update(self.resolver.get_stats())
+        memory_mb = self.memory.rss_mb()
+        if memory_mb is not None:
+            stats['memory_mb'] = memory_mb
+        if self.negative_cache:
+            stats['cache_hits'] = self.negative_cache.hits
+            stats['cache_lookups'] = self.negative_cache.lookups
+        if self.zone_filter:
+            stats['zone_skipped'] = self.zone_skipped
+        if self.seen_filter:
+            stats['seen_skipped'] = self.seen_skipped
+        if self.port_probe:
+            stats['ports_closed'] = self.ports_closed
+        if self.address_memo:
+            stats['memo_reused'] = self.address_memo.reused
+        return stats
+    
+    @staticmethod
+    def format_stats(stats):
+        """Строка статуса для отображения пользователю"""
+        text = f"Проверено: {stats['checked']}/{stats['total']} | Рабочих: {stats['valid']}"
+        if 'dead' in stats:
+            text += f" | Не работают: {stats['dead']}"
+        if stats.get('unsure'):
+            text += f" | Не ответили: {stats['unsure']}"
+        if stats.get('cache_lookups'):
+            rate = stats['cache_hits'] / stats['cache_lookups'] * 100
+            text += f" | Кэш: {stats['cache_hits']} ({rate:.0f}%)"
+        if 'zone_skipped' in stats:
+            text += f" | Нет в зоне: {stats['zone_skipped']}"
+        if 'seen_skipped' in stats:
+            text += f" | Проверены ранее: {stats['seen_skipped']}"
+        if 'ports_closed' in stats:
+            text += f" | Порты закрыты: {stats['ports_closed']}"
+        if 'memo_reused' in stats:
+            text += f" | Ответ по адресу: {stats['memo_reused']}"
+        if 'dns_limit' in stats:
+            text += f" | Параллельно DNS/HTTP: {stats['dns_limit']}/{stats['http_limit']}"
+        if 'memory_mb' in stats:
+            text += f" | Память: {stats['memory_mb']} МБ"
+        if stats.get('dns_ejected'):
+            text += f" | Исключено DNS-серверов: {stats['dns_ejected']}"
+        return text
+    
+    def report_progress(self):
+        self.events.on_progress(self.get_stats())
+    
+    def skip_seen(self, domains):
+        """Отсев доменов, проверенных недавно (этим или другим процессом)"""
+        if not self.seen_filter:
+            return domains
+        unseen = []
+        for domain in domains:
+            if self.seen_filter.contains(domain):
+                self.domain_done(domain, remember=False)
+            else:
+                unseen.append(domain)
+        skipped = len(domains) - len(unseen)
+        self.seen_skipped += skipped
+        self.metrics.inc('seen_skipped', skipped)
+        return unseen
+    
+    def skip_unregistered(self, domains):
+        """Отсев доменов, которых нет в индексах зон (без запросов DNS)"""
+        if not self.zone_filter:
+            return domains
+        registered = []
+        for domain in domains:
+            if self.zone_filter.registered(domain) is False:
+                self.domain_done(domain)
+            else:
+                registered.append(domain)
+        skipped = len(domains) - len(registered)
+        self.zone_skipped += skipped
+        self.metrics.inc('zone_skipped', skipped)
+        return registered
+    
+    async def skip_cached(self, domains):
+        """Отсев доменов с отрицательным результатом в кэше (запрос - в потоке кэша)"""
+        if not self.negative_cache:
+            return domains
+        cached = await self.negative_cache.run_in_cache(self.negative_cache.lookup_many, domains)
+        if not cached:
+            return domains
+        self.metrics.inc('cache_skipped', len(cached))
+        for domain in cached:
+            self.domain_done(domain)
+        return [domain for domain in domains if domain not in cached]
+    
+    async def cache_negative(self, domain, result):
+        """Отрицательный результат в кэш; накопленные записи сбрасываются в потоке кэша"""
+        if self.negative_cache and self.negative_cache.add(domain, result):
+            await self.negative_cache.run_in_cache(self.negative_cache.flush)
+    
+    async def generate_stage(self, dns_queue):
+        """Этап генерации: заполняет очередь DNS доменами из перебора"""
+        # Сначала домены, проверка которых не завершилась в прошлый раз
+        resumed, self.resumed = self.resumed, []
+        for i in range(0, len(resumed), 1000):
+            for domain in await self.skip_cached(self.skip_unregistered(self.skip_seen(resumed[i:i + 1000]))):
+                await dns_queue.put(domain)
+        
+        while self.running:
+            # Бюджет памяти превышен: ждем, пока домены в работе будут проверены
+            if self.memory.over_limit():
+                if not self.memory_paused:
+                    self.memory_paused = True
+                    self.events.on_log(f"Превышен бюджет памяти ({self.memory.rss_mb()} МБ): генерация приостановлена")
+                if self.in_flight:
+                    await asyncio.sleep(0.2)
+                    continue
+            elif self.memory_paused:
+                self.memory_paused = False
+                self.events.on_log("Память освободилась: генерация продолжена")
+            
+            # Ближе к пределу памяти - меньшими пачками
+            batch_size = self.memory.batch_size(min(self.settings['batch_size'], 1000))
+            started = time.monotonic()
+            domains = self.generate_domains_batch(batch_size)
+            if not domains:
+                break
+            self.metrics.inc('generated', len(domains))
+            domains = await self.skip_cached(self.skip_unregistered(self.skip_seen(domains)))
+            self.metrics.observe('generate', time.monotonic() - started)
+            for domain in domains:
+                # Ограниченная очередь: генератор ждет, пока DNS не освободится
+                await dns_queue.put(domain)
+    
+    async def dns_stage(self, dns_queue, http_queue):
+        """Обработчик DNS: передает разрешенные домены на этап HTTP (или проверки портов)"""
+        while True:
+            domain = await dns_queue.get()
+            if domain is None or not self.running:
+                break
+            
+            await self.dns_limit.acquire()
+            started = time.monotonic()
+            try:
+                dns_ok, dns_log, rcode, addresses = await self.check_dns(domain)
+                self.events.on_log(dns_log, LOG_DNS)
+            except Exception as e:
+                dns_ok, rcode = False, 'ERROR'
+                self.events.on_log(f"Ошибка при обработке домена {domain}: {str(e)}", LOG_ERROR)
+            finally:
+                self.dns_limit.release()
+            # Любой ответ сервера, в том числе NXDOMAIN, - нормальная работа
+            latency = time.monotonic() - started
+            self.dns_limit.record(latency, error=rcode in DNS_OVERLOAD_RESULTS)
+            self.metrics.inc('dns_queries', rcode=rcode)
+            self.metrics.observe('dns', latency, rcode=rcode)
+            
+            if rcode in NEGATIVE_DNS_RESULTS:
+                await self.cache_negative(domain, NEGATIVE_DNS_RESULTS[rcode])
+            
+            # Адреса идут дальше вместе с доменом: HTTP не разрешает его повторно
+            if dns_ok:
+                await http_queue.put((domain, addresses, None))
+            elif rcode != 'CANCELLED':
+                await self.domain_dead(domain, rcode)
+            # Отмененный при остановке домен остается незавершенным и будет проверен при продолжении
+    
+    async def tcp_stage(self, tcp_queue, http_queue):
+        """Проверка портов: на этап HTTP попадают домены с открытым портом HTTPS или HTTP"""
+        while True:
+            item = await tcp_queue.get()
+            if item is None:
+                break
+            domain, addresses, _ = item
+            
+            try:
+                schemes, address = await self.port_probe.check(addresses)
+            except Exception as e:
+                # Без ответа проверки сайт проверяется обычным запросом
+                self.events.on_log(f"Ошибка при проверке портов {domain}: {str(e)}", LOG_ERROR)
+                await http_queue.put((domain, addresses, None))
+                continue
+            
+            if schemes:
+                # Ответивший адрес - первым: с ним и соединится HTTP
+                addresses = [address, *(other for other in addresses if other != address)]
+                await http_queue.put((domain, addresses, schemes))
+            else:
+                self.ports_closed += 1
+                self.events.on_log(f"Порты закрыты: {domain}", LOG_HTTP)
+                # Закрытый порт не отличить от потерянного пакета: запись на короткий срок
+                await self.cache_negative(domain, NEGATIVE_UNREACHABLE)
+                await self.domain_dead(domain, 'TCP')
+    
+    async def http_stage(self, session, http_queue, result_queue):
+        """Обработчик HTTP: передает рабочие сайты на запись"""
+        while True:
+            item = await http_queue.get()
+            if item is None:
+                break
+            domain, addresses, schemes = item
+            
+            http_ok, result = False, None
+            started = time.monotonic()
+            try:
+                http_ok, http_log, result = await self.check_http(session, domain, addresses, schemes)
+                self.events.on_log(http_log, LOG_HTTP)
+            except (ConnectionResetError, aiohttp.ClientConnectionError):
+                pass
+            except Exception as e:
+                self.events.on_log(f"Ошибка при обработке домена {domain}: {str(e)}", LOG_ERROR)
+            self.metrics.observe('http_stage', time.monotonic() - started)
+            self.metrics.inc('http_checked', result='alive' if http_ok else 'dead')
+            
+            # Рабочий сайт считается проверенным только после записи в файл
+            if http_ok:
+                await result_queue.put(make_record(domain, **result))
+            else:
+                # Без результата сайт не ответил (таймаут, сброс): это может быть временно
+                await self.cache_negative(domain, NEGATIVE_DEAD if result else NEGATIVE_UNREACHABLE)
+                await self.domain_dead(domain, 'HTTP', result)
+    
+    async def write_stage(self, result_queue):
+        """Этап записи: сохраняет найденные рабочие сайты"""
+        while True:
+            record = await result_queue.get()
+            if record is None:
+                break
+            started = time.monotonic()
+            try:
+                if self.result_writer:
+                    await self.result_writer.add(record)
+            except Exception as e:
+                # Запись осталась в буфере и повторится при следующем сбросе
+                self.metrics.inc('write_errors')
+                self.events.on_log(f"Ошибка при сохранении {record['domain']}: {str(e)}", LOG_ERROR)
+            self.valid_count += 1
+            self.events.on_found(record)
+            self.metrics.observe('write', time.monotonic() - started)
+            self.domain_done(record['domain'])
+    
+    def collect_metrics(self):
+        """Снимок метрик с текущими размерами очередей и числом запросов в работе"""
+        for name, queue in self.queues.items():
+            self.metrics.set('queue_depth', queue.qsize(), queue=name)
+        for stage, limit in (('dns', self.dns_limit), ('http', self.http_limit)):
+            self.metrics.set('in_flight', limit.active, stage=stage)
+            self.metrics.set('concurrency_limit', limit.limit, stage=stage)
+        self.metrics.set('pending_domains', len(self.in_flight))
+        rss = self.memory.sample()
+        if rss is not None:
+            self.metrics.set('memory_bytes', rss)
+        return self.metrics.snapshot()
+    
+    def report_metrics(self):
+        self.events.on_metrics(self.collect_metrics())
+    
+    async def progress_stage(self):
+        """Периодическая отправка прогресса и метрик в интерфейс"""
+        reported = time.monotonic()
+        while True:
+            self.report_progress()
+            if time.monotonic() - reported >= self.settings['metrics_interval']:
+                reported = time.monotonic()
+                self.report_metrics()
+            await asyncio.sleep(0.5)
+    
+    async def checkpoint(self):
+        """Согласованное сохранение состояния.
+        
+        Снимок берется до записи буфера результатов на диск: все сайты,
+        учтенные в снимке как проверенные, к моменту сохранения уже в файле.
+        """
+        state = self.checkpoint_state()
+        await self.sync_results()
+        self.save_checkpoint(state)
+        if self.negative_cache:
+            await self.negative_cache.run_in_cache(self.negative_cache.flush)
+        if self.seen_filter:
+            self.seen_filter.flush()
+    
+    async def checkpoint_stage(self):
+        """Периодическое сохранение состояния"""
+        while True:
+            await asyncio.sleep(self.settings['checkpoint_interval'])
+            try:
+                await self.checkpoint()
+            except Exception as e:
+                # Результаты не записаны - состояние не сохранено, попробуем в следующий раз
+                self.events.on_log(f"Ошибка при сохранении состояния: {str(e)}", LOG_ERROR)
+    
+    async def run_pipeline(self, session):
+        """Конвейер: генератор -> очередь DNS -> [очередь портов ->] очередь HTTP -> запись.
+        
+        У каждого этапа свой пул обработчиков, очереди ограничены, поэтому
+        медленный HTTP-хост занимает только одного обработчика HTTP и не
+        задерживает проверку DNS остальных доменов. Проверка портов
+        включается настройкой tcp_probe.
+        """
+        dns_workers = self.settings['dns_workers']
+        http_workers = self.settings['http_workers']
+        queue_size = self.settings['queue_size']
+        
+        dns_queue = asyncio.Queue(maxsize=queue_size)
+        http_queue = asyncio.Queue(maxsize=queue_size)
+        result_queue = asyncio.Queue(maxsize=queue_size)
+        self.queues = {'dns': dns_queue, 'http': http_queue, 'result': result_queue}
+        tcp_queue, tcp_workers = None, 0
+        if self.port_probe:
+            tcp_queue, tcp_workers = asyncio.Queue(maxsize=queue_size), self.settings['tcp_workers']
+            self.queues['tcp'] = tcp_queue
+        
+        await self.open_results()
+        
+        generator = asyncio.create_task(self.generate_stage(dns_queue))
+        dns_tasks = [asyncio.create_task(self.dns_stage(dns_queue, tcp_queue or http_queue)) for _ in range(dns_workers)]
+        tcp_tasks = [asyncio.create_task(self.tcp_stage(tcp_queue, http_queue)) for _ in range(tcp_workers)]
+        http_tasks = [asyncio.create_task(self.http_stage(session, http_queue, result_queue)) for _ in range(http_workers)]
+        writer = asyncio.create_task(self.write_stage(result_queue))
+        progress = asyncio.create_task(self.progress_stage())
+        checkpoint = asyncio.create_task(self.checkpoint_stage())
+        self.tasks = [generator, *dns_tasks, *tcp_tasks, *http_tasks, writer, progress, checkpoint]
+        
+        try:
+            # Завершаем этапы по очереди, передавая маркер окончания
+            await generator
+            for _ in dns_tasks:
+                await dns_queue.put(None)
+            await asyncio.gather(*dns_tasks)
+            for _ in tcp_tasks:
+                await tcp_queue.put(None)
+            await asyncio.gather(*tcp_tasks)
+            for _ in http_tasks:
+                await http_queue.put(None)
+            await asyncio.gather(*http_tasks)
+            await result_queue.put(None)
+            await writer
+        finally:
+            for task in self.tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+            
+            state = self.checkpoint_state()
+            try:
+                await self.close_results()
+                self.save_checkpoint(state)
+            except Exception as e:
+                # Без записи результатов состояние не сохраняем: найденное не потеряется
+                self.events.on_log(f"Ошибка при записи результатов: {str(e)}", LOG_ERROR)
+            self.report_progress()
+            self.report_metrics()
+    
+    def open_negative_cache(self):
+        path = self.settings['negative_cache_file']
+        if not path:
+            return
+        try:
+            self.negative_cache = NegativeCache(
+                path,
+                ttl_hours=self.settings['negative_cache_ttl'],
+                max_entries=self.settings['negative_cache_size']
+            )
+        except Exception as e:
+            self.events.on_log(f"Кэш отрицательных результатов недоступен: {str(e)}", LOG_ERROR)
+    
+    def open_zone_filter(self):
+        paths = split_indexes(self.settings['zone_indexes'])
+        if not paths:
+            return
+        try:
+            self.zone_filter = ZoneFilter(paths)
+        except (OSError, ValueError) as e:
+            self.events.on_log(f"Индекс зоны недоступен: {str(e)}", LOG_ERROR)
+            return
+        zones = ', '.join(f"{suffix} ({len(index):,} имен)" for suffix, index in self.zone_filter.indexes.items())
+        self.events.on_log(f"Индексы зон: {zones}; домены вне индексов проверяются через DNS")
+    
+    def open_seen_filter(self):
+        path = self.settings['seen_filter_file']
+        if not path:
+            return
+        try:
+            self.seen_filter = SeenFilter(
+                path,
+                capacity=self.settings['seen_filter_capacity'],
+                error_rate=self.settings['seen_filter_error'],
+                ttl_hours=self.settings['seen_filter_ttl']
+            )
+        except (OSError, ValueError) as e:
+            self.events.on_log(f"Фильтр проверенных доменов недоступен: {str(e)}", LOG_ERROR)
+    
+    def create_resolver(self):
+        """Пул DNS-серверов с пределом частоты запросов к каждому"""
+        burst = self.settings['dns_burst'] * self.rate_share
+        return ResolverPool(
+            parse_nameservers(self.settings['nameservers'], self.settings['dns_qps']),
+            bucket_factory=lambda rate: TokenBucket(rate * self.rate_share, burst),
+            timeout=self.settings['dns_timeout'],
+            log=lambda message: self.events.on_log(message, LOG_ERROR)
+        )
+    
+    async def run_async(self):
+        try:
+            self.open_negative_cache()
+            self.open_zone_filter()
+            self.open_seen_filter()
+            if self.settings['ip_memo_size'] > 0 and not self.address_memo:
+                self.events.on_log("Запоминание ответов адресов выключено: оно работает только при проверке GET с чтением тела", LOG_ERROR)
+            try:
+                self.resolver = self.create_resolver()
+            except ValueError as e:
+                self.events.on_log(f"Ошибка в списке DNS-серверов: {str(e)}", LOG_ERROR)
+                return
+            
+            # Тест DNS
+            if self.settings['self_test']:
+                try:
+                    await asyncio.wait_for(
+                        self.resolver.query("google.com", "A"),
+                        timeout=5.0
+                    )
+                    self.events.on_log("DNS проверка: google.com разрешен успешно")
+                except (asyncio.TimeoutError, Exception) as e:
+                    self.events.on_log(f"Ошибка DNS: {str(e)}", LOG_ERROR)
+                    return
+            
+            # Соединения HTTP берут адреса из результатов этапа DNS
+            self.http_resolver = ScanResultResolver(self.resolver)
+            # Соединения с проверяемыми хостами не переиспользуются - держать их незачем
+            connector = aiohttp.TCPConnector(
+                limit=self.settings['http_workers'],
+                ssl=self.prober.ssl_context,
+                resolver=self.http_resolver,
+                use_dns_cache=False,
+                force_close=True
+            )
+            
+            async with aiohttp.ClientSession(
+                connector=connector,
+                headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"}
+            ) as session:
+                
+                # Тест HTTP
+                if self.settings['self_test']:
+                    try:
+                        async with session.get(
+                            "https://google.com", 
+                            timeout=aiohttp.ClientTimeout(total=10),
+                            allow_redirects=True
+                        ) as r:
+                            if r.status == 200:
+                                self.events.on_log("Тест HTTP: Google доступен")
+                            else:
+                                self.events.on_log(f"Тест HTTP: Google вернул статус {r.status}", LOG_ERROR)
+                                return
+                    except Exception as e:
+                        self.events.on_log(f"Ошибка при тесте HTTP: {str(e)}", LOG_ERROR)
+                        return
+                
+                await self.run_pipeline(session)
+        except asyncio.CancelledError:
+            self.events.on_log("Запрос на остановку принят")
+        except Exception as e:
+            self.events.on_log(f"Критическая ошибка в run_async: {str(e)}\n{traceback.format_exc()}", LOG_ERROR)
+        finally:
+            # Закрываем резолвер асинхронно
+            if hasattr(self, 'resolver') and self.resolver:
+                try:
+                    await self.resolver.close()
+                except Exception as e:
+                    self.events.on_log(f"Ошибка при закрытии резолвера: {str(e)}", LOG_ERROR)
+            if self.negative_cache:
+                try:
+                    await self.negative_cache.run_in_cache(self.negative_cache.close)
+                except Exception as e:
+                    self.events.on_log(f"Ошибка при закрытии кэша: {str(e)}", LOG_ERROR)
+            if self.zone_filter:
+                self.zone_filter.close()
+            if self.seen_filter:
+                try:
+                    self.seen_filter.close()
+                except Exception as e:
+                    self.events.on_log(f"Ошибка при закрытии фильтра проверенных доменов: {str(e)}", LOG_ERROR)
+    
+    def start_profiler(self):
+        """Профилировщик из настройки profile (None - без профилирования)"""
+        if not self.settings['profile']:
+            return None
+        try:
+            profiler = create_profiler(self.settings['profile'])
+        except ValueError as e:
+            self.events.on_log(f"Профилирование недоступно: {str(e)}", LOG_ERROR)
+            return None
+        profiler.start()
+        return profiler
+    
+    def stop_profiler(self, profiler):
+        path = self.settings['profile_file']
+        try:
+            top = profiler.stop(path)
+            self.events.on_log(f"Профиль сохранен в {path}\n{top}")
+        except OSError as e:
+            self.events.on_log(f"Ошибка при сохранении профиля: {str(e)}", LOG_ERROR)
+    
+    def run(self):
+        """Запуск проверки в текущем потоке (блокирует до завершения)"""
+        profiler = None
+        try:
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            profiler = self.start_profiler()
+            self.loop.run_until_complete(self.run_async())
+            self.events.on_log(f"Завершено! Рабочих сайтов: {self.valid_count}")
+        except asyncio.CancelledError:
+            self.events.on_log("Генерация отменена пользователем")
+        except Exception as e: 
+            self.events.on_log(f"Критическая ошибка в потоке: {str(e)}\n{traceback.format_exc()}", LOG_ERROR)
+        finally: 
+            if profiler:
+                self.stop_profiler(profiler)
+            if self.loop:
+                self.loop.close()
+            self.events.on_finished()
+    
+    def stop(self):
+        """Остановка генерации (можно вызывать из любого потока)"""
+        self.running = False
+        if self.loop and self.loop.is_running():
+            try:
+                # Отменяем только незавершенные задачи (из потока цикла событий)
+                for task in self.tasks:
+                    if not task.done():
+                        self.loop.call_soon_threadsafe(task.cancel)
+            except Exception as e:
+                self.events.on_log(f"Ошибка при отмене задач: {str(e)}", LOG_ERROR)
+            
+            self.events.on_log("Запрос на остановку отправлен...")
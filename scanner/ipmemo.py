@@ -0,0 +1,134 @@
+"""Запоминание ответов сайтов по IP-адресу: парковки и общий хостинг.
+
+Множество коротких имен ведет на несколько адресов парковочных сервисов и
+хостингов, которые на любое имя отвечают одной и той же страницей. Для
+каждого адреса запоминается отпечаток последнего ответа: статус, конечный
+адрес после перенаправлений, тип и начало тела, в которых имя домена
+заменено заглушкой. Отпечаток есть только у ответов с телом (проверка GET):
+по статусу и заголовкам не отличить парковку от обычных сайтов одного
+хостинга или CDN. Если hits доменов подряд получили с адреса одинаковый
+ответ, следующие домены на этом адресе получают тот же результат без
+запроса, пока запись не устареет (ttl). Каждый VERIFY_EVERY-й домен на
+таком адресе все же запрашивается; адрес, который отвечал разным доменам
+по-разному (обычный общий хостинг), до устаревания записи не запоминается.
+Результаты доменов на адресе-парковке помечаются parked: в файл результатов
+они попадают с этой пометкой (см. sinks), а не как обычные рабочие сайты.
+
+Пока отпечаток адреса набирает повторы, запросы к нему идут по одному:
+следующий домен ждет ответа на предыдущий и, если адрес за это время
+оказался парковкой, запрос не отправляет. Неудачные запросы (таймаут,
+ошибка соединения) не запоминаются.
+"""
+
+import asyncio, collections, hashlib, time
+
+# Каждый какой домен на адресе-парковке проверяется настоящим запросом
+VERIFY_EVERY = 10
+
+
+def response_fingerprint(domain, status, url, headers, body):
+    """Отпечаток ответа без имени домена (body - непустое начало тела)"""
+    name = domain.lower().encode('utf-8')
+    digest = hashlib.blake2b(digest_size=8)
+    for part in (str(status), str(url), headers.get('Content-Type', ''), headers.get('Server', '')):
+        digest.update(part.lower().encode('utf-8', 'replace').replace(name, b'*') + b'\0')
+    digest.update(body.lower().replace(name, b'*'))
+    return digest.hexdigest()
+
+
+class MemoEntry:
+    __slots__ = ('fingerprint', 'outcome', 'count', 'uses', 'mixed', 'expires')
+
+    def __init__(self, fingerprint, outcome, expires):
+        self.fingerprint = fingerprint
+        self.outcome = outcome  # (доступен ли, статус, схема)
+        self.count = 1
+        self.uses = 0  # Доменов, получивших ответ из памяти или проверочный запрос
+        self.mixed = False  # Разные ответы разным доменам
+        self.expires = expires
+
+
+class AddressMemo:
+    """LRU-кэш ответов по адресам (size записей) со сроком ttl секунд"""
+
+    def __init__(self, size=10000, ttl=600, hits=5, metrics=None):
+        self.size = size
+        self.ttl = ttl
+        self.hits = hits
+        self.metrics = metrics
+        self.entries = collections.OrderedDict()  # Адрес -> MemoEntry
+        self.in_flight = {}  # Адрес -> Future, завершаемый после ответа
+        self.reused = 0
+
+    def get(self, address):
+        entry = self.entries.get(address)
+        if entry is None:
+            return None
+        if entry.expires < time.monotonic():
+            del self.entries[address]
+            return None
+        self.entries.move_to_end(address)
+        return entry
+
+    def known(self, address):
+        """Запись адреса, если его ответ можно повторить без запроса"""
+        entry = self.get(address)
+        if entry is not None and not entry.mixed and entry.count >= self.hits:
+            return entry
+        return None
+
+    def remember(self, address, fingerprint, outcome):
+        entry = self.get(address)
+        if entry is None:
+            self.entries[address] = MemoEntry(fingerprint, outcome, time.monotonic() + self.ttl)
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        elif entry.fingerprint == fingerprint:
+            entry.count += 1
+        else:
+            entry.fingerprint, entry.outcome, entry.count, entry.mixed = fingerprint, outcome, 1, True
+
+    def reuse(self, entry, domain, address):
+        self.reused += 1
+        self.record('hit')
+        ok, status, scheme = entry.outcome
+        label = scheme.upper()
+        state = "доступен" if ok else "недоступен"
+        log = f"{label} {state}: {domain} (статус: {status}, парковка: как у других доменов на {address})"
+        return ok, log, {'status': status, 'scheme': scheme, 'latency': None, 'parked': True}
+
+    async def probe(self, address, domain, fetch):
+        """Результат fetch() для домена на адресе или повтор запомненного ответа"""
+        entry = self.known(address)
+        if entry is None:
+            waiting = self.in_flight.get(address)
+            suspect = self.get(address)
+            if waiting is not None and suspect is not None and not suspect.mixed:
+                # Адрес отвечает одинаково: ждем ответа на запрос, который уже идет
+                await asyncio.shield(waiting)
+                entry = self.known(address)
+        if entry is not None:
+            entry.uses += 1
+            if entry.uses % VERIFY_EVERY:
+                return self.reuse(entry, domain, address)
+        self.record('miss')
+
+        future = None
+        if address not in self.in_flight:
+            future = self.in_flight[address] = asyncio.get_running_loop().create_future()
+        try:
+            ok, log, result = await fetch()
+        finally:
+            if future is not None:
+                del self.in_flight[address]
+                future.set_result(None)
+        fingerprint = result.pop('fingerprint', None) if result else None
+        if fingerprint is not None:
+            self.remember(address, fingerprint, (ok, result['status'], result['scheme']))
+            # Ответ совпал с ответом парковки (в том числе проверочный запрос)
+            result['parked'] = self.known(address) is not None
+        return ok, log, result
+
+    def record(self, result):
+        if self.metrics is not None:
+            self.metrics.inc('ip_memo', result=result)
@@ -0,0 +1,117 @@
+"""Адаптивное ограничение числа одновременных запросов (AIMD).
+
+Предел запросов в работе подбирается по наблюдениям за раунд (около
+секунды): если доля ошибок заметно выросла относительно обычной для сети
+или задержка ответов выросла относительно базовой, предел уменьшается в
+несколько раз; если все спокойно и предел был исчерпан, он растет на
+постоянный шаг. Так находится наибольшая параллельность, которую
+выдерживают резолверы, сеть и сами проверяемые хосты.
+"""
+
+import asyncio, collections, math, time
+
+
+class AdaptiveLimit:
+    """Семафор с изменяемым пределом и AIMD-регулятором.
+
+    Обработчик захватывает место через acquire(), освобождает через
+    release() и сообщает результат запроса через record(). При
+    adaptive=False предел постоянно равен maximum.
+    """
+
+    def __init__(self, maximum, minimum=1, adaptive=True, round_time=1.0, min_samples=20,
+                 decrease=0.7, error_margin=0.05, latency_tolerance=2.0):
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.adaptive = adaptive
+        self.round_time = round_time
+        self.min_samples = min_samples
+        self.decrease = decrease
+        self.error_margin = error_margin
+        self.latency_tolerance = latency_tolerance
+        # Медленный старт: с десятой части предела, рост на двадцатую часть за раунд
+        self.step = max(1, self.maximum // 20)
+        self.limit = max(self.minimum, self.maximum // 10) if adaptive else self.maximum
+        self.active = 0
+        self.waiters = collections.deque()
+
+        # Базовые значения сети: минимум по раундам с медленным забыванием
+        self.base_latency = None
+        self.base_errors = None
+        self.start_round()
+
+    def start_round(self):
+        self.round_started = time.monotonic()
+        self.latencies = []
+        self.errors = 0
+        self.samples = 0
+        self.saturated = self.active >= self.limit
+
+    async def acquire(self):
+        while self.active >= self.limit:
+            self.saturated = True
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self.waiters:
+                    self.waiters.remove(waiter)
+        self.active += 1
+
+    def release(self):
+        self.active -= 1
+        self.wake()
+
+    def wake(self):
+        """Пробуждение ожидающих по числу свободных мест"""
+        free = self.limit - self.active
+        while free > 0 and self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def record(self, latency=None, error=False):
+        """Результат запроса: задержка ответа (None - ответа нет) и признак ошибки"""
+        if not self.adaptive:
+            return
+        self.samples += 1
+        if error:
+            self.errors += 1
+        elif latency is not None:
+            self.latencies.append(latency)
+        if time.monotonic() - self.round_started >= self.round_time and self.samples >= self.min_samples:
+            self.adjust()
+
+    def adjust(self):
+        """Конец раунда: уменьшение предела при перегрузке или рост на шаг"""
+        error_rate = self.errors / self.samples
+        latency = sorted(self.latencies)[len(self.latencies) // 2] if self.latencies else None
+
+        congested = False
+        if self.base_errors is not None:
+            # Допуск на случайный разброс доли ошибок в небольшом раунде
+            noise = 2 * math.sqrt(self.base_errors * (1 - self.base_errors) / self.samples)
+            congested = error_rate > self.base_errors + self.error_margin + noise
+        if latency is not None and self.base_latency is not None:
+            congested = congested or latency > self.base_latency * self.latency_tolerance
+
+        if congested:
+            self.limit = max(self.minimum, int(self.limit * self.decrease))
+        elif self.saturated:
+            self.limit = min(self.maximum, self.limit + self.step)
+            self.wake()
+
+        # Базовые значения только снижаются, но постепенно забываются,
+        # чтобы регулятор подстраивался под изменение сети
+        if not congested:
+            if error_rate < (self.base_errors if self.base_errors is not None else 1.0):
+                self.base_errors = error_rate
+            if latency is not None and (self.base_latency is None or latency < self.base_latency):
+                self.base_latency = latency
+        if self.base_errors is not None:
+            self.base_errors = min(1.0, self.base_errors + 0.005)
+        if self.base_latency is not None:
+            self.base_latency *= 1.02
+        self.start_round()
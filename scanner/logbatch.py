@@ -0,0 +1,49 @@
+"""Пакетная передача лога с ограничением частоты.
+
+При тысячах проверок в секунду передавать каждое сообщение отдельно в
+интерфейс нельзя: очередь событий Qt не успевает. LogBatcher фильтрует
+сообщения по категориям, копит их и отдает пачкой не чаще interval секунд.
+Если за интервал пришло больше max_lines сообщений, сохраняются последние,
+а вместо остальных выдается одна строка с их числом.
+"""
+
+import collections, time
+
+from .engine import LOG_CATEGORIES, LOG_INFO
+
+
+class LogBatcher:
+    """Накопитель сообщений лога: add() копит, take() выдает пачку"""
+
+    def __init__(self, interval=0.2, max_lines=500, categories=LOG_CATEGORIES):
+        self.interval = interval
+        self.lines = collections.deque(maxlen=max_lines)
+        self.categories = frozenset(categories)
+        self.dropped = 0
+        self.last_take = time.monotonic()
+
+    def set_categories(self, categories):
+        """Смена фильтра (можно вызывать из другого потока)"""
+        self.categories = frozenset(categories)
+
+    def add(self, message, category):
+        """Добавить сообщение; True, если пора выдать пачку"""
+        if category not in self.categories:
+            return False
+        if len(self.lines) == self.lines.maxlen:
+            self.dropped += 1
+        self.lines.append((category, message))
+        return self.due()
+
+    def due(self):
+        return bool(self.lines) and time.monotonic() - self.last_take >= self.interval
+
+    def take(self):
+        """Накопленные сообщения [(категория, текст)] с отметкой о пропущенных"""
+        batch = list(self.lines)
+        self.lines.clear()
+        if self.dropped:
+            batch.insert(0, (LOG_INFO, f"... пропущено сообщений: {self.dropped}"))
+            self.dropped = 0
+        self.last_take = time.monotonic()
+        return batch
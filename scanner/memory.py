@@ -0,0 +1,100 @@
+"""Учет памяти процесса и ограничение по бюджету max_memory.
+
+Размер занятой памяти (RSS) берется из psutil, если он установлен, иначе
+из /proc (Linux) или GetProcessMemoryInfo (Windows). Если узнать размер
+нельзя, бюджет не ограничивает проверку.
+"""
+
+import gc, os, sys, time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Доля бюджета, с которой генератор уменьшает пачки доменов
+SOFT_LIMIT = 0.8
+MIN_BATCH = 50
+SAMPLE_INTERVAL = 0.5  # Не чаще (с)
+
+
+def _windows_rss():
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        return None
+    return counters.WorkingSetSize
+
+
+def current_rss():
+    """Занятая процессом память в байтах или None, если узнать нельзя"""
+    try:
+        if psutil is not None:
+            return psutil.Process().memory_info().rss
+        if sys.platform == 'win32':
+            return _windows_rss()
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class MemoryBudget:
+    """Бюджет памяти процесса: limit_mb = 0 - без ограничения.
+
+    batch_size() уменьшает пачки при приближении к пределу, over_limit()
+    сообщает о превышении - тогда генератор ждет, пока проверка доменов в
+    работе не освободит память.
+    """
+
+    def __init__(self, limit_mb):
+        self.limit = limit_mb * 1024 * 1024
+        self.rss = None
+        self.sampled = 0.0
+        self.collected = False
+        self.sample(force=True)
+
+    def sample(self, force=False):
+        now = time.monotonic()
+        if force or now - self.sampled >= SAMPLE_INTERVAL:
+            self.sampled = now
+            self.rss = current_rss()
+        return self.rss
+
+    def usage(self):
+        """Доля бюджета, занятая процессом (0, если предела нет)"""
+        rss = self.sample()
+        if not self.limit or rss is None:
+            return 0.0
+        return rss / self.limit
+
+    def batch_size(self, batch_size):
+        if self.usage() >= SOFT_LIMIT:
+            return max(MIN_BATCH, batch_size // 4)
+        return batch_size
+
+    def over_limit(self):
+        if self.usage() < 1.0:
+            self.collected = False
+            return False
+        # Один раз при превышении пробуем освободить память сборщиком мусора
+        if not self.collected:
+            self.collected = True
+            gc.collect()
+            return self.sample(force=True) >= self.limit
+        return True
+
+    def rss_mb(self):
+        rss = self.sample()
+        return round(rss / (1024 * 1024)) if rss is not None else None
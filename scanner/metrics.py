@@ -0,0 +1,270 @@
+"""Метрики проверки: счетчики, гистограммы задержек и текущие значения.
+
+Метрика задается именем и метками, например ('dns', rcode='NXDOMAIN').
+Движок периодически передает снимок метрик (см. ScanEvents.on_metrics) -
+обычные списки и словари, которые можно переслать между процессами и
+сложить. Снимок выводится в текстовом формате Prometheus или в JSON.
+
+Границы корзин гистограмм растут в геометрической прогрессии (четыре корзины
+на каждое удвоение, от 1 мс до минуты), поэтому память постоянна при любом
+числе замеров, а перцентили получаются с точностью до ширины корзины (~19%).
+"""
+
+import bisect, json, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BUCKET_MIN = 0.001  # Верхняя граница первой корзины (с)
+BUCKETS_PER_DOUBLING = 4
+BUCKET_COUNT = 64
+BUCKET_BOUNDS = tuple(BUCKET_MIN * 2 ** (i / BUCKETS_PER_DOUBLING) for i in range(BUCKET_COUNT))
+
+PROMETHEUS_PREFIX = 'site_scan'
+
+# Задержки этапов для сводок: (этап, гистограмма, метки)
+STAGE_HISTOGRAMS = (
+    ('generate', 'generate', {}),
+    ('dns', 'dns', {}),
+    ('tcp', 'tcp_probe', {}),
+    ('https', 'probe', {'scheme': 'https'}),
+    ('http', 'probe', {'scheme': 'http'}),
+    ('http_stage', 'http_stage', {}),
+    ('write', 'write', {}),
+)
+
+
+class LatencyHistogram:
+    """Распределение задержек (в секундах) с расчетом перцентилей"""
+
+    def __init__(self):
+        # Последняя корзина - задержки больше всех границ
+        self.counts = [0] * (BUCKET_COUNT + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @classmethod
+    def from_state(cls, state):
+        histogram = cls()
+        histogram.counts = list(state['counts'])
+        histogram.count, histogram.total, histogram.max = state['count'], state['sum'], state['max']
+        return histogram
+
+    def state(self):
+        return {'counts': list(self.counts), 'count': self.count, 'sum': self.total, 'max': self.max}
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Оценка перцентиля q (0..1) сверху: граница корзины; None без замеров"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(BUCKET_BOUNDS[index], self.max) if index < BUCKET_COUNT else self.max
+        return self.max
+
+    def merge(self, other):
+        """Добавление замеров другой гистограммы (например, другого процесса)"""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def summary(self):
+        """Число замеров, среднее, p50, p90, p99 и максимум в миллисекундах"""
+        def ms(value):
+            return round(value * 1000, 2) if value is not None else None
+
+        return {
+            'count': self.count,
+            'mean_ms': ms(self.total / self.count if self.count else None),
+            'p50_ms': ms(self.quantile(0.5)),
+            'p90_ms': ms(self.quantile(0.9)),
+            'p99_ms': ms(self.quantile(0.99)),
+            'max_ms': ms(self.max if self.count else None)
+        }
+
+
+def metric_key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class ScanMetrics:
+    """Набор метрик одного движка"""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+
+    def inc(self, name, value=1, **labels):
+        key = metric_key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """Замер задержки (с)"""
+        key = metric_key(name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+        histogram.observe(value)
+
+    def set(self, name, value, **labels):
+        self.gauges[metric_key(name, labels)] = value
+
+    def snapshot(self):
+        """Снимок: {'counters'|'gauges': [[имя, метки, значение]], 'histograms': [[имя, метки, состояние]]}"""
+        return {
+            'counters': [[name, dict(labels), value] for (name, labels), value in self.counters.items()],
+            'gauges': [[name, dict(labels), value] for (name, labels), value in self.gauges.items()],
+            'histograms': [[name, dict(labels), histogram.state()]
+                           for (name, labels), histogram in self.histograms.items()]
+        }
+
+
+def merge_snapshots(snapshots):
+    """Сумма снимков нескольких процессов (текущие значения тоже складываются)"""
+    merged = ScanMetrics()
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            merged.inc(name, value, **labels)
+        for name, labels, value in snapshot['gauges']:
+            key = metric_key(name, labels)
+            merged.gauges[key] = merged.gauges.get(key, 0) + value
+        for name, labels, state in snapshot['histograms']:
+            key = metric_key(name, labels)
+            histogram = LatencyHistogram.from_state(state)
+            if key in merged.histograms:
+                merged.histograms[key].merge(histogram)
+            else:
+                merged.histograms[key] = histogram
+    return merged.snapshot()
+
+
+def select(entries, name, labels):
+    """Записи снимка с этим именем и (как минимум) этими метками"""
+    return [entry for entry in entries
+            if entry[0] == name and all(entry[1].get(key) == value for key, value in labels.items())]
+
+
+def histogram_summary(snapshot, name, **labels):
+    """Сводка по гистограммам с этим именем (замеры всех подходящих меток складываются)"""
+    histogram = LatencyHistogram()
+    for _, _, state in select(snapshot['histograms'], name, labels):
+        histogram.merge(LatencyHistogram.from_state(state))
+    return histogram.summary()
+
+
+def stage_summaries(snapshot):
+    """Сводки задержек по этапам (см. STAGE_HISTOGRAMS)"""
+    return {stage: histogram_summary(snapshot, name, **labels) for stage, name, labels in STAGE_HISTOGRAMS}
+
+
+def counter_values(snapshot, name, label):
+    """Значения счетчика по значениям метки: {'NXDOMAIN': 10, ...}"""
+    values = {}
+    for _, labels, value in select(snapshot['counters'], name, {}):
+        values[labels.get(label)] = values.get(labels.get(label), 0) + value
+    return values
+
+
+def gauge_value(snapshot, name, **labels):
+    return sum(value for _, _, value in select(snapshot['gauges'], name, labels))
+
+
+def format_name(name, labels):
+    if not labels:
+        return name
+    pairs = ','.join(f'{key}="{value}"' for key, value in sorted(labels.items()))
+    return f"{name}{{{pairs}}}"
+
+
+def summarize(snapshot):
+    """Снимок в читаемом виде для JSON: имена с метками, гистограммы - перцентилями"""
+    return {
+        'counters': {format_name(name, labels): value for name, labels, value in snapshot['counters']},
+        'gauges': {format_name(name, labels): value for name, labels, value in snapshot['gauges']},
+        'histograms': {format_name(name, labels): LatencyHistogram.from_state(state).summary()
+                       for name, labels, state in snapshot['histograms']}
+    }
+
+
+def render_prometheus(snapshot, prefix=PROMETHEUS_PREFIX):
+    """Снимок в текстовом формате Prometheus"""
+    lines = []
+    typed = set()
+
+    def declare(metric, kind):
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f"# TYPE {metric} {kind}")
+
+    for name, labels, value in sorted(snapshot['counters'], key=lambda entry: entry[0]):
+        metric = f"{prefix}_{name}_total"
+        declare(metric, 'counter')
+        lines.append(f"{format_name(metric, labels)} {value}")
+    for name, labels, value in sorted(snapshot['gauges'], key=lambda entry: entry[0]):
+        metric = f"{prefix}_{name}"
+        declare(metric, 'gauge')
+        lines.append(f"{format_name(metric, labels)} {value}")
+    for name, labels, state in sorted(snapshot['histograms'], key=lambda entry: entry[0]):
+        metric = f"{prefix}_{name}_seconds"
+        declare(metric, 'histogram')
+        cumulative = 0
+        for bound, count in zip(BUCKET_BOUNDS, state['counts']):
+            cumulative += count
+            lines.append(f"{format_name(metric + '_bucket', {**labels, 'le': f'{bound:.6g}'})} {cumulative}")
+        lines.append(f"{format_name(metric + '_bucket', {**labels, 'le': '+Inf'})} {state['count']}")
+        lines.append(f"{format_name(metric + '_sum', labels)} {state['sum']:.6f}")
+        lines.append(f"{format_name(metric + '_count', labels)} {state['count']}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """HTTP-сервер последнего снимка метрик: /metrics (Prometheus) и /metrics.json"""
+
+    def __init__(self, port, host='127.0.0.1'):
+        self.snapshot = ScanMetrics().snapshot()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body, content_type = render_prometheus(server.snapshot), 'text/plain; version=0.0.4'
+                elif self.path == '/metrics.json':
+                    body, content_type = json.dumps(summarize(server.snapshot), ensure_ascii=False), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', f"{content_type}; charset=utf-8")
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass  # Запросы не попадают в вывод консольного режима
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def update(self, snapshot):
+        self.snapshot = snapshot
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
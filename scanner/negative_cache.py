@@ -0,0 +1,131 @@
+"""Постоянный кэш отрицательных результатов проверки.
+
+Домены, которые не существуют (NXDOMAIN), не имеют A-записи или ответили
+по HTTP/HTTPS ошибкой, запоминаются в SQLite вместе со временем проверки.
+Пока запись не устарела (TTL), повторные запуски пропускают такие домены
+без запросов DNS и HTTP. Домены, которые не ответили вовсе (таймаут, сброс
+соединения, закрытые порты), могли быть недоступны временно: такие записи
+действуют только unreachable_ttl_hours. Размер кэша ограничен: при
+переполнении удаляются самые старые записи.
+
+Запросы SQLite выполняются в отдельном потоке кэша (run_in_cache), чтобы
+не задерживать цикл событий.
+"""
+
+import asyncio, concurrent.futures, sqlite3, threading, time
+
+# Классы отрицательного результата
+NEGATIVE_NXDOMAIN = 1  # Домен не существует
+NEGATIVE_NODATA = 2    # Домен есть, но без A-записи
+NEGATIVE_DEAD = 3      # DNS есть, сайт ответил ошибкой
+NEGATIVE_UNREACHABLE = 4  # DNS есть, сайт не ответил (возможно, временно)
+
+
+class NegativeCache:
+    """Кэш отрицательных результатов в файле SQLite.
+
+    Поиск и запись выполняются пачками: lookup_many() проверяет сразу
+    несколько доменов, add() копит записи в памяти до flush(). lookup_many(),
+    flush() и close() обращаются к SQLite - в асинхронном коде их следует
+    вызывать через run_in_cache().
+    """
+
+    # Ограничение SQLite на число параметров в одном запросе
+    chunk_size = 500
+
+    def __init__(self, path, ttl_hours=24, max_entries=5_000_000, flush_size=1000, unreachable_ttl_hours=1):
+        self.path = path
+        self.ttl = ttl_hours * 3600
+        self.unreachable_ttl = min(self.ttl, unreachable_ttl_hours * 3600)
+        self.max_entries = max_entries
+        self.flush_size = flush_size
+        self.pending = []
+        self.lock = threading.Lock()  # add() и flush() идут в разных потоках
+        self.hits, self.lookups = 0, 0
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        # WAL позволяет нескольким процессам читать кэш во время записи
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS negative ("
+            "domain TEXT PRIMARY KEY, result INTEGER NOT NULL, checked_at INTEGER NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS negative_checked_at ON negative (checked_at)")
+        self.db.commit()
+        # Оценка числа записей сверху (повторные записи считаются дважды)
+        self.count = self.db.execute("SELECT COUNT(*) FROM negative").fetchone()[0]
+
+    async def run_in_cache(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def lookup_many(self, domains):
+        """Домены из списка, для которых есть свежая отрицательная запись"""
+        if not domains:
+            return set()
+        now = int(time.time())
+        found = set()
+        for i in range(0, len(domains), self.chunk_size):
+            chunk = domains[i:i + self.chunk_size]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.db.execute(
+                f"SELECT domain FROM negative WHERE domain IN ({placeholders}) "
+                "AND checked_at >= CASE result WHEN ? THEN ? ELSE ? END",
+                (*chunk, NEGATIVE_UNREACHABLE, now - self.unreachable_ttl, now - self.ttl)
+            )
+            found.update(row[0] for row in rows)
+        self.lookups += len(domains)
+        self.hits += len(found)
+        return found
+
+    def add(self, domain, result):
+        """Запомнить отрицательный результат (запишется при flush); True - пора вызвать flush"""
+        with self.lock:
+            self.pending.append((domain, result, int(time.time())))
+            return len(self.pending) >= self.flush_size
+
+    def flush(self):
+        """Запись накопленных результатов и удаление лишних записей"""
+        with self.lock:
+            pending, self.pending = self.pending, []
+        if pending:
+            try:
+                self.db.executemany("INSERT OR REPLACE INTO negative VALUES (?, ?, ?)", pending)
+            except Exception:
+                with self.lock:
+                    self.pending[:0] = pending
+                raise
+            self.count += len(pending)
+        self.evict()
+        self.db.commit()
+
+    def evict(self):
+        """Удаление устаревших записей и самых старых сверх max_entries"""
+        threshold = int(time.time()) - self.ttl
+        self.count -= self.db.execute("DELETE FROM negative WHERE checked_at < ?", (threshold,)).rowcount
+        if self.count <= self.max_entries:
+            return
+        count = self.db.execute("SELECT COUNT(*) FROM negative").fetchone()[0]
+        self.count = count
+        if count > self.max_entries:
+            # Удаляем с запасом 10%, чтобы не чистить кэш при каждой записи
+            excess = count - int(self.max_entries * 0.9)
+            self.db.execute(
+                "DELETE FROM negative WHERE domain IN "
+                "(SELECT domain FROM negative ORDER BY checked_at LIMIT ?)",
+                (excess,)
+            )
+            self.count -= excess
+
+    def hit_rate(self):
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.db.close()
+            # wait=False: close() может выполняться в самом потоке кэша
+            self.executor.shutdown(wait=False)
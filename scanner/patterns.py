@@ -0,0 +1,271 @@
+"""Пространства доменов по шаблонам: маски, наборы символов и словари.
+
+Шаблон описывает имя слева направо, каждая позиция - список вариантов:
+
+    ?l - буква, ?d - цифра, ?a - буква или цифра, ?h - буква, цифра или дефис,
+    ?v - гласная, ?c - согласная
+    [a-f0-9] - символ из набора (диапазоны через дефис)
+    {words} - слово из словаря words (см. wordlists)
+    {shop|store|} - один из вариантов; пустой вариант - без этой части
+    остальное (буквы, цифры, дефис, точка) - как есть
+
+Например, ?c?v?c - имена вида согласная-гласная-согласная, а
+{prefix}{words}?d - слово из словаря с приставкой и цифрой в конце.
+Размер шаблона - произведение числа вариантов позиций, а имя по индексу
+вычисляется как число в смешанной системе счисления, поэтому пространство
+любого размера не строится в памяти и делится между процессами и узлами
+так же, как полный перебор по длине.
+
+Дефис не ставится в начало и конец метки: в наборах символов, которые
+могут оказаться на краю метки (в том числе когда соседняя часть пустая),
+его нет, а варианты и текст, которые начинают или заканчивают метку
+дефисом, отбрасываются (если не остается ни одного - шаблон отклоняется).
+Если части соседних позиций можно склеить по-разному
+(например, {a|ab}{b|}), одно имя встретится в пространстве несколько раз.
+"""
+
+import bisect, math, re, string, sys
+
+from .space import DomainSpace
+
+CHARSETS = {
+    'l': string.ascii_lowercase,
+    'd': string.digits,
+    'a': string.ascii_lowercase + string.digits,
+    'h': string.ascii_lowercase + string.digits + '-',
+    'v': 'aeiou',
+    'c': 'bcdfghjklmnpqrstvwxyz',
+}
+LABEL_CHARS = frozenset(string.ascii_lowercase + string.digits + '-')
+MAX_LABEL = 63
+MAX_NAME = 253
+WORD_RE = re.compile(r'^[a-z0-9]([a-z0-9-]*[a-z0-9])?$')
+
+
+def split_patterns(value):
+    """'?l?l?d; {words}' -> ['?l?l?d', '{words}']"""
+    return [pattern.strip() for pattern in value.split(';') if pattern.strip()]
+
+
+def parse_wordlists(value):
+    """'words=words.txt;prefix=p.txt' -> {'words': 'words.txt', 'prefix': 'p.txt'}"""
+    wordlists = {}
+    for item in value.split(';'):
+        if not item.strip():
+            continue
+        name, sep, path = item.partition('=')
+        if not sep or not name.strip() or not path.strip():
+            raise ValueError(f"Словарь задается как имя=файл: {item.strip()}")
+        wordlists[name.strip().lower()] = path.strip()
+    return wordlists
+
+
+def load_wordlist(path):
+    """Слова из файла: строчные, без повторов, только допустимые в метке домена"""
+    words = {}
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            word = line.strip().lower()
+            if WORD_RE.match(word):
+                words[word] = None
+    if not words:
+        raise ValueError(f"В словаре {path} нет подходящих слов")
+    return list(words)
+
+
+def load_wordlists(value):
+    return {name: load_wordlist(path) for name, path in parse_wordlists(value).items()}
+
+
+def parse_class(text, pattern):
+    """'a-f0-9' -> 'abcdef0123456789'"""
+    chars = []
+    i = 0
+    while i < len(text):
+        if i + 2 < len(text) and text[i + 1] == '-':
+            first, last = text[i], text[i + 2]
+            if first > last:
+                raise ValueError(f"Шаблон {pattern}: неверный диапазон {first}-{last}")
+            chars.extend(chr(code) for code in range(ord(first), ord(last) + 1))
+            i += 3
+        else:
+            chars.append(text[i])
+            i += 1
+    chars = ''.join(dict.fromkeys(chars))
+    if not chars or not set(chars) <= LABEL_CHARS:
+        raise ValueError(f"Шаблон {pattern}: недопустимый набор [{text}]")
+    return chars
+
+
+class Pattern:
+    """Скомпилированный шаблон: позиции (кортежи вариантов) и число имен"""
+
+    def __init__(self, text, wordlists=None):
+        self.text = text
+        self.slots = self.parse(text.lower(), wordlists or {})
+        self.size = math.prod(len(options) for options in self.slots)
+        self.check_lengths()
+
+    def parse(self, text, wordlists):
+        # Набор символов помечается, чтобы убрать дефис на краях меток
+        slots = []  # (варианты, набор ли это символов)
+        literal = []
+        i = 0
+        while i < len(text):
+            c = text[i]
+            if c in '?[{':
+                if literal:
+                    slots.append(((''.join(literal),), False))
+                    literal = []
+            if c == '?':
+                key = text[i + 1:i + 2]
+                if key not in CHARSETS:
+                    raise ValueError(f"Шаблон {self.text}: неизвестный набор ?{key}")
+                slots.append((CHARSETS[key], True))
+                i += 2
+            elif c == '[':
+                end = text.find(']', i)
+                if end < 0:
+                    raise ValueError(f"Шаблон {self.text}: нет закрывающей ]")
+                slots.append((parse_class(text[i + 1:end], self.text), True))
+                i = end + 1
+            elif c == '{':
+                end = text.find('}', i)
+                if end < 0:
+                    raise ValueError(f"Шаблон {self.text}: нет закрывающей }}")
+                slots.append((self.parse_words(text[i + 1:end], wordlists), False))
+                i = end + 1
+            elif c in LABEL_CHARS or c == '.':
+                literal.append(c)
+                i += 1
+            else:
+                raise ValueError(f"Шаблон {self.text}: недопустимый символ {c!r}")
+        if literal:
+            slots.append(((''.join(literal),), False))
+        if not slots:
+            raise ValueError("Пустой шаблон")
+        if text.startswith('.') or text.endswith('.') or '..' in text:
+            raise ValueError(f"Шаблон {self.text}: пустая метка")
+
+        # Может ли позиция начинать (заканчивать) метку: край имени, точка
+        # в соседнем тексте или пустой вариант соседа, который сам на краю
+        starts, edge = [], True
+        for options, _ in slots:
+            starts.append(edge)
+            edge = any(option.endswith('.') or (not option and edge) for option in options)
+        ends, edge = [], True
+        for options, _ in reversed(slots):
+            ends.append(edge)
+            edge = any(option.startswith('.') or (not option and edge) for option in options)
+        ends.reverse()
+
+        result = []
+        for index, (options, charset) in enumerate(slots):
+            if charset:
+                if starts[index] or ends[index]:
+                    options = options.replace('-', '')
+                if not options:
+                    raise ValueError(f"Шаблон {self.text}: пустой набор символов")
+                options = tuple(options)
+            else:
+                options = tuple(option for option in options if not self.hyphen_at_edge(
+                    option, starts[index], ends[index]))
+                if not options:
+                    raise ValueError(f"Шаблон {self.text}: дефис на краю метки")
+            result.append(options)
+        return result
+
+    @staticmethod
+    def hyphen_at_edge(option, starts, ends):
+        """Текст ставит дефис в начало или конец метки"""
+        return ('-.' in option or '.-' in option or (starts and option.startswith('-'))
+                or (ends and option.endswith('-')))
+
+    def parse_words(self, text, wordlists):
+        if '|' in text:
+            words = [word.strip() for word in text.split('|')]
+            for word in words:
+                if word and not set(word) <= LABEL_CHARS:
+                    raise ValueError(f"Шаблон {self.text}: недопустимый вариант {word!r}")
+            return tuple(dict.fromkeys(words))
+        if text not in wordlists:
+            raise ValueError(f"Шаблон {self.text}: не задан словарь {text}")
+        return tuple(wordlists[text])
+
+    def check_lengths(self):
+        """Длина меток и имени не больше допустимой в DNS; имя не пустое"""
+        label, name, shortest = 0, 0, 0
+        for options in self.slots:
+            longest = max(map(len, options))
+            name += longest
+            shortest += min(map(len, options))
+            if len(options) == 1 and '.' in options[0]:
+                # Текст с точкой закрывает текущую метку и начинает новую
+                parts = options[0].split('.')
+                labels = [label + len(parts[0]), *map(len, parts[1:-1])]
+                label = len(parts[-1])
+            else:
+                label += longest
+                labels = [label]
+            if max(labels) > MAX_LABEL:
+                raise ValueError(f"Шаблон {self.text}: метка длиннее {MAX_LABEL} символов")
+        if name > MAX_NAME:
+            raise ValueError(f"Шаблон {self.text}: имя длиннее {MAX_NAME} символов")
+        if not shortest:
+            raise ValueError(f"Шаблон {self.text}: имя может быть пустым")
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        parts = []
+        for options in reversed(self.slots):
+            index, digit = divmod(index, len(options))
+            parts.append(options[digit])
+        return ''.join(reversed(parts))
+
+
+class PatternSpace:
+    """Домены вида <имя по шаблону><зона> для нескольких шаблонов и зон.
+
+    Интерфейс как у DomainSpace: len() и домен по индексу. Домены
+    пронумерованы по шаблонам в порядке перечисления, внутри шаблона - по
+    имени, затем по зоне.
+    """
+
+    def __init__(self, patterns, tlds, wordlists=None):
+        self.tlds = list(tlds)
+        if not self.tlds:
+            raise ValueError("Список доменных зон пуст")
+        self.patterns = [Pattern(text, wordlists) for text in patterns]
+        if not self.patterns:
+            raise ValueError("Не задано ни одного шаблона")
+        # Начало блока индексов каждого шаблона
+        self.offsets = []
+        offset = 0
+        for pattern in self.patterns:
+            self.offsets.append(offset)
+            offset += pattern.size * len(self.tlds)
+        self.total = offset
+        if self.total > sys.maxsize:
+            raise ValueError(f"Пространство слишком велико: {self.total:.3e} доменов")
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.total
+        if not 0 <= index < self.total:
+            raise IndexError("Индекс вне пространства доменов")
+        block = bisect.bisect_right(self.offsets, index) - 1
+        name_index, tld_index = divmod(index - self.offsets[block], len(self.tlds))
+        return self.patterns[block][name_index] + self.tlds[tld_index]
+
+
+def create_space(settings, chars, min_length, max_length, tlds):
+    """Пространство проверки: шаблоны patterns из настроек или все имена длины min-max"""
+    patterns = split_patterns(settings.get('patterns', ''))
+    if patterns:
+        return PatternSpace(patterns, tlds, load_wordlists(settings.get('wordlists', '')))
+    return DomainSpace(chars, min_length, max_length, tlds)
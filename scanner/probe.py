@@ -0,0 +1,180 @@
+"""Проверка доступности сайта по HTTPS и HTTP.
+
+Один общий SSL-контекст на процесс: создание контекста загружает хранилище
+сертификатов и стоит дорого. К системным сертификатам можно добавить свои
+(ca_file), порты HTTP и HTTPS настраиваются. Способ запроса настраивается: HEAD (при 405/501
+повторяется как GET) или GET с чтением не больше probe_bytes байт тела.
+Таймауты соединения и чтения раздельные, число перенаправлений ограничено.
+HTTPS и HTTP проверяются по очереди (HTTP - если HTTPS не соединился) или
+одновременно, с первым успешным ответом. При включенном запоминании ответов
+по адресам (ip_memo_size, см. ipmemo) и проверке GET к результату с телом
+ответа добавляется отпечаток: без тела одинаково отвечают и обычные сайты
+одного хостинга.
+"""
+
+import asyncio, functools, ssl, time
+
+import aiohttp
+
+from .ipmemo import response_fingerprint
+
+PROBE_METHODS = ('head', 'get')
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+# Ответы на HEAD, после которых повторяем запрос как GET
+HEAD_FALLBACK_STATUSES = (405, 501)
+# Таймаут установления соединения (в старых версиях aiohttp отдельного класса нет)
+CONNECT_TIMEOUT_ERRORS = tuple(filter(None, [getattr(aiohttp, 'ConnectionTimeoutError', None)]))
+
+
+@functools.lru_cache(maxsize=None)
+def shared_ssl_context(ca_file=''):
+    """SSL-контекст с проверкой сертификатов, общий для всех запросов процесса"""
+    context = ssl.create_default_context()
+    if ca_file:
+        context.load_verify_locations(ca_file)
+    return context
+
+
+class ProbeFailed(Exception):
+    """Сайт не ответил; connect - не удалось соединиться (имеет смысл попробовать HTTP)"""
+
+    def __init__(self, message, connect=False):
+        super().__init__(message)
+        self.connect = connect
+
+
+class Prober:
+    """Проверка сайта по настройкам probe_method, probe_bytes, max_redirects,
+    connect_timeout, read_timeout, probe_parallel, http_port, https_port, ca_file
+    и ip_memo_size"""
+
+    def __init__(self, settings, metrics=None):
+        self.metrics = metrics
+        self.method = settings['probe_method']
+        if self.method not in PROBE_METHODS:
+            raise ValueError(f"Неизвестный способ проверки: {self.method}")
+        self.probe_bytes = settings['probe_bytes']
+        self.max_redirects = settings['max_redirects']
+        self.parallel = settings['probe_parallel']
+        connect, read = settings['connect_timeout'], settings['read_timeout']
+        self.timeout = aiohttp.ClientTimeout(
+            total=(connect + read) * (1 + self.max_redirects),
+            sock_connect=connect,
+            sock_read=read
+        )
+        self.ports = {'http': settings['http_port'], 'https': settings['https_port']}
+        self.ssl_context = shared_ssl_context(settings['ca_file'])
+        # Отпечатки нужны запоминанию ответов и имеют смысл только с телом ответа
+        self.fingerprints = settings['ip_memo_size'] > 0 and self.method == 'get' and self.probe_bytes > 0
+
+    async def request(self, session, method, url, domain):
+        """Один запрос: статус ответа и отпечаток (None, если не нужен)"""
+        async with session.request(
+            method, url,
+            timeout=self.timeout,
+            allow_redirects=self.max_redirects > 0,
+            max_redirects=max(1, self.max_redirects)
+        ) as r:
+            body = b''
+            if method == 'GET' and self.probe_bytes > 0:
+                body = await r.content.read(self.probe_bytes)
+            fingerprint = None
+            if self.fingerprints and body:
+                fingerprint = response_fingerprint(domain, r.status, r.url, r.headers, body)
+            return r.status, fingerprint
+
+    async def fetch(self, session, scheme, domain):
+        """(статус, отпечаток) ответа по схеме или ProbeFailed"""
+        port = self.ports[scheme]
+        url = f"{scheme}://{domain}" if port == DEFAULT_PORTS[scheme] else f"{scheme}://{domain}:{port}"
+        label = scheme.upper()
+        try:
+            if self.method == 'head':
+                response = await self.request(session, 'HEAD', url, domain)
+                if response[0] not in HEAD_FALLBACK_STATUSES:
+                    return response
+            return await self.request(session, 'GET', url, domain)
+        except aiohttp.ClientConnectorError as e:
+            raise ProbeFailed(f"{label} ошибка соединения для {domain}: {str(e)}", connect=True)
+        except CONNECT_TIMEOUT_ERRORS:
+            raise ProbeFailed(f"Таймаут соединения {label}: {domain}", connect=True)
+        except aiohttp.TooManyRedirects:
+            raise ProbeFailed(f"{label}: слишком много перенаправлений для {domain}")
+        except asyncio.TimeoutError:
+            raise ProbeFailed(f"Таймаут {label}: {domain}")
+        except (aiohttp.ClientError, OSError, ValueError) as e:
+            raise ProbeFailed(f"{label} ошибка для {domain}: {str(e)}")
+
+    async def probe_scheme(self, session, scheme, domain, started):
+        """(доступен ли, строка лога, статус/схема/задержка) для одной схемы"""
+        scheme_started = time.monotonic()
+        try:
+            status, fingerprint = await self.fetch(session, scheme, domain)
+        except ProbeFailed as e:
+            self.record(scheme, scheme_started, 'connect_failed' if e.connect else 'failed')
+            raise
+        self.record(scheme, scheme_started, 'ok' if 200 <= status < 400 else 'bad_status')
+        result = {'status': status, 'scheme': scheme, 'latency': time.monotonic() - started}
+        if fingerprint is not None:
+            result['fingerprint'] = fingerprint
+        label = scheme.upper()
+        if 200 <= status < 400:
+            return True, f"{label} доступен: {domain} (статус: {status})", result
+        return False, f"{label} недоступен: {domain} (статус: {status})", result
+
+    def record(self, scheme, started, result):
+        """Метрики запроса по одной схеме: задержка и исход"""
+        if self.metrics is not None:
+            self.metrics.observe('probe', time.monotonic() - started, scheme=scheme)
+            self.metrics.inc('probes', scheme=scheme, result=result)
+
+    async def probe(self, session, domain, schemes=None):
+        """Проверка сайта: (доступен ли, строка лога, статус/схема/задержка или None).
+
+        schemes - схемы с открытым портом (см. connect), None - неизвестно.
+        """
+        started = time.monotonic()
+        if schemes is not None and len(schemes) == 1:
+            # Открыт только один порт: вторую схему проверять бесполезно
+            try:
+                return await self.probe_scheme(session, next(iter(schemes)), domain, started)
+            except ProbeFailed as e:
+                return False, str(e), None
+        if self.parallel:
+            return await self.probe_parallel(session, domain, started)
+        try:
+            return await self.probe_scheme(session, 'https', domain, started)
+        except ProbeFailed as e:
+            if not e.connect:
+                return False, str(e), None
+        try:
+            return await self.probe_scheme(session, 'http', domain, started)
+        except ProbeFailed as e:
+            return False, str(e), None
+
+    async def probe_parallel(self, session, domain, started):
+        """HTTPS и HTTP одновременно: первый успешный ответ, иначе лучший из неудачных"""
+        tasks = [asyncio.ensure_future(self.probe_scheme(session, scheme, domain, started))
+                 for scheme in ('https', 'http')]
+        outcomes = {}
+        try:
+            pending = tasks
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        outcome = task.result()
+                    except ProbeFailed as e:
+                        outcome = False, str(e), None
+                    if outcome[0]:
+                        return outcome
+                    outcomes[task] = outcome
+            # Ответ с кодом ошибки важнее отсутствия ответа, HTTPS важнее HTTP
+            answered = [outcomes[task] for task in tasks if outcomes[task][2] is not None]
+            return answered[0] if answered else outcomes[tasks[0]]
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # Результат второй схемы уже не нужен
@@ -0,0 +1,64 @@
+"""Профилирование проверки для поиска узких мест.
+
+cProfile входит в стандартную библиотеку и учитывает время процессора в
+потоке движка. yappi (если установлен) измеряет реальное время и умеет
+разделять время сопрограмм, что для асинхронного движка точнее. Профиль
+сохраняется в формате pstats: его можно открыть через python -m pstats
+или snakeviz.
+"""
+
+import io, pstats
+
+PROFILERS = ('cprofile', 'yappi')
+TOP_FUNCTIONS = 15  # Строк сводки в логе
+
+
+def top_functions(stats):
+    """Самые затратные функции по накопленному времени (текст)"""
+    output = io.StringIO()
+    stats.stream = output
+    stats.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+    return output.getvalue()
+
+
+class CProfiler:
+    def __init__(self):
+        import cProfile
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self, path):
+        self.profile.disable()
+        self.profile.dump_stats(path)
+        return top_functions(pstats.Stats(self.profile))
+
+
+class YappiProfiler:
+    def __init__(self):
+        try:
+            import yappi
+        except ImportError:
+            raise ValueError("yappi не установлен (pip install yappi)")
+        self.yappi = yappi
+
+    def start(self):
+        self.yappi.clear_stats()
+        self.yappi.set_clock_type('wall')
+        self.yappi.start()
+
+    def stop(self, path):
+        self.yappi.stop()
+        self.yappi.get_func_stats().save(path, type='pstat')
+        self.yappi.clear_stats()
+        return top_functions(pstats.Stats(path))
+
+
+def create_profiler(kind):
+    """Профилировщик по имени из PROFILERS; ValueError, если он недоступен"""
+    if kind == 'cprofile':
+        return CProfiler()
+    if kind == 'yappi':
+        return YappiProfiler()
+    raise ValueError(f"Неизвестный профилировщик: {kind}")
@@ -0,0 +1,51 @@
+"""Ограничение частоты запросов корзинами токенов.
+
+Корзина пополняется со скоростью rate токенов в секунду и вмещает не
+больше burst токенов; каждый запрос забирает один токен. Так ограничивается
+суммарная частота запросов всех обработчиков, а не каждого по отдельности.
+"""
+
+import asyncio, time
+
+
+class TokenBucket:
+    """Корзина токенов; rate = 0 - без ограничения"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = max(1.0, burst if burst else rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def fullness(self):
+        """Доля оставшегося запаса (0..1)"""
+        if not self.rate:
+            return 1.0
+        self.refill()
+        return self.tokens / self.burst
+
+    def wait_time(self):
+        """Сколько ждать до появления токена"""
+        if not self.rate:
+            return 0.0
+        self.refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def try_take(self):
+        if not self.rate:
+            return True
+        self.refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    async def take(self):
+        """Ожидание и получение токена"""
+        while not self.try_take():
+            await asyncio.sleep(self.wait_time())
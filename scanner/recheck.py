@@ -0,0 +1,256 @@
+"""Повторная проверка списка сайтов: какие из них еще работают.
+
+Домены читаются потоком из текстовых файлов или файлов JSON Lines (например,
+прошлых файлов результатов) и проходят тот же конвейер DNS -> HTTP, что и
+при переборе. Работающие сайты записываются в recheck_alive_file, а в
+recheck_dead_file с причиной - только точно неработающие: домена нет
+(NXDOMAIN), у него нет A-записи (NODATA) или сайт ответил ошибкой ('HTTP' и
+статус ответа). Сбой, который мог быть временным (таймаут или SERVFAIL DNS,
+сайт не ответил, порты закрыты), сайт из списка не исключает: такие домены
+записываются отдельно, в recheck_unsure_file, тоже с причиной.
+
+Файлы рассматриваются как один поток байт, а позиция домена - смещение
+начала его строки. Поэтому в памяти только домены в работе, а состояние для
+продолжения устроено так же, как у перебора: позиция чтения и позиции
+незавершенных доменов.
+"""
+
+import bisect, itertools, os
+
+from .engine import ScanEngine, DEFAULT_SETTINGS, LOG_ERROR
+from .checkpoint import load_checkpoint
+from .dedupe import line_key, UNIQUE_EXTENSIONS
+from .sinks import BufferedResultWriter, make_record
+
+READ_CHUNK = 1024 * 1024
+# Результаты DNS, после которых сайт точно не работает
+DEAD_DNS_RESULTS = ('NXDOMAIN', 'NODATA')
+
+
+def parse_domain(line):
+    """Домен из строки файла (текст или JSON Lines); None для пустых строк и комментариев"""
+    key = line_key(line)
+    if not key or key.startswith(b'#'):
+        return None
+    return key.decode('utf-8', 'replace')
+
+
+class DomainFiles:
+    """Домены из строк файлов; интерфейс как у DomainEnumerator.
+
+    sizes - размеры файлов при первом запуске: при продолжении дописанное в
+    файлы после него не читается, и позиции остаются прежними.
+    """
+
+    def __init__(self, paths, sizes=None):
+        for path in paths:
+            if os.path.splitext(path)[1].lower() in UNIQUE_EXTENSIONS:
+                raise ValueError(f"Файл {path}: перепроверяются только текстовые файлы и JSON Lines")
+        self.paths = list(paths)
+        self.sizes = list(sizes) if sizes else [os.path.getsize(path) for path in self.paths]
+        # Начало каждого файла в общем потоке байт
+        self.offsets = [0, *itertools.accumulate(self.sizes)]
+        self.start, self.stop = 0, self.offsets[-1]
+        self.file = None
+        self.file_index = 0
+        self.seek(0)
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def file_at(self, position):
+        return min(bisect.bisect_right(self.offsets, position) - 1, len(self.paths))
+
+    def open_file(self, index, offset=0):
+        if self.file:
+            self.file.close()
+        self.file, self.file_index = None, index
+        if index < len(self.paths):
+            self.file = open(self.paths[index], 'rb')
+            self.file.seek(offset)
+
+    def seek(self, position):
+        """Переход к строке, начинающейся с этой позиции"""
+        if not self.start <= position <= self.stop:
+            raise IndexError("Позиция вне файлов")
+        index = self.file_at(position)
+        self.open_file(index, position - self.offsets[index] if index < len(self.paths) else 0)
+        self.position = position
+
+    def take(self, count):
+        """До count доменов: ([(позиция, домен)], число прочитанных строк)"""
+        entries, lines = [], 0
+        while len(entries) < count and self.file is not None:
+            end = self.offsets[self.file_index + 1]
+            line = self.file.readline() if self.position < end else b''
+            if not line:
+                self.open_file(self.file_index + 1)
+                self.position = end
+                continue
+            position = self.position
+            self.position += len(line)
+            lines += 1
+            domain = parse_domain(line)
+            if domain:
+                entries.append((position, domain))
+        return entries, lines
+
+    def domain_at(self, position):
+        index = self.file_at(position)
+        with open(self.paths[index], 'rb') as f:
+            f.seek(position - self.offsets[index])
+            return parse_domain(f.readline())
+
+    @property
+    def remaining(self):
+        return max(0, self.stop - self.position)
+
+    def count_lines(self):
+        """Число строк во всех файлах (чтение блоками, без загрузки целиком)"""
+        total = 0
+        for path, size in zip(self.paths, self.sizes):
+            last = b'\n'
+            with open(path, 'rb') as f:
+                while size > 0:
+                    chunk = f.read(min(READ_CHUNK, size))
+                    if not chunk:
+                        break
+                    total += chunk.count(b'\n')
+                    size -= len(chunk)
+                    last = chunk[-1:]
+            if last != b'\n':
+                total += 1  # Последняя строка без перевода строки
+        return total
+
+    def close(self):
+        self.open_file(len(self.paths))
+
+
+class RecheckEngine(ScanEngine):
+    """Повторная проверка доменов из файлов paths.
+
+    Кэш отрицательных результатов, индексы зон и фильтр проверенных доменов
+    не используются: каждый домен проверяется заново. Проверка идет в одном
+    процессе; resume - сохраненное состояние (см. resume_recheck).
+    """
+
+    def __init__(self, paths, settings=None, events=None, resume=None, sizes=None):
+        settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.paths = [os.path.abspath(path) for path in paths]
+        if not self.paths:
+            raise ValueError("Не указаны файлы для перепроверки")
+        for path in (settings['recheck_alive_file'], settings['recheck_dead_file'], settings['recheck_unsure_file']):
+            if os.path.abspath(path) in self.paths:
+                raise ValueError(f"Файл {path} нельзя одновременно перепроверять и записывать")
+        self.sizes = sizes
+        self.dead_file = settings['recheck_dead_file']
+        self.unsure_file = settings['recheck_unsure_file']
+        self.dead_writer, self.unsure_writer = None, None
+        self.dead_count = resume.get('dead', 0) if resume else 0
+        self.unsure_count = resume.get('unsure', 0) if resume else 0
+        settings.update(
+            output_file=settings['recheck_alive_file'],
+            checkpoint_file=settings['recheck_checkpoint_file'],
+            negative_cache_file='',
+            zone_indexes='',
+            seen_filter_file=''
+        )
+        super().__init__(None, None, settings, events=events, resume=resume)
+
+    def create_domains(self, start, stop):
+        self.seed = None
+        return DomainFiles(self.paths, self.sizes)
+
+    def calculate_total(self):
+        return 0  # Строки считаются при запуске: большие файлы читаются долго
+
+    def generate_domains_batch(self, batch_size):
+        domains = []
+        while not domains and self.domains.remaining:
+            entries, lines = self.domains.take(batch_size)
+            for position, domain in entries:
+                if domain not in self.in_flight:
+                    self.in_flight[domain] = position
+                    domains.append(domain)
+            # Пустые строки и повтор домена, который еще проверяется, учитываются сразу
+            self.checked_count += lines - len(domains)
+        return domains
+
+    async def domain_dead(self, domain, reason, result=None):
+        record = {**make_record(domain, **(result or {})), 'reason': reason}
+        # Ответ по HTTP (result) - сайт ответил ошибкой; без него сайт не ответил вовсе
+        if reason in DEAD_DNS_RESULTS or (reason == 'HTTP' and result):
+            await self.dead_writer.add(record)
+            self.dead_count += 1
+        else:
+            await self.unsure_writer.add(record)
+            self.unsure_count += 1
+        self.domain_done(domain)
+
+    def create_writer(self, path):
+        return BufferedResultWriter(
+            path,
+            sink_format=self.settings['output_format'],
+            max_records=self.settings['write_buffer'],
+            max_delay=self.settings['write_interval'] / 1000.0
+        )
+
+    async def open_results(self):
+        await super().open_results()
+        self.dead_writer = self.create_writer(self.dead_file)
+        await self.dead_writer.open()
+        self.unsure_writer = self.create_writer(self.unsure_file)
+        await self.unsure_writer.open()
+
+    async def sync_results(self):
+        await super().sync_results()
+        await self.dead_writer.sync()
+        await self.unsure_writer.sync()
+
+    async def close_results(self):
+        try:
+            await super().close_results()
+        finally:
+            try:
+                if self.dead_writer:
+                    await self.dead_writer.close()
+            finally:
+                if self.unsure_writer:
+                    await self.unsure_writer.close()
+
+    def checkpoint_header(self):
+        return {'mode': 'recheck', 'files': self.paths, 'sizes': self.domains.sizes}
+
+    def checkpoint_state(self):
+        return {**super().checkpoint_state(), 'dead': self.dead_count, 'unsure': self.unsure_count}
+
+    def get_stats(self):
+        return {**super().get_stats(), 'dead': self.dead_count, 'unsure': self.unsure_count}
+
+    async def run_async(self):
+        try:
+            self.total_domains = self.domains.count_lines()
+        except OSError as e:
+            self.events.on_log(f"Ошибка чтения файлов: {str(e)}", LOG_ERROR)
+            return
+        self.events.on_log(f"Перепроверка: {self.total_domains} строк в файлах: {len(self.paths)}")
+        try:
+            await super().run_async()
+        finally:
+            self.domains.close()
+
+
+def resume_recheck(settings=None, events=None):
+    """Движок, продолжающий перепроверку из файла recheck_checkpoint_file.
+
+    Файлы берутся из состояния; OSError или ValueError, если состояние
+    отсутствует, повреждено или файлы с тех пор стали короче.
+    """
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    state = load_checkpoint(settings['recheck_checkpoint_file'])
+    if state.get('mode') != 'recheck':
+        raise ValueError("Файл состояния не относится к перепроверке")
+    for path, size in zip(state['files'], state['sizes']):
+        if os.path.getsize(path) < size:
+            raise ValueError(f"Файл {path} изменился после прошлой перепроверки")
+    return RecheckEngine(state['files'], settings, events=events, resume=state['shards'][0], sizes=state['sizes'])
@@ -0,0 +1,278 @@
+"""Пул DNS-серверов с учетом их состояния.
+
+У каждого сервера свой резолвер, корзина токенов (предел частоты) и
+статистика: скользящие средние задержки и доли ошибок, недавние задержки
+для 95-го перцентиля. Запрос уходит на самый быстрый исправный сервер, у
+которого есть запас токенов. Если ответ задерживается дольше обычного
+(p95 сервера), тот же запрос дублируется на другой сервер и берется первый
+ответ; при отказе сервера запрос сразу повторяется на другом. Сервер,
+который отказывает раз за разом, временно исключается из пула.
+
+ScanResultResolver передает адреса, полученные на этапе DNS, соединениям
+HTTP, чтобы домен не разрешался второй раз.
+"""
+
+import asyncio, collections, random, socket, time
+
+import aiodns
+from aiohttp.abc import AbstractResolver
+
+# Коды c-ares, которые являются ответом сервера, а не отказом
+DNS_ANSWER_ERRORS = (1, 4)  # NODATA, NXDOMAIN
+
+EWMA_ALPHA = 0.1
+LATENCY_WINDOW = 200  # Задержек для расчета p95
+EJECT_AFTER_FAILURES = 5  # Отказов подряд до исключения
+EJECT_ERROR_RATE = 0.5  # Или при такой средней доле отказов
+EJECT_TIME = 5.0  # Первое исключение (с), затем вдвое дольше
+EJECT_TIME_MAX = 120.0
+EXPLORE_SHARE = 0.05  # Доля запросов на случайный сервер для обновления статистики
+HEDGE_SHARE = 0.1  # Дублируется не больше этой доли запросов
+HEDGE_DELAY_MIN = 0.02
+HEDGE_DELAY_DEFAULT = 0.5  # Пока статистики мало
+
+
+def parse_nameservers(value, default_rate):
+    """'8.8.8.8, 1.1.1.1=300' -> [('8.8.8.8', default_rate), ('1.1.1.1', 300.0)]"""
+    servers = []
+    for item in value.replace(';', ',').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        address, _, rate = item.partition('=')
+        try:
+            servers.append((address.strip(), float(rate) if rate else default_rate))
+        except ValueError:
+            raise ValueError(f"Некорректный предел запросов для {address}: {rate}")
+    if not servers:
+        raise ValueError("Не указаны DNS-серверы")
+    return servers
+
+
+def is_answer(error):
+    """Ошибка запроса - это ответ сервера (домена нет), а не отказ"""
+    return isinstance(error, aiodns.error.DNSError) and error.args and error.args[0] in DNS_ANSWER_ERRORS
+
+
+class Nameserver:
+    """DNS-сервер пула: резолвер, корзина токенов и статистика"""
+
+    def __init__(self, address, bucket, timeout):
+        self.address = address
+        self.resolver = aiodns.DNSResolver(nameservers=[address], timeout=timeout, tries=1)
+        self.bucket = bucket
+        self.queries = 0
+        self.latency = None  # Скользящая средняя задержки ответа
+        self.error_rate = 0.0  # Скользящая средняя доли отказов
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self.p95 = None
+        self.failures = 0  # Отказов подряд
+        self.successes = 0  # Ответов подряд
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+    def ejected(self, now):
+        return now < self.ejected_until
+
+    def score(self):
+        """Ожидаемая цена запроса: задержка с поправкой на отказы"""
+        return (self.latency or 0.0) * (1 + 4 * self.error_rate)
+
+    def hedge_delay(self):
+        return max(HEDGE_DELAY_MIN, self.p95) if self.p95 is not None else HEDGE_DELAY_DEFAULT
+
+    def record(self, latency, failed):
+        """Учет результата запроса; True, если сервер пора исключить"""
+        self.error_rate += EWMA_ALPHA * ((1.0 if failed else 0.0) - self.error_rate)
+        if failed:
+            self.failures += 1
+            self.successes = 0
+            return self.failures >= EJECT_AFTER_FAILURES or (
+                self.queries >= 20 and self.error_rate >= EJECT_ERROR_RATE)
+        self.failures = 0
+        self.successes += 1
+        if self.successes >= 100:
+            # Сервер снова стабилен: следующее исключение - снова короткое
+            self.ejections = 0
+        self.latency = latency if self.latency is None else self.latency + EWMA_ALPHA * (latency - self.latency)
+        self.latencies.append(latency)
+        if len(self.latencies) >= 20 and len(self.latencies) % 10 == 0:
+            ordered = sorted(self.latencies)
+            self.p95 = ordered[int(len(ordered) * 0.95) - 1]
+        return False
+
+    def eject(self, now):
+        """Временное исключение; каждое следующее вдвое дольше"""
+        duration = min(EJECT_TIME_MAX, EJECT_TIME * 2 ** self.ejections)
+        self.ejections += 1
+        self.ejected_until = now + duration
+        # После возвращения сервер начинает с чистой статистикой отказов
+        self.failures = 0
+        self.error_rate = 0.0
+        return duration
+
+
+class ResolverPool:
+    """Набор DNS-серверов с пределом частоты, учетом состояния и дублированием.
+
+    bucket_factory(rate) создает корзину токенов сервера, log(message)
+    получает сообщения об исключении серверов.
+    """
+
+    def __init__(self, nameservers, bucket_factory, timeout=2.0, log=None):
+        self.servers = [Nameserver(address, bucket_factory(rate), timeout) for address, rate in nameservers]
+        random.shuffle(self.servers)
+        self.log = log
+        self.queries = 0
+        self.hedged = 0
+        self.failovers = 0
+
+    @property
+    def nameservers(self):
+        return [server.address for server in self.servers]
+
+    def available(self, exclude=None):
+        """Исправные серверы; если исключены все - тот, что вернется раньше"""
+        now = time.monotonic()
+        servers = [server for server in self.servers if server is not exclude and not server.ejected(now)]
+        if not servers:
+            others = [server for server in self.servers if server is not exclude]
+            if others:
+                servers = [min(others, key=lambda server: server.ejected_until)]
+        return servers
+
+    def pick(self, exclude=None):
+        """Лучший сервер с запасом токенов (токен уже взят) или None"""
+        servers = self.available(exclude)
+        if servers and random.random() < EXPLORE_SHARE:
+            server = random.choice(servers)
+            if server.bucket.try_take():
+                return server
+        for server in sorted(servers, key=lambda server: (server.score(), server.queries)):
+            if server.bucket.try_take():
+                return server
+        return None
+
+    async def choose(self, exclude=None):
+        """Сервер для следующего запроса; ожидание токена, если запас исчерпан у всех"""
+        while True:
+            server = self.pick(exclude)
+            if server is not None:
+                server.queries += 1
+                return server
+            servers = self.available(exclude) or self.servers
+            await asyncio.sleep(min(server.bucket.wait_time() for server in servers))
+
+    async def query_server(self, server, name, query_type):
+        started = time.monotonic()
+        try:
+            result = await server.resolver.query(name, query_type)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.record(server, time.monotonic() - started, failed=not is_answer(e))
+            raise
+        self.record(server, time.monotonic() - started, failed=False)
+        return result
+
+    def record(self, server, latency, failed):
+        now = time.monotonic()
+        # Отказы запросов, отправленных до исключения, срок не продлевают
+        if server.record(latency, failed) and not server.ejected(now):
+            duration = server.eject(now)
+            if self.log:
+                self.log(f"DNS-сервер {server.address} исключен на {duration:.0f} с: отказывает раз за разом")
+
+    def can_hedge(self):
+        return len(self.servers) > 1 and self.hedged < self.queries * HEDGE_SHARE + 1
+
+    async def query(self, name, query_type):
+        """Запрос с дублированием на второй сервер при задержке и повтором при отказе"""
+        self.queries += 1
+        primary = await self.choose()
+        first = asyncio.ensure_future(self.query_server(primary, name, query_type))
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=primary.hedge_delay())
+            if done and (first.exception() is None or is_answer(first.exception())):
+                return first.result()
+
+            # Ответа нет дольше обычного (дублирование) или сервер отказал (повтор).
+            # Другого сервера с токеном может не быть (например, сервер один) -
+            # тогда результат первого запроса
+            if done:
+                secondary = self.pick(exclude=primary)
+            else:
+                secondary = self.pick(exclude=primary) if self.can_hedge() else None
+            if secondary is None:
+                return await first
+            secondary.queries += 1
+            if done:
+                self.failovers += 1
+            else:
+                self.hedged += 1
+            tasks.append(asyncio.ensure_future(self.query_server(secondary, name, query_type)))
+
+            # Первый ответ сервера; отказ одного - ждем другой
+            pending = [task for task in tasks if not task.done()]
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None or is_answer(task.exception()):
+                        return task.result()
+            return tasks[-1].result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # Ошибка проигравшего запроса не нужна
+
+    def get_stats(self):
+        now = time.monotonic()
+        return {
+            'dns_hedged': self.hedged,
+            'dns_failovers': self.failovers,
+            'dns_ejected': sum(1 for server in self.servers if server.ejected(now))
+        }
+
+    async def close(self):
+        for server in self.servers:
+            await server.resolver.close()
+
+
+class ScanResultResolver(AbstractResolver):
+    """Резолвер aiohttp, отдающий адреса из результатов проверки DNS.
+
+    Перед запросом HTTP адреса домена регистрируются через remember(), после
+    него удаляются через forget(). Остальные имена (например, цели
+    перенаправлений) разрешаются через пул DNS-серверов.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.known = {}
+
+    def remember(self, domain, addresses):
+        if addresses:
+            self.known[domain] = addresses
+
+    def forget(self, domain):
+        self.known.pop(domain, None)
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        addresses = self.known.get(host)
+        if addresses is None:
+            try:
+                addresses = [record.host for record in await self.pool.query(host, 'A')]
+            except aiodns.error.DNSError as e:
+                # aiohttp ожидает OSError и превращает его в ошибку соединения
+                raise OSError(f"Не удалось разрешить {host}: {str(e)}")
+        return [
+            {'hostname': host, 'host': address, 'port': port,
+             'family': socket.AF_INET6 if ':' in address else socket.AF_INET, 'proto': 0, 'flags': socket.AI_NUMERICHOST}
+            for address in addresses
+        ]
+
+    async def close(self):
+        pass
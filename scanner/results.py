@@ -0,0 +1,161 @@
+"""Запросы к базе результатов SQLite: статистика, повторы и выгрузка.
+
+База пишется приемником SqliteSink (см. sinks) и может читаться во время
+проверки: в режиме WAL чтение не мешает записи. Условия выборки (зоны,
+длина имени, схема, только рабочие, время находки) проверяются по индексам
+таблицы, поэтому отбор вроде "рабочие .org из трех букв с HTTPS за неделю"
+не читает базу целиком.
+"""
+
+import os, time
+
+from .sinks import SqliteSink, open_sink
+
+# Сколько записей читать и выгружать за раз (и как часто проверять остановку)
+EXPORT_BATCH = 10000
+# Статусы рабочего сайта: 2xx и 3xx, как при проверке
+ALIVE_STATUS = (200, 399)
+
+
+class ExportStopped(Exception):
+    """Выгрузка прервана вызовом stop()"""
+
+
+def parse_filter_tlds(value):
+    """'com, .org' -> ['.com', '.org']"""
+    return ['.' + tld.strip().lstrip('.').lower() for tld in value.split(',') if tld.strip()]
+
+
+class ResultStore(SqliteSink):
+    """База результатов с выборками по индексам.
+
+    Условия выборки (все необязательны): tlds - список зон ('.com'),
+    min_length и max_length - длина имени, scheme - 'https' или 'http',
+    alive - только статусы 2xx-3xx, since - найденные не раньше этого
+    времени (time.time()), parked - True только парковки, False - без них.
+    stop() можно вызвать из другого потока: export()
+    вернет None.
+    """
+
+    def __init__(self, path, progress=None):
+        super().__init__(path)
+        self.progress = progress
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def where(self, tlds=None, min_length=None, max_length=None, scheme=None, alive=False, since=None,
+              parked=None):
+        """Условие WHERE и его параметры"""
+        conditions, params = [], []
+        if tlds:
+            conditions.append(f"tld IN ({', '.join('?' * len(tlds))})")
+            params.extend(tlds)
+        if min_length:
+            conditions.append("length >= ?")
+            params.append(min_length)
+        if max_length:
+            conditions.append("length <= ?")
+            params.append(max_length)
+        if scheme:
+            conditions.append("scheme = ?")
+            params.append(scheme)
+        if alive:
+            conditions.append("status BETWEEN ? AND ?")
+            params.extend(ALIVE_STATUS)
+        if since:
+            conditions.append("found_at >= ?")
+            params.append(since)
+        if parked is not None:
+            conditions.append("parked = ?")
+            params.append(int(parked))
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    def count(self, **filters):
+        where, params = self.where(**filters)
+        return self.db.execute(f"SELECT count(*) FROM sites{where}", params).fetchone()[0]
+
+    def query(self, **filters):
+        """Записи, подходящие под условия, по алфавиту"""
+        where, params = self.where(**filters)
+        cursor = self.db.execute(
+            f"SELECT domain, status, scheme, latency, found_at, parked FROM sites{where} ORDER BY domain", params)
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH)
+            if not rows:
+                break
+            for domain, status, scheme, latency, found_at, parked in rows:
+                yield {'domain': domain, 'status': status, 'scheme': scheme, 'latency': latency,
+                       'found_at': found_at, 'parked': bool(parked)}
+
+    def group_counts(self, column, order='count(*) DESC'):
+        return self.db.execute(f"SELECT {column}, count(*) FROM sites GROUP BY {column} ORDER BY {order}").fetchall()
+
+    def stats(self):
+        """Сводка по базе: число сайтов, рабочих, по зонам, длинам, схемам и статусам"""
+        now = time.time()
+        first, last = self.db.execute("SELECT min(found_at), max(found_at) FROM sites").fetchone()
+        return {
+            'total': self.count(),
+            'alive': self.count(alive=True),
+            'parked': self.count(parked=True),
+            'day': self.count(since=now - 86400),
+            'week': self.count(since=now - 7 * 86400),
+            'first_found': first,
+            'last_found': last,
+            'tlds': self.group_counts('tld'),
+            'lengths': self.group_counts('length', order='length'),
+            'schemes': self.group_counts('scheme'),
+            'statuses': self.group_counts('status'),
+        }
+
+    def check_duplicates(self, top=100):
+        """Повторные находки: итог в том же виде, что у Deduplicator.check().
+
+        Домен хранится один раз, повторы лишь увеличивают found_count.
+        """
+        total, unique = self.db.execute("SELECT coalesce(sum(found_count), 0), count(*) FROM sites").fetchone()
+        repeats = self.db.execute(
+            "SELECT domain, found_count FROM sites WHERE found_count > 1 ORDER BY found_count DESC LIMIT ?", (top,)
+        ).fetchall()
+        return {'total': total, 'unique': unique, 'duplicates': total - unique, 'top': repeats}
+
+    def export(self, path, sink_format='auto', **filters):
+        """Выгрузка выборки в файл результатов (файл заменяется); число записей или None при остановке"""
+        if os.path.abspath(path) == os.path.abspath(self.path):
+            raise ValueError("Файл выгрузки совпадает с базой результатов")
+        # Временный файл с тем же расширением: формат auto определяется так же
+        base, extension = os.path.splitext(path)
+        tmp_path = f"{base}.export-tmp{extension}"
+        total = self.count(**filters)
+        written = 0
+        try:
+            sink = open_sink(tmp_path, sink_format)
+            try:
+                batch = []
+                for record in self.query(**filters):
+                    batch.append(record)
+                    if len(batch) >= EXPORT_BATCH:
+                        written += self.write_batch(sink, batch, written, total)
+                        batch = []
+                if batch:
+                    written += self.write_batch(sink, batch, written, total)
+                sink.sync()
+            finally:
+                sink.close()
+            os.replace(tmp_path, path)
+            return written
+        except ExportStopped:
+            return None
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def write_batch(self, sink, batch, written, total):
+        if not self.running:
+            raise ExportStopped()
+        sink.write(batch)
+        if self.progress:
+            self.progress("Выгрузка", written + len(batch), total)
+        return len(batch)
@@ -0,0 +1,183 @@
+"""Фильтр Блума недавно проверенных доменов, общий для запусков и процессов.
+
+Фильтр хранится в файле и отображается в память (mmap, общий режим), поэтому
+процессы проверки, открывшие один файл, сразу видят домены друг друга, а
+следующий запуск - домены прошлых. Домен занимает несколько бит (около 14
+при доле ложных срабатываний 0,1%) вместо записи во множестве Python. Ложное
+срабатывание означает, что непроверенный домен будет пропущен; доля таких
+доменов задается при создании файла.
+
+"Недавно" реализовано двумя половинами фильтра: домены добавляются в
+текущую, проверяются по обеим. Когда текущая половина старше ttl/2, вторая
+очищается и становится текущей - так домен помнится от ttl/2 до ttl.
+
+Биты устанавливаются без блокировок: при одновременной записи двух процессов
+бит может потеряться, и домен будет проверен повторно - это безопасно. Смена
+половины выполняется под блокировкой файла: процесс, дождавшийся ее, заново
+читает заголовок и не очищает половину, которую другой процесс только что
+сделал текущей.
+"""
+
+import contextlib, hashlib, math, mmap, os, struct, sys, time
+
+if sys.platform == 'win32':
+    import msvcrt
+else:
+    import fcntl
+
+SEEN_MAGIC = b'SITESEEN'
+SEEN_VERSION = 1
+# Сигнатура, версия, число хэшей, бит в половине, емкость, доля ложных
+# срабатываний, срок памяти (с), время начала половин, текущая половина
+HEADER = struct.Struct('<8sIIQQddddI')
+HEADER_SIZE = 4096  # Половины начинаются с границы страницы
+PAGE_SIZE = 4096
+ROTATION_CHECK_INTERVAL = 1.0  # с
+CLEAR_CHUNK = 1024 * 1024
+
+
+@contextlib.contextmanager
+def file_lock(file):
+    """Исключительная блокировка файла между процессами"""
+    if sys.platform == 'win32':
+        # Блокируется последний байт заголовка: он не читается через файл
+        file.seek(HEADER_SIZE - 1)
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            file.seek(HEADER_SIZE - 1)
+            msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+def filter_size(capacity, error_rate):
+    """(бит, хэшей) для capacity доменов при доле ложных срабатываний error_rate"""
+    bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+
+class SeenFilter:
+    """Файл фильтра: contains()/add() по домену, flush() и close().
+
+    Размер задается при создании файла; у существующего файла параметры
+    capacity, error_rate и ttl_hours берутся из него.
+    """
+
+    def __init__(self, path, capacity=10_000_000, error_rate=0.001, ttl_hours=168):
+        if not 0 < error_rate < 1:
+            raise ValueError("Доля ложных срабатываний должна быть больше 0 и меньше 1")
+        self.path = path
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            self.create(path, max(1, capacity), error_rate, ttl_hours * 3600)
+        self.file = open(path, 'r+b')
+        try:
+            header = self.file.read(HEADER.size)
+            if len(header) < HEADER.size or header[:8] != SEEN_MAGIC:
+                raise ValueError(f"Файл {path} не является фильтром проверенных доменов")
+            (_, version, self.hashes, self.bits, self.capacity, self.error_rate,
+             self.ttl, _, _, _) = HEADER.unpack(header)
+            if version != SEEN_VERSION:
+                raise ValueError(f"Фильтр {path} создан другой версией программы")
+            self.slot_size = self.slot_bytes(self.bits)
+            if os.fstat(self.file.fileno()).st_size != HEADER_SIZE + 2 * self.slot_size:
+                raise ValueError(f"Фильтр {path} поврежден")
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_WRITE)
+        except Exception:
+            self.file.close()
+            raise
+        self.checked_rotation = 0.0
+        self.current = 0
+        self.rotate_if_due()
+
+    @staticmethod
+    def slot_bytes(bits):
+        size = -(-bits // 8)
+        return -(-size // PAGE_SIZE) * PAGE_SIZE
+
+    @classmethod
+    def create(cls, path, capacity, error_rate, ttl):
+        """Новый пустой файл (записывается целиком и переименовывается)"""
+        bits, hashes = filter_size(capacity, error_rate)
+        slot_size = cls.slot_bytes(bits)
+        now = time.time()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                header = HEADER.pack(SEEN_MAGIC, SEEN_VERSION, hashes, bits, capacity, error_rate,
+                                     ttl, now, now, 0)
+                f.write(header + b'\0' * (HEADER_SIZE - len(header)))
+                f.truncate(HEADER_SIZE + 2 * slot_size)
+            # Если файл одновременно создал другой процесс, остается его файл
+            if not os.path.exists(path):
+                os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def read_header(self):
+        return HEADER.unpack_from(self.map, 0)
+
+    def rotate_if_due(self):
+        """Смена текущей половины, если она старше ttl/2 (не чаще раза в секунду)"""
+        now = time.time()
+        if now - self.checked_rotation < ROTATION_CHECK_INTERVAL:
+            return
+        self.checked_rotation = now
+        if self.due(self.read_header(), now):
+            with file_lock(self.file):
+                # Пока ждали блокировку, половину мог сменить другой процесс
+                header = list(self.read_header())
+                if self.due(header, now):
+                    current = 1 - header[9]
+                    start = HEADER_SIZE + current * self.slot_size
+                    for offset in range(start, start + self.slot_size, CLEAR_CHUNK):
+                        end = min(offset + CLEAR_CHUNK, start + self.slot_size)
+                        self.map[offset:end] = bytes(end - offset)
+                    header[7 + current] = now
+                    header[9] = current
+                    HEADER.pack_into(self.map, 0, *header)
+        self.current = self.read_header()[9]
+
+    def due(self, header, now):
+        """Текущая половина по заголовку старше ttl/2"""
+        return now - header[7 + header[9]] >= self.ttl / 2
+
+    def positions(self, domain):
+        """Номера бит домена (двойное хэширование одного дайджеста)"""
+        digest = hashlib.blake2b(domain.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.bits for i in range(self.hashes)]
+
+    def slot_contains(self, slot, positions):
+        base = HEADER_SIZE + slot * self.slot_size
+        data = self.map
+        return all(data[base + (position >> 3)] & (1 << (position & 7)) for position in positions)
+
+    def contains(self, domain):
+        """Домен проверялся недавно (с долей ложных срабатываний)"""
+        self.rotate_if_due()
+        positions = self.positions(domain)
+        return self.slot_contains(self.current, positions) or self.slot_contains(1 - self.current, positions)
+
+    def add(self, domain):
+        self.rotate_if_due()
+        base = HEADER_SIZE + self.current * self.slot_size
+        data = self.map
+        for position in self.positions(domain):
+            index = base + (position >> 3)
+            data[index] |= 1 << (position & 7)
+
+    def flush(self):
+        self.map.flush()
+
+    def close(self):
+        self.map.flush()
+        self.map.close()
+        self.file.close()
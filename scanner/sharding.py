@@ -0,0 +1,344 @@
+"""Параллельная проверка пространства доменов в нескольких процессах.
+
+Пространство обхода [0, total) делится на непересекающиеся диапазоны
+позиций. Каждый диапазон проверяет отдельный процесс со своим циклом
+событий и резолвером, а результаты и счетчики собираются в родительском
+процессе: один файл результатов и общий прогресс.
+"""
+
+import multiprocessing, os, queue, random, signal, threading, time, traceback
+
+from .engine import ScanEngine, ScanEvents, DEFAULT_SETTINGS, DEFAULT_CHARS, DEFAULT_TLDS, LOG_INFO, LOG_ERROR
+from .patterns import create_space
+from .checkpoint import save_checkpoint, load_checkpoint
+from .sinks import ResultBuffer
+from .metrics import merge_snapshots
+from .seen import SeenFilter
+
+# Настройки, которые задают общий предел для всех процессов и делятся между ними
+PER_PROCESS_LIMITS = ('dns_workers', 'tcp_workers', 'http_workers', 'queue_size', 'max_memory')
+
+
+def split_range(total, parts):
+    """Разбиение [0, total) на parts непрерывных диапазонов почти равной длины"""
+    parts = max(1, min(parts, total)) if total else 1
+    step, extra = divmod(total, parts)
+    ranges, start = [], 0
+    for i in range(parts):
+        stop = start + step + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+class QueueEvents(ScanEvents):
+    """События процесса-исполнителя, пересылаемые родителю через очередь.
+
+    Строки лога копятся и отправляются пачкой вместе с прогрессом, чтобы не
+    передавать между процессами каждое сообщение отдельно.
+    """
+
+    def __init__(self, shard_id, channel):
+        self.shard_id = shard_id
+        self.channel = channel
+        self.pending_log = []
+
+    def on_log(self, message, category=LOG_INFO):
+        self.pending_log.append((category, message))
+
+    def on_progress(self, stats):
+        self.channel.put(('progress', self.shard_id, stats, self.pending_log))
+        self.pending_log = []
+
+    def on_found(self, record):
+        self.channel.put(('found', self.shard_id, record))
+
+    def on_checkpoint(self, state):
+        self.channel.put(('checkpoint', self.shard_id, state, self.pending_log))
+        self.pending_log = []
+
+    def on_metrics(self, snapshot):
+        self.channel.put(('metrics', self.shard_id, snapshot, self.pending_log))
+        self.pending_log = []
+
+    def on_finished(self):
+        self.channel.put(('done', self.shard_id, None, self.pending_log))
+        self.pending_log = []
+
+
+class ShardEngine(ScanEngine):
+    """Движок процесса-исполнителя: найденные сайты записывает родитель"""
+
+    def open_result_writer(self):
+        return None
+
+
+def watch_stop_flag(stop_flag, engine):
+    """Ожидание флага остановки от родителя.
+
+    Флаг опрашивается, а не ожидается через multiprocessing.Event: установка
+    Event блокируется, если ожидающий процесс уже завершился.
+    """
+    while not stop_flag.value:
+        time.sleep(0.2)
+    engine.stop()
+
+
+def run_shard(shard_id, min_length, max_length, settings, tlds, start, stop, resume, channel, stop_flag):
+    """Точка входа процесса-исполнителя"""
+    # Ctrl+C получает вся группа процессов, но остановкой управляет родитель
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if settings['profile']:
+        # У каждого процесса свой файл профиля
+        settings = {**settings, 'profile_file': f"{settings['profile_file']}.{shard_id}"}
+    events = QueueEvents(shard_id, channel)
+    try:
+        engine = ShardEngine(min_length, max_length, settings, tlds=tlds, events=events,
+                             start=start, stop=stop, resume=resume)
+        threading.Thread(target=watch_stop_flag, args=(stop_flag, engine), daemon=True).start()
+
+        engine.run()
+    except Exception as e:
+        channel.put(('done', shard_id, None, [(LOG_ERROR, f"Ошибка в процессе {shard_id}: {str(e)}\n{traceback.format_exc()}")]))
+
+
+class ShardedScan:
+    """Проверка пространства доменов пулом процессов.
+
+    Интерфейс совпадает с ScanEngine: run() блокирует до завершения, stop()
+    можно вызывать из любого потока, события приходят в events из потока,
+    вызвавшего run(). Пределы параллельности из настроек - общие для всех
+    процессов и делятся между ними поровну.
+
+    Состояние всех частей сохраняет родитель в один файл. При продолжении
+    (resume - загруженное состояние) разбиение берется из файла, а не из
+    числа процессов в настройках.
+    """
+
+    def __init__(self, min_length, max_length, settings=None, tlds=None, events=None, processes=None, resume=None):
+        self.min_length, self.max_length = min_length, max_length
+        self.settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.events = events or ScanEvents()
+        self.tlds = tlds
+        self.output_file = self.settings['output_file']
+        self.running = True
+        # Общее зерно: все процессы обходят одну и ту же перестановку
+        self.seed = self.settings.get('seed') or random.getrandbits(64)
+        self.settings['seed'] = self.seed
+
+        self.total_domains = len(create_space(self.settings, DEFAULT_CHARS, min_length, max_length, tlds or DEFAULT_TLDS))
+        if resume:
+            self.ranges = [(shard['start'], shard['stop']) for shard in resume['shards']]
+            self.shard_states = dict(enumerate(resume['shards']))
+        else:
+            processes = processes or self.settings['processes'] or os.cpu_count() or 1
+            self.ranges = split_range(self.total_domains, processes)
+            self.shard_states = {
+                shard_id: {'start': start, 'stop': stop, 'position': start, 'in_flight': [], 'checked': 0, 'valid': 0}
+                for shard_id, (start, stop) in enumerate(self.ranges)
+            }
+        self.resume = resume
+        self.shard_stats = {}
+        self.shard_metrics = {}
+        self.valid_count = sum(state['valid'] for state in self.shard_states.values())
+        self.last_checkpoint = 0
+
+        self.context = multiprocessing.get_context('spawn')
+        self.stop_flag = self.context.RawValue('b', 0)
+
+    def shard_settings(self):
+        settings = dict(self.settings)
+        for key in PER_PROCESS_LIMITS:
+            # 0 означает "без ограничения" и не делится
+            if settings[key]:
+                settings[key] = max(1, settings[key] // len(self.ranges))
+        # Пределы частоты запросов тоже общие
+        settings['rate_share'] = 1.0 / len(self.ranges)
+        # Файл состояния ведет родитель
+        settings['checkpoint_file'] = ''
+        return settings
+
+    @property
+    def finished(self):
+        return all(state['position'] >= state['stop'] and not state['in_flight']
+                   for state in self.shard_states.values())
+
+    def save_checkpoint(self, force=False):
+        """Сохранение общего состояния (не чаще checkpoint_interval)"""
+        path = self.settings['checkpoint_file']
+        now = time.monotonic()
+        if not path or (not force and now - self.last_checkpoint < self.settings['checkpoint_interval']):
+            return
+        self.last_checkpoint = now
+        try:
+            # Все сайты, учтенные в состоянии частей, должны быть уже на диске
+            self.results.sync()
+            save_checkpoint(path, {
+                'min_length': self.min_length,
+                'max_length': self.max_length,
+                'tlds': self.tlds or DEFAULT_TLDS,
+                'patterns': self.settings['patterns'],
+                'wordlists': self.settings['wordlists'],
+                'seed': self.seed,
+                'finished': self.finished,
+                'shards': [self.shard_states[shard_id] for shard_id in range(len(self.ranges))]
+            })
+        except Exception as e:
+            self.events.on_log(f"Ошибка при сохранении состояния: {str(e)}", LOG_ERROR)
+
+    def get_stats(self):
+        """Сводные счетчики по всем процессам"""
+        stats = {'checked': 0}
+        for shard in self.shard_stats.values():
+            for key, value in shard.items():
+                if key not in ('total', 'valid'):
+                    stats[key] = stats.get(key, 0) + value
+        stats.update(total=self.total_domains, valid=self.valid_count, processes=len(self.ranges))
+        return stats
+
+    def create_seen_filter(self):
+        """Создание общего файла фильтра до запуска процессов, чтобы все открыли один файл"""
+        path = self.settings['seen_filter_file']
+        if path:
+            try:
+                SeenFilter(
+                    path,
+                    capacity=self.settings['seen_filter_capacity'],
+                    error_rate=self.settings['seen_filter_error'],
+                    ttl_hours=self.settings['seen_filter_ttl']
+                ).close()
+            except (OSError, ValueError) as e:
+                self.events.on_log(f"Фильтр проверенных доменов недоступен: {str(e)}", LOG_ERROR)
+
+    def run(self):
+        channel = self.context.Queue()
+        settings = self.shard_settings()
+        workers = []
+        self.results = None
+        try:
+            self.results = ResultBuffer(
+                self.output_file,
+                sink_format=self.settings['output_format'],
+                max_records=self.settings['write_buffer'],
+                max_delay=self.settings['write_interval'] / 1000.0
+            )
+            self.create_seen_filter()
+            self.events.on_log(f"Запуск {len(self.ranges)} процессов проверки")
+            for shard_id, (start, stop) in enumerate(self.ranges):
+                resume = self.shard_states[shard_id] if self.resume else None
+                process = self.context.Process(
+                    target=run_shard,
+                    args=(shard_id, self.min_length, self.max_length, settings, self.tlds,
+                          start, stop, resume, channel, self.stop_flag),
+                    daemon=True
+                )
+                process.start()
+                workers.append(process)
+
+            active = set(range(len(workers)))
+            while active:
+                self.results.flush_if_due()
+                try:
+                    message = channel.get(timeout=0.5)
+                except queue.Empty:
+                    # Процесс мог завершиться аварийно, не сообщив об этом
+                    for shard_id in list(active):
+                        if not workers[shard_id].is_alive():
+                            active.discard(shard_id)
+                            self.events.on_log(f"Процесс {shard_id} завершился с кодом {workers[shard_id].exitcode}", LOG_ERROR)
+                    continue
+
+                kind, shard_id, payload = message[:3]
+                if kind == 'found':
+                    self.add_found(payload)
+                    continue
+
+                for category, line in message[3]:
+                    self.events.on_log(line, category)
+                if kind == 'progress':
+                    self.shard_stats[shard_id] = payload
+                    self.events.on_progress(self.get_stats())
+                elif kind == 'metrics':
+                    self.shard_metrics[shard_id] = payload
+                    self.events.on_metrics(merge_snapshots(self.shard_metrics.values()))
+                elif kind == 'checkpoint':
+                    self.shard_states[shard_id] = payload
+                    self.save_checkpoint()
+                elif kind == 'done':
+                    active.discard(shard_id)
+
+            self.events.on_progress(self.get_stats())
+            self.events.on_log(f"Завершено! Рабочих сайтов: {self.valid_count}")
+        except Exception as e:
+            self.events.on_log(f"Критическая ошибка при параллельной проверке: {str(e)}\n{traceback.format_exc()}", LOG_ERROR)
+        finally:
+            self.stop_flag.value = 1
+            for process in workers:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+            if self.results:
+                try:
+                    self.save_checkpoint(force=True)
+                    self.results.close()
+                except Exception as e:
+                    self.events.on_log(f"Ошибка при записи результатов: {str(e)}", LOG_ERROR)
+            self.events.on_finished()
+
+    def add_found(self, record):
+        """Сайт, найденный процессом-исполнителем"""
+        try:
+            self.results.add(record)
+        except Exception as e:
+            # Запись осталась в буфере и повторится при следующем сбросе
+            self.events.on_log(f"Ошибка при сохранении {record['domain']}: {str(e)}", LOG_ERROR)
+        self.valid_count += 1
+        self.events.on_found(record)
+
+    def stop(self):
+        """Остановка всех процессов"""
+        self.running = False
+        self.stop_flag.value = 1
+        self.events.on_log("Запрос на остановку отправлен...")
+
+
+def check_space(state, space):
+    """ValueError, если пространство не совпадает с сохраненным (например, изменились словари)"""
+    if state['shards'][-1]['stop'] != len(space):
+        raise ValueError("Пространство доменов изменилось после сохранения состояния: изменены словари?")
+
+
+def create_scan(min_length, max_length, settings=None, tlds=None, events=None):
+    """Движок проверки: однопроцессный или пул процессов по настройке processes.
+
+    processes = 0 означает по одному процессу на ядро процессора.
+    """
+    processes = {**DEFAULT_SETTINGS, **(settings or {})}['processes']
+    if processes == 0:
+        processes = os.cpu_count() or 1
+    if processes > 1:
+        return ShardedScan(min_length, max_length, settings, tlds=tlds, events=events, processes=processes)
+    return ScanEngine(min_length, max_length, settings, tlds=tlds, events=events)
+
+
+def resume_scan(settings=None, events=None):
+    """Движок, продолжающий проверку из файла состояния checkpoint_file.
+
+    Параметры пространства и порядок обхода берутся из файла; OSError или
+    ValueError, если файл отсутствует или поврежден.
+    """
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    state = load_checkpoint(settings['checkpoint_file'])
+    if state.get('mode') == 'recheck':
+        raise ValueError("Файл состояния относится к перепроверке списка")
+    if state.get('mode') == 'coordinator':
+        raise ValueError("Файл состояния относится к координатору распределенной проверки")
+    settings['seed'] = state['seed']
+    settings['patterns'], settings['wordlists'] = state.get('patterns', ''), state.get('wordlists', '')
+    min_length, max_length, tlds = state['min_length'], state['max_length'], state['tlds']
+    check_space(state, create_space(settings, DEFAULT_CHARS, min_length, max_length, tlds))
+    if len(state['shards']) > 1:
+        return ShardedScan(min_length, max_length, settings, tlds=tlds, events=events, resume=state)
+    shard = state['shards'][0]
+    return ScanEngine(min_length, max_length, settings, tlds=tlds, events=events,
+                      start=shard['start'], stop=shard['stop'], resume=shard)
@@ -0,0 +1,279 @@
+"""Запись найденных сайтов: форматы файлов и буферизация.
+
+Каждый найденный сайт - запись (словарь) с полями domain, status, scheme,
+latency, found_at и parked (ответ повторен по адресу парковки, см. ipmemo).
+В текстовом файле пометки нет; в JSON Lines и SQLite домены парковок
+отбираются по полю parked. Приемник (sink) держит файл открытым и пишет записи
+пачками; BufferedResultWriter копит записи и сбрасывает их в отдельном
+потоке по размеру буфера или по времени, не блокируя цикл событий.
+
+В базе SQLite домен хранится один раз: повторная находка обновляет запись
+и увеличивает found_count. Зона (все после первой точки) и длина имени
+хранятся отдельными столбцами; индексы по ним, схеме, статусу и времени
+находки позволяют выбирать сайты запросами (см. results).
+"""
+
+import asyncio, concurrent.futures, json, os, sqlite3, time
+
+SINK_FORMATS = ('auto', 'text', 'jsonl', 'sqlite')
+
+
+def make_record(domain, status=None, scheme=None, latency=None, parked=False):
+    """Запись о найденном сайте"""
+    return {
+        'domain': domain,
+        'status': status,
+        'scheme': scheme,
+        'latency': round(latency, 3) if latency is not None else None,
+        'found_at': round(time.time(), 3),
+        'parked': parked
+    }
+
+
+class TextSink:
+    """Простой текстовый файл: один домен на строку"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def format(self, record):
+        return f"{record['domain']}\n"
+
+    def write(self, records):
+        self.file.write(''.join(self.format(record) for record in records))
+        self.file.flush()
+
+    def sync(self):
+        """Гарантированная запись на диск"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+
+class JsonlSink(TextSink):
+    """JSON Lines: запись целиком, по одной на строку"""
+
+    def format(self, record):
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def split_domain(domain):
+    """'abc.co.uk' -> ('.co.uk', 3): зона и длина имени"""
+    name, dot, tld = domain.partition('.')
+    return dot + tld, len(name)
+
+
+class SqliteSink:
+    """Таблица SQLite с индексами; повторная находка обновляет запись"""
+
+    # Столбцы, добавленные к первой версии таблицы (domain, status, scheme, latency, found_at)
+    COLUMNS = (('tld', 'TEXT'), ('length', 'INTEGER'), ('first_found', 'REAL'), ('found_count', 'INTEGER DEFAULT 1'),
+               ('parked', 'INTEGER DEFAULT 0'))
+    INDEXES = (
+        "CREATE INDEX IF NOT EXISTS sites_tld ON sites (tld, length)",
+        "CREATE INDEX IF NOT EXISTS sites_length ON sites (length)",
+        "CREATE INDEX IF NOT EXISTS sites_scheme ON sites (scheme)",
+        "CREATE INDEX IF NOT EXISTS sites_status ON sites (status)",
+        "CREATE INDEX IF NOT EXISTS sites_found_at ON sites (found_at)",
+        "CREATE INDEX IF NOT EXISTS sites_repeats ON sites (found_count) WHERE found_count > 1",
+        "CREATE INDEX IF NOT EXISTS sites_parked ON sites (parked)",
+    )
+    UPSERT = (
+        "INSERT INTO sites (domain, status, scheme, latency, found_at, tld, length, first_found, found_count, parked) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1, ?) "
+        "ON CONFLICT (domain) DO UPDATE SET status = excluded.status, scheme = excluded.scheme, "
+        "latency = excluded.latency, found_at = excluded.found_at, found_count = found_count + 1, "
+        "parked = excluded.parked"
+    )
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.create_schema()
+
+    def create_schema(self):
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS sites ("
+            "domain TEXT PRIMARY KEY, status INTEGER, scheme TEXT, latency REAL, found_at REAL)"
+        )
+        existing = {row[1] for row in self.db.execute("PRAGMA table_info(sites)")}
+        added = [name for name, kind in self.COLUMNS if name not in existing]
+        for name, kind in self.COLUMNS:
+            if name in added:
+                self.db.execute(f"ALTER TABLE sites ADD COLUMN {name} {kind}")
+        if 'tld' in added:
+            # Таблица прежней версии: зона и длина вычисляются по домену
+            self.db.execute(
+                "UPDATE sites SET tld = substr(domain, instr(domain || '.', '.')), "
+                "length = instr(domain || '.', '.') - 1, first_found = found_at, found_count = 1"
+            )
+        for statement in self.INDEXES:
+            self.db.execute(statement)
+        self.db.commit()
+
+    def write(self, records):
+        rows = []
+        for record in records:
+            domain = record['domain'].lower()
+            tld, length = split_domain(domain)
+            rows.append((domain, record['status'], record['scheme'], record['latency'], record['found_at'],
+                         tld, length, record['found_at'], int(bool(record.get('parked')))))
+        self.db.executemany(self.UPSERT, rows)
+        self.db.commit()
+
+    def sync(self):
+        # При переносе WAL в основной файл SQLite выполняет fsync
+        self.db.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def close(self):
+        self.db.close()
+
+
+def open_sink(path, sink_format='auto'):
+    """Приемник результатов; при auto формат выбирается по расширению файла"""
+    if sink_format == 'auto':
+        extension = os.path.splitext(path)[1].lower()
+        if extension in ('.jsonl', '.ndjson'):
+            sink_format = 'jsonl'
+        elif extension in ('.db', '.sqlite', '.sqlite3'):
+            sink_format = 'sqlite'
+        else:
+            sink_format = 'text'
+    if sink_format == 'jsonl':
+        return JsonlSink(path)
+    if sink_format == 'sqlite':
+        return SqliteSink(path)
+    if sink_format == 'text':
+        return TextSink(path)
+    raise ValueError(f"Неизвестный формат результатов: {sink_format}")
+
+
+class BufferedResultWriter:
+    """Асинхронная буферизованная запись результатов.
+
+    Записи копятся в памяти и сбрасываются в приемник пачкой, когда буфер
+    достигает max_records или с момента первой записи в буфере прошло
+    max_delay секунд. Сама запись выполняется в отдельном потоке (один
+    поток - порядок записей сохраняется), поэтому цикл событий не ждет диск.
+
+    Пачка, которую не удалось записать, возвращается в начало буфера и
+    пишется при следующем сбросе. Ошибка фонового сброса запоминается и
+    выбрасывается из следующего add(); sync() выбрасывает ошибку, если
+    буфер так и не удалось записать, поэтому состояние проверки не
+    сохраняется дальше незаписанных записей.
+    """
+
+    def __init__(self, path, sink_format='auto', max_records=500, max_delay=1.0):
+        self.path = path
+        self.sink_format = sink_format
+        self.max_records = max_records
+        self.max_delay = max_delay
+        self.buffer = []
+        self.written = 0
+        self.sink = None
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.flush_task = None
+        self.error = None  # Ошибка фонового сброса
+
+    async def run_in_writer(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def open(self):
+        self.sink = await self.run_in_writer(open_sink, self.path, self.sink_format)
+
+    async def add(self, record):
+        self.buffer.append(record)
+        if self.error is not None:
+            # Запись остается в буфере и попадет в файл при следующем удачном сбросе
+            error, self.error = self.error, None
+            raise error
+        if len(self.buffer) >= self.max_records:
+            await self.flush()
+        elif self.flush_task is None:
+            self.flush_task = asyncio.create_task(self.delayed_flush())
+
+    async def delayed_flush(self):
+        try:
+            await asyncio.sleep(self.max_delay)
+            self.flush_task = None
+            await self.flush()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.error = e
+
+    async def flush(self):
+        """Запись накопленного буфера в приемник"""
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        try:
+            await self.run_in_writer(self.sink.write, batch)
+        except BaseException:
+            self.buffer[:0] = batch
+            raise
+        self.written += len(batch)
+
+    async def sync(self):
+        """Запись буфера и fsync (перед сохранением состояния проверки)"""
+        await self.flush()
+        # Буфер записан целиком: прежняя ошибка фонового сброса больше не важна
+        self.error = None
+        await self.run_in_writer(self.sink.sync)
+
+    async def close(self):
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            self.flush_task = None
+        try:
+            if self.sink is not None:
+                try:
+                    await self.sync()
+                finally:
+                    await self.run_in_writer(self.sink.close)
+        finally:
+            self.executor.shutdown(wait=True)
+
+
+class ResultBuffer:
+    """Синхронный вариант буферизованной записи (для родительского процесса)"""
+
+    def __init__(self, path, sink_format='auto', max_records=500, max_delay=1.0):
+        self.sink = open_sink(path, sink_format)
+        self.max_records = max_records
+        self.max_delay = max_delay
+        self.buffer = []
+        self.first_added = None
+
+    def add(self, record):
+        if not self.buffer:
+            self.first_added = time.monotonic()
+        self.buffer.append(record)
+        if len(self.buffer) >= self.max_records:
+            self.flush()
+
+    def flush_if_due(self):
+        """Запись буфера, если он ждет дольше max_delay"""
+        if self.buffer and time.monotonic() - self.first_added >= self.max_delay:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            # Буфер очищается только после удачной записи
+            self.sink.write(self.buffer)
+            self.buffer = []
+
+    def sync(self):
+        self.flush()
+        self.sink.sync()
+
+    def close(self):
+        try:
+            self.sync()
+        finally:
+            self.sink.close()
@@ -0,0 +1,163 @@
+"""Пространство доменных имён и его полный перебор без повторов"""
+
+import sys
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix64(value):
+    """Перемешивание 64-битного числа (финализатор splitmix64)"""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+class DomainSpace:
+    """Все домены вида <имя><зона> для заданных символов, длин и зон.
+
+    Домены пронумерованы от 0 до len(space) - 1: сначала по длине имени,
+    затем по самому имени (как число в системе счисления len(chars)),
+    затем по зоне. Нумерация позволяет получать домен по индексу и обратно.
+    """
+
+    def __init__(self, chars, min_length, max_length, tlds):
+        if min_length < 1 or min_length > max_length:
+            raise ValueError("Некорректный диапазон длины домена")
+        self.chars = chars
+        self.min_length, self.max_length = min_length, max_length
+        self.tlds = list(tlds)
+        self.char_index = {c: i for i, c in enumerate(chars)}
+        # Начало блока индексов для каждой длины имени
+        self.blocks = []
+        offset = 0
+        for length in range(min_length, max_length + 1):
+            size = (len(chars) ** length) * len(self.tlds)
+            self.blocks.append((length, offset, size))
+            offset += size
+        self.total = offset
+        if self.total > sys.maxsize:
+            raise ValueError(f"Пространство слишком велико: {self.total:.3e} доменов")
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.total
+        if not 0 <= index < self.total:
+            raise IndexError("Индекс вне пространства доменов")
+        for length, offset, size in self.blocks:
+            if index < offset + size:
+                break
+        name_index, tld_index = divmod(index - offset, len(self.tlds))
+        base = len(self.chars)
+        name = []
+        for _ in range(length):
+            name_index, digit = divmod(name_index, base)
+            name.append(self.chars[digit])
+        return ''.join(reversed(name)) + self.tlds[tld_index]
+
+    def index(self, domain):
+        """Индекс домена в пространстве (ValueError, если домена там нет)"""
+        for tld_index, tld in enumerate(self.tlds):
+            if domain.endswith(tld):
+                name = domain[:-len(tld)]
+                break
+        else:
+            raise ValueError(f"Домен вне пространства: {domain}")
+        if not self.min_length <= len(name) <= self.max_length:
+            raise ValueError(f"Домен вне пространства: {domain}")
+        name_index = 0
+        base = len(self.chars)
+        for c in name:
+            if c not in self.char_index:
+                raise ValueError(f"Домен вне пространства: {domain}")
+            name_index = name_index * base + self.char_index[c]
+        offset = self.blocks[len(name) - self.min_length][1]
+        return offset + name_index * len(self.tlds) + tld_index
+
+
+class FeistelPermutation:
+    """Псевдослучайная биекция [0, n) -> [0, n), задаваемая зерном.
+
+    Сеть Фейстеля над ближайшей сверху степенью двойки с чётным числом бит
+    и обход цикла (cycle walking) для значений за пределами n. Память O(1),
+    вычисление одного значения - несколько раундов целочисленного хеша.
+    """
+
+    rounds = 4
+
+    def __init__(self, n, seed):
+        self.n = n
+        bits = max(2, (n - 1).bit_length())
+        bits += bits % 2
+        self.half_bits = bits // 2
+        self.half_mask = (1 << self.half_bits) - 1
+        self.keys = [_mix64((seed + i * 0x632BE59BD9B4E019) & _MASK64) for i in range(self.rounds)]
+
+    def _encrypt(self, value):
+        left, right = value >> self.half_bits, value & self.half_mask
+        for key in self.keys:
+            left, right = right, left ^ (_mix64(right ^ key) & self.half_mask)
+        return (left << self.half_bits) | right
+
+    def __call__(self, index):
+        value = self._encrypt(index)
+        while value >= self.n:
+            value = self._encrypt(value)
+        return value
+
+
+class DomainEnumerator:
+    """Итератор по пространству доменов: каждый домен ровно один раз.
+
+    При заданном seed порядок обхода псевдослучайный (биективная
+    перестановка), иначе последовательный. Позиция - число уже выданных
+    доменов; seek(n) переходит к n-й позиции без перебора предыдущих.
+    Параметры start/stop ограничивают обход диапазоном позиций.
+    """
+
+    def __init__(self, space, seed=None, start=0, stop=None):
+        self.space = space
+        self.seed = seed
+        self.permutation = FeistelPermutation(len(space), seed) if seed is not None and len(space) > 1 else None
+        self.start = start
+        self.stop = len(space) if stop is None else min(stop, len(space))
+        self.position = start
+
+    def __len__(self):
+        return max(0, self.stop - self.start)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.position >= self.stop:
+            raise StopIteration
+        domain = self.domain_at(self.position)
+        self.position += 1
+        return domain
+
+    def domain_at(self, position):
+        """Домен, который будет выдан на данной позиции обхода"""
+        if self.permutation is not None:
+            return self.space[self.permutation(position)]
+        return self.space[position]
+
+    def seek(self, position):
+        """Переход к заданной позиции обхода"""
+        if not self.start <= position <= self.stop:
+            raise IndexError("Позиция вне диапазона обхода")
+        self.position = position
+
+    def take(self, count):
+        """Следующие count доменов (меньше, если обход закончился)"""
+        end = min(self.position + count, self.stop)
+        domains = [self.domain_at(p) for p in range(self.position, end)]
+        self.position = end
+        return domains
+
+    @property
+    def remaining(self):
+        return max(0, self.stop - self.position)
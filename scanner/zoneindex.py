@@ -0,0 +1,285 @@
+"""Индекс зарегистрированных имен из файла зоны реестра (.com, .org, .net).
+
+Импорт читает файл зоны (можно сжатый .gz) и берет имена второго уровня,
+для которых в зоне есть делегирование (записи NS). Индекс - заголовок и
+отсортированный массив 64-битных хэшей имен. При проверке файл отображается
+в память (mmap) и ищется двоичным поиском, O(log n), без загрузки целиком.
+Хэш вместо имени занимает 8 байт; вероятность ложного совпадения ничтожна
+и стоит лишь одного лишнего запроса DNS.
+
+Большие зоны импортируются по частям: хэши раскладываются по старшим битам
+во временные разделы, каждый раздел сортируется в памяти, и разделы
+дописываются в индекс по порядку - так весь массив получается отсортированным.
+"""
+
+import array, bisect, gzip, hashlib, io, mmap, os, re, struct, sys, tempfile, time
+
+from .checkpoint import sync_directory
+
+INDEX_MAGIC = b'SITEZIDX'
+INDEX_VERSION = 1
+# Сигнатура, версия, порядок байт (0 - little, 1 - big), время создания, число имен, зона
+HEADER = struct.Struct('<8sIIdQ64s')
+INDEX_EXTENSION = '.zidx'
+
+# Оценка памяти на имя при сортировке раздела (множество и список чисел Python)
+MEMORY_PER_NAME = 120
+# Оценка длины строки зоны и степени сжатия .gz для расчета числа разделов
+BYTES_PER_RECORD = 30
+GZIP_RATIO = 5
+MAX_PARTITIONS = 256
+PROGRESS_STEP = 65536
+
+RECORD_CLASSES = ('IN', 'CH', 'HS', 'CS')
+TTL_PATTERN = re.compile(r'^\d+[smhdw]?(\d+[smhdw])*$', re.IGNORECASE)
+
+
+class ImportStopped(Exception):
+    """Импорт прерван вызовом stop()"""
+
+
+def name_hash(label):
+    """64-битный хэш имени второго уровня (без зоны)"""
+    return int.from_bytes(hashlib.blake2b(label.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def split_indexes(value):
+    """'com.zidx; net.zidx' -> ['com.zidx', 'net.zidx']"""
+    return [path.strip() for path in value.split(';') if path.strip()]
+
+
+class ZoneParser:
+    """Имена второго уровня с делегированием из строк файла зоны.
+
+    Поддерживаются $ORIGIN, относительные и абсолютные имена, пропуск
+    имени владельца (продолжение предыдущей записи) и записи в скобках на
+    нескольких строках. Зона - из параметра tld или по владельцу SOA.
+    """
+
+    def __init__(self, tld=None):
+        self.tld = tld.strip('.').lower() if tld else None
+        self.origin = self.tld
+        self.owner = None
+        self.depth = 0  # Незакрытые скобки многострочной записи
+        self.records = 0
+
+    def absolute(self, name):
+        name = name.lower()
+        if name == '@':
+            return self.origin
+        if name.endswith('.'):
+            return name[:-1]
+        return f"{name}.{self.origin}" if self.origin else name
+
+    def labels(self, lines):
+        for line in lines:
+            line = line.split(';', 1)[0]
+            if not line.strip():
+                continue
+            if self.depth:
+                self.depth += line.count('(') - line.count(')')
+                continue
+            self.depth = max(0, line.count('(') - line.count(')'))
+
+            tokens = line.split()
+            if tokens[0].startswith('$'):
+                if tokens[0].upper() == '$ORIGIN' and len(tokens) > 1:
+                    self.origin = tokens[1].rstrip('.').lower()
+                continue
+            if line[0] in ' \t':
+                fields = tokens  # Владелец - из предыдущей записи
+            else:
+                self.owner, fields = tokens[0], tokens[1:]
+            record_type = next((field.upper() for field in fields
+                                if not TTL_PATTERN.match(field) and field.upper() not in RECORD_CLASSES), None)
+            if record_type is None or self.owner is None:
+                continue
+            self.records += 1
+            name = self.absolute(self.owner)
+            if record_type == 'SOA' and self.tld is None:
+                self.tld = name
+            if record_type != 'NS' or not self.tld or not name.endswith('.' + self.tld):
+                continue
+            label = name[:-len(self.tld) - 1]
+            if label and '.' not in label:
+                yield label
+
+
+class ZoneImporter:
+    """Импорт файла зоны в индекс.
+
+    progress(stage, done, total) получает число прочитанных байт файла зоны;
+    stop() из другого потока прерывает импорт, индекс не создается.
+    """
+
+    def __init__(self, zone_path, index_path, tld=None, memory_limit=256 * 1024 * 1024, progress=None):
+        self.zone_path = zone_path
+        self.index_path = index_path
+        self.parser = ZoneParser(tld)
+        self.memory_limit = memory_limit
+        self.progress = progress
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def partition_count(self):
+        size = os.path.getsize(self.zone_path)
+        if self.zone_path.endswith('.gz'):
+            size *= GZIP_RATIO
+        memory = size // BYTES_PER_RECORD * MEMORY_PER_NAME
+        return max(1, min(MAX_PARTITIONS, -(-memory // max(1, self.memory_limit))))
+
+    def read_labels(self):
+        """Имена из файла зоны с отчетом о прогрессе и проверкой остановки"""
+        total = os.path.getsize(self.zone_path)
+        with open(self.zone_path, 'rb') as raw:
+            stream = gzip.GzipFile(fileobj=raw) if self.zone_path.endswith('.gz') else raw
+            lines = io.TextIOWrapper(stream, encoding='ascii', errors='replace')
+            for number, label in enumerate(self.parser.labels(lines)):
+                if number % PROGRESS_STEP == 0:
+                    if not self.running:
+                        raise ImportStopped()
+                    # Позиция в сыром файле - прогресс и для сжатой зоны
+                    if self.progress:
+                        self.progress("Чтение зоны", raw.tell(), total)
+                yield label
+        if self.progress:
+            self.progress("Чтение зоны", total, total)
+
+    def run(self):
+        """Импорт; итог: зона, число имен и записей, время"""
+        started = time.monotonic()
+        directory = os.path.dirname(os.path.abspath(self.index_path))
+        tmp_path = f"{self.index_path}.tmp"
+        partitions = self.partition_count()
+        try:
+            with open(tmp_path, 'wb') as output:
+                output.write(b'\0' * HEADER.size)
+                if partitions == 1:
+                    count = self.write_hashes(output, {name_hash(label) for label in self.read_labels()})
+                else:
+                    count = self.import_partitioned(output, partitions, directory)
+                if not self.parser.tld:
+                    raise ValueError("Не удалось определить зону: укажите ее явно")
+                output.seek(0)
+                output.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION, 0 if sys.byteorder == 'little' else 1,
+                                         time.time(), count, self.parser.tld.encode('utf-8')))
+                output.flush()
+                os.fsync(output.fileno())
+            os.replace(tmp_path, self.index_path)
+            sync_directory(directory)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return {
+            'tld': self.parser.tld,
+            'names': count,
+            'records': self.parser.records,
+            'seconds': round(time.monotonic() - started, 1)
+        }
+
+    def write_hashes(self, output, hashes):
+        """Уникальные хэши раздела по возрастанию (в порядке байт платформы)"""
+        array.array('Q', sorted(hashes)).tofile(output)
+        return len(hashes)
+
+    def import_partitioned(self, output, partitions, directory):
+        with tempfile.TemporaryDirectory(prefix='zone-', dir=directory) as tmp:
+            part_paths = [os.path.join(tmp, f"{i}.part") for i in range(partitions)]
+            parts = [open(path, 'wb') for path in part_paths]
+            buffers = [array.array('Q') for _ in range(partitions)]
+            try:
+                for label in self.read_labels():
+                    value = name_hash(label)
+                    # Раздел по старшим битам: разделы упорядочены между собой
+                    index = (value >> 56) * partitions >> 8
+                    buffers[index].append(value)
+                    if len(buffers[index]) >= 8192:
+                        buffers[index].tofile(parts[index])
+                        buffers[index] = array.array('Q')
+                for part, buffer in zip(parts, buffers):
+                    buffer.tofile(part)
+            finally:
+                for part in parts:
+                    part.close()
+
+            count = 0
+            for number, path in enumerate(part_paths):
+                if not self.running:
+                    raise ImportStopped()
+                hashes = array.array('Q')
+                with open(path, 'rb') as part:
+                    hashes.frombytes(part.read())
+                os.remove(path)
+                count += self.write_hashes(output, set(hashes))
+                if self.progress:
+                    self.progress("Сортировка", number + 1, partitions)
+            return count
+
+
+class ZoneIndex:
+    """Индекс одной зоны, отображенный в память; 'name' in index - имя зарегистрировано"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        try:
+            header = self.file.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError(f"Файл {path} не является индексом зоны")
+            magic, version, byteorder, self.created, self.count, tld = HEADER.unpack(header)
+            if magic != INDEX_MAGIC or version != INDEX_VERSION:
+                raise ValueError(f"Файл {path} не является индексом зоны или создан другой версией")
+            if byteorder != (0 if sys.byteorder == 'little' else 1):
+                raise ValueError(f"Индекс {path} создан на платформе с другим порядком байт")
+            if os.fstat(self.file.fileno()).st_size != HEADER.size + self.count * 8:
+                raise ValueError(f"Индекс {path} поврежден")
+            self.tld = tld.rstrip(b'\0').decode('utf-8')
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self.file.close()
+            raise
+        self.hashes = memoryview(self.map)[HEADER.size:].cast('Q')
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, label):
+        value = name_hash(label)
+        index = bisect.bisect_left(self.hashes, value)
+        return index < self.count and self.hashes[index] == value
+
+    def close(self):
+        self.hashes.release()
+        self.map.close()
+        self.file.close()
+
+
+class ZoneFilter:
+    """Набор индексов зон: проверка регистрации домена без запросов DNS"""
+
+    def __init__(self, paths):
+        self.indexes = {}
+        try:
+            for path in paths:
+                index = ZoneIndex(path)
+                self.indexes['.' + index.tld] = index
+        except Exception:
+            self.close()
+            raise
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def registered(self, domain):
+        """True/False - есть ли домен в зоне; None - индекса для зоны нет"""
+        for suffix, index in self.indexes.items():
+            if domain.endswith(suffix):
+                return domain[:-len(suffix)] in index
+        return None
+
+    def close(self):
+        for index in self.indexes.values():
+            index.close()
+        self.indexes = {}
@@ -0,0 +1,47 @@
+import pytest
+
+from scanner.checkpoint import can_resume, load_checkpoint, save_checkpoint
+from scanner.engine import ScanEngine
+from scanner.sharding import resume_scan
+
+SETTINGS = {'negative_cache_file': '', 'seen_filter_file': '', 'self_test': False, 'seed': 7}
+
+
+def test_resume_has_no_duplicates_and_no_gaps(tmp_path):
+    settings = {**SETTINGS, 'checkpoint_file': str(tmp_path / 'state.json')}
+    engine = ScanEngine(1, 2, settings, tlds=['.com', '.net'])
+    space = {engine.space[i] for i in range(len(engine.space))}
+
+    # Часть выданных доменов проверена, остальные остались в работе
+    checked = []
+    for _ in range(3):
+        batch = engine.generate_domains_batch(50)
+        for domain in batch[::2]:
+            engine.domain_done(domain)
+            checked.append(domain)
+    engine.save_checkpoint()
+    assert not load_checkpoint(settings['checkpoint_file'])['finished']
+
+    resumed = resume_scan(settings)
+    rest = list(resumed.resumed)
+    while resumed.domains.remaining:
+        rest.extend(resumed.generate_domains_batch(100))
+    assert resumed.checked_count == len(checked)
+    assert len(checked) + len(rest) == len(space)
+    assert set(checked) | set(rest) == space
+
+
+def test_damaged_checkpoint_is_rejected(tmp_path):
+    path = str(tmp_path / 'state.json')
+    assert not can_resume(path)
+    save_checkpoint(path, {'min_length': 1, 'max_length': 2, 'tlds': ['.com'], 'seed': 1, 'shards': []})
+    assert load_checkpoint(path)['seed'] == 1 and can_resume(path)
+    assert not (tmp_path / 'state.json.tmp').exists()
+
+    (tmp_path / 'state.json').write_text('{"version": 1, "seed"')
+    with pytest.raises(ValueError, match="поврежден"):
+        load_checkpoint(path)
+    assert not can_resume(path)
+    save_checkpoint(path, {'min_length': 1, 'seed': 1})
+    with pytest.raises(ValueError, match="нет поля"):
+        load_checkpoint(path)
@@ -0,0 +1,54 @@
+import asyncio, socket
+
+from scanner.connect import PortProbe, interleave_addresses
+
+SETTINGS = {'tcp_probe_timeout': 1.0, 'happy_eyeballs_delay': 0.05, 'https_port': 443, 'http_port': 80}
+
+
+class FakeProbe(PortProbe):
+    """Соединения без сети: адрес -> {порт: задержка ответа или None (отказ)}; нет порта - не отвечает"""
+
+    def __init__(self, hosts, **settings):
+        super().__init__({**SETTINGS, **settings})
+        self.hosts = hosts
+        self.attempts = []
+
+    async def connect(self, address, port):
+        self.attempts.append((address, port))
+        delay = self.hosts.get(address, {}).get(port, 'silent')
+        if delay == 'silent':
+            await asyncio.sleep(3600)
+        if delay is None:
+            raise ConnectionRefusedError()
+        await asyncio.sleep(delay)
+
+
+def test_interleave_starts_with_ipv6():
+    assert interleave_addresses(['1.1.1.1', '2.2.2.2', '::1', '::2', '::3']) == \
+        ['::1', '1.1.1.1', '::2', '2.2.2.2', '::3']
+
+
+def test_open_ports_of_first_answering_address():
+    probe = FakeProbe({'::1': {443: None, 80: None}, '1.1.1.1': {443: 0.0, 80: 0.01}})
+    assert asyncio.run(probe.check(['1.1.1.1', '::1'])) == ({'https', 'http'}, '1.1.1.1')
+
+
+def test_silent_address_does_not_block_next_one():
+    probe = FakeProbe({'2.2.2.2': {80: 0.0, 443: None}})
+    schemes, address = asyncio.run(asyncio.wait_for(probe.check(['1.1.1.1', '2.2.2.2']), 0.5))
+    assert (schemes, address) == ({'http'}, '2.2.2.2')
+
+
+def test_closed_ports_give_up_at_timeout():
+    probe = FakeProbe({'1.1.1.1': {443: None, 80: None}}, tcp_probe_timeout=0.1)
+    assert asyncio.run(probe.check(['1.1.1.1', '2.2.2.2'])) == (set(), None)
+    assert ('2.2.2.2', 443) in probe.attempts
+
+
+def test_real_connection():
+    with socket.socket() as server, socket.socket() as closed:
+        server.bind(('127.0.0.1', 0))
+        server.listen()
+        closed.bind(('127.0.0.1', 0))  # Порт занят, но не слушает: соединение отклоняется
+        probe = PortProbe({**SETTINGS, 'http_port': server.getsockname()[1], 'https_port': closed.getsockname()[1]})
+        assert asyncio.run(probe.check(['127.0.0.1'])) == ({'http'}, '127.0.0.1')
@@ -0,0 +1,43 @@
+import pytest
+
+from scanner.dedupe import Deduplicator
+
+
+def make_file(path, count=3000):
+    # Каждый домен повторяется, первые вхождения идут в известном порядке
+    lines = [f"d{i % 1000}.com\n" for i in range(count)]
+    lines.insert(5, "D3.COM\n")
+    path.write_text(''.join(lines))
+    return [f"d{i}.com" for i in range(1000)]
+
+
+@pytest.mark.parametrize('memory_limit', [256 * 1024 * 1024, 1024])
+def test_remove_keeps_first_seen_order(tmp_path, memory_limit):
+    path = tmp_path / 'sites.txt'
+    expected = make_file(path)
+    deduplicator = Deduplicator(str(path), memory_limit=memory_limit)
+    if memory_limit == 1024:
+        assert deduplicator.partition_count() > 1
+
+    report = deduplicator.remove()
+    assert report['total'] == 3001
+    assert report['unique'] == 1000
+    assert report['duplicates'] == 2001
+    assert path.read_text().splitlines() == expected
+
+
+def test_check_leaves_file_unchanged(tmp_path):
+    path = tmp_path / 'sites.txt'
+    make_file(path)
+    before = path.read_bytes()
+    report = Deduplicator(str(path), memory_limit=1024).check()
+    assert report['duplicates'] == 2001
+    assert dict(report['top'])['d3.com'] == 4
+    assert path.read_bytes() == before
+
+
+def test_jsonl_compared_by_domain(tmp_path):
+    path = tmp_path / 'sites.jsonl'
+    path.write_text('{"domain": "a.com", "status": 200}\n{"domain": "A.com", "status": 301}\nb.com\n')
+    Deduplicator(str(path)).remove()
+    assert path.read_text().splitlines() == ['{"domain": "a.com", "status": 200}', 'b.com']
@@ -0,0 +1,99 @@
+import asyncio
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from scanner.distributed import Coordinator, chunk_ranges
+from scanner.sinks import ResultBuffer, make_record
+
+SETTINGS = {'seed': 7, 'lease_size': 700, 'lease_ttl': 60, 'coordinator_checkpoint_file': ''}
+
+
+def make_coordinator(tmp_path, **settings):
+    coordinator = Coordinator(1, 2, {**SETTINGS, **settings}, tlds=['.com'])
+    coordinator.results = ResultBuffer(str(tmp_path / 'sites.txt'), max_records=1)
+    return coordinator
+
+
+def with_client(coordinator, scenario):
+    async def run():
+        async with TestClient(TestServer(coordinator.create_app())) as client:
+            return await scenario(client)
+    return asyncio.run(run())
+
+
+def test_chunk_ranges():
+    assert chunk_ranges(1200, 500) == [(0, 500), (500, 1000), (1000, 1200)]
+    assert chunk_ranges(0, 500) == []
+
+
+def test_chunks_are_leased_reported_and_finished(tmp_path):
+    coordinator = make_coordinator(tmp_path)
+    assert len(coordinator.chunks) == 2  # 36 + 36^2 имен в зоне .com
+
+    async def scenario(client):
+        first = await (await client.post('/lease', json={'worker': 'a'})).json()
+        second = await (await client.post('/lease', json={'worker': 'b'})).json()
+        assert first['state']['start'] == 0 and second['state']['start'] == 700
+        assert (await (await client.post('/lease', json={'worker': 'c'})).json()) == {'wait': 2.0}
+
+        for lease in (first, second):
+            state = {**lease['state'], 'position': lease['state']['stop'], 'checked': 1, 'valid': 1}
+            reply = await client.post('/report', json={'lease': lease['lease'], 'state': state, 'final': True,
+                                                       'records': [make_record(f"{lease['lease'][:8]}.com")]})
+            assert reply.status == 200
+        assert (await (await client.post('/lease', json={'worker': 'c'})).json()) == {'done': True}
+        lost = await client.post('/report', json={'lease': first['lease'], 'records': [make_record('late.com')]})
+        assert lost.status == 409
+    with_client(coordinator, scenario)
+    assert coordinator.finished and coordinator.valid_count == 2
+    coordinator.results.close()
+    assert len((tmp_path / 'sites.txt').read_text().split()) == 2
+
+
+def test_expired_lease_is_leased_again_from_last_state(tmp_path):
+    coordinator = make_coordinator(tmp_path, lease_size=10000)
+
+    async def scenario(client):
+        lease = await (await client.post('/lease', json={'worker': 'a'})).json()
+        state = {**lease['state'], 'position': 300, 'in_flight': [250], 'checked': 299}
+        await client.post('/report', json={'lease': lease['lease'], 'state': state})
+        for entry in coordinator.leases.values():
+            entry['expires'] = 0
+        again = await (await client.post('/lease', json={'worker': 'b'})).json()
+        assert again['lease'] != lease['lease']
+        assert again['state']['position'] == 300 and again['state']['in_flight'] == [250]
+    with_client(coordinator, scenario)
+
+
+def test_token_is_required(tmp_path):
+    coordinator = make_coordinator(tmp_path, coordinator_token='secret')
+
+    async def scenario(client):
+        assert (await client.post('/lease', json={})).status == 401
+        reply = await client.post('/lease', json={}, headers={'Authorization': 'Bearer secret'})
+        assert reply.status == 200
+    with_client(coordinator, scenario)
+
+
+class FailingSink:
+    def write(self, records):
+        raise OSError("Нет места на диске")
+
+    def sync(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_records_are_accepted_when_write_fails(tmp_path):
+    coordinator = make_coordinator(tmp_path)
+    coordinator.results.sink = FailingSink()
+
+    async def scenario(client):
+        lease = await (await client.post('/lease', json={'worker': 'a'})).json()
+        reply = await client.post('/report', json={'lease': lease['lease'], 'records': [make_record('a.com')]})
+        # Исполнитель не должен присылать записи повторно: они уже в буфере
+        assert reply.status == 200
+    with_client(coordinator, scenario)
+    assert coordinator.valid_count == 1 and coordinator.results.buffer
@@ -0,0 +1,73 @@
+import asyncio
+
+from scanner.ipmemo import AddressMemo, VERIFY_EVERY, response_fingerprint
+
+
+class FakeSite:
+    """fetch() для AddressMemo.probe: ответ с заданным отпечатком"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.fetches = 0
+
+    def fetch(self, fingerprint):
+        async def fetch():
+            self.fetches += 1
+            await asyncio.sleep(self.delay)
+            return True, "HTTPS доступен", {'status': 200, 'scheme': 'https', 'latency': 0.1,
+                                            'fingerprint': fingerprint}
+        return fetch
+
+
+def probe_all(memo, site, fingerprints, address='10.0.0.1'):
+    async def run():
+        return [await memo.probe(address, f"d{i}.com", site.fetch(fingerprint))
+                for i, fingerprint in enumerate(fingerprints)]
+    return asyncio.run(run())
+
+
+def test_address_is_reused_after_hits_equal_answers():
+    memo, site = AddressMemo(hits=3), FakeSite()
+    results = probe_all(memo, site, ['park'] * 5)
+    assert site.fetches == 3
+    assert [result['parked'] for _, _, result in results] == [False, False, True, True, True]
+    assert results[-1][2]['latency'] is None and memo.reused == 2
+
+
+def test_mixed_answers_are_not_reused():
+    memo, site = AddressMemo(hits=2), FakeSite()
+    results = probe_all(memo, site, ['a', 'b', 'b', 'b', 'b'])
+    assert site.fetches == 5 and memo.reused == 0
+    assert not any(result['parked'] for _, _, result in results)
+
+
+def test_answers_without_fingerprint_are_not_remembered():
+    memo, site = AddressMemo(hits=2), FakeSite()
+    probe_all(memo, site, [None] * 4)
+    assert site.fetches == 4 and memo.get('10.0.0.1') is None
+
+
+def test_every_nth_reused_domain_is_verified():
+    memo, site = AddressMemo(hits=2), FakeSite()
+    probe_all(memo, site, ['park'] * (2 + 2 * VERIFY_EVERY))
+    assert site.fetches == 2 + 2
+    assert memo.reused == 2 * VERIFY_EVERY - 2
+
+
+def test_requests_to_suspected_parking_are_coalesced():
+    memo, site = AddressMemo(hits=2), FakeSite(delay=0.05)
+    probe_all(memo, site, ['park'])
+
+    async def run():
+        return await asyncio.gather(*(memo.probe('10.0.0.1', f"c{i}.com", site.fetch('park')) for i in range(5)))
+    results = asyncio.run(run())
+    # Один запрос подтвердил парковку, остальные дождались его и взяли ответ из памяти
+    assert site.fetches == 2
+    assert all(result['parked'] for _, _, result in results)
+
+
+def test_fingerprint_ignores_domain_name():
+    headers = {'Content-Type': 'text/html', 'Server': 'nginx'}
+    first = response_fingerprint('a.com', 200, 'https://a.com/', headers, b'<h1>a.com is for sale</h1>')
+    second = response_fingerprint('b.com', 200, 'https://b.com/', headers, b'<h1>B.com is for sale</h1>')
+    assert first == second
@@ -0,0 +1,29 @@
+from scanner.limits import AdaptiveLimit
+
+
+def run_round(limit, samples=40, error=False, latency=0.1):
+    limit.saturated = True
+    for _ in range(samples):
+        limit.record(latency, error=error)
+    limit.adjust()
+    limit.start_round()
+
+
+def test_limit_grows_when_saturated_and_backs_off_on_errors():
+    limit = AdaptiveLimit(100, round_time=3600)
+    start = limit.limit
+    for _ in range(5):
+        run_round(limit)
+    grown = limit.limit
+    assert start < grown <= 100
+
+    run_round(limit, error=True)
+    assert limit.limit < grown
+    assert limit.limit >= limit.minimum
+
+
+def test_fixed_limit():
+    limit = AdaptiveLimit(50, adaptive=False)
+    for _ in range(100):
+        limit.record(None, error=True)
+    assert limit.limit == 50
@@ -0,0 +1,38 @@
+import asyncio, time
+
+from scanner import negative_cache
+from scanner.negative_cache import NegativeCache, NEGATIVE_NXDOMAIN, NEGATIVE_DEAD, NEGATIVE_UNREACHABLE
+
+
+def add_at(monkeypatch, cache, checked_at, domain, result):
+    monkeypatch.setattr(negative_cache.time, 'time', lambda: checked_at)
+    cache.add(domain, result)
+    monkeypatch.undo()
+
+
+def test_unreachable_expires_sooner(tmp_path, monkeypatch):
+    cache = NegativeCache(str(tmp_path / 'cache.db'), ttl_hours=24, unreachable_ttl_hours=1)
+    two_hours_ago = time.time() - 7200
+    add_at(monkeypatch, cache, two_hours_ago, 'gone.com', NEGATIVE_NXDOMAIN)
+    add_at(monkeypatch, cache, two_hours_ago, 'error.com', NEGATIVE_DEAD)
+    add_at(monkeypatch, cache, two_hours_ago, 'timeout.com', NEGATIVE_UNREACHABLE)
+    cache.add('reset.com', NEGATIVE_UNREACHABLE)
+    cache.flush()
+
+    found = cache.lookup_many(['gone.com', 'error.com', 'timeout.com', 'reset.com', 'new.com'])
+    assert found == {'gone.com', 'error.com', 'reset.com'}
+    cache.close()
+
+
+def test_calls_run_in_cache_thread(tmp_path):
+    async def scan(cache):
+        for i in range(5):
+            if cache.add(f"d{i}.com", NEGATIVE_NXDOMAIN):
+                await cache.run_in_cache(cache.flush)
+        await cache.run_in_cache(cache.flush)
+        found = await cache.run_in_cache(cache.lookup_many, ['d0.com', 'd4.com', 'x.com'])
+        await cache.run_in_cache(cache.close)
+        return found
+
+    cache = NegativeCache(str(tmp_path / 'cache.db'), flush_size=2)
+    assert asyncio.run(scan(cache)) == {'d0.com', 'd4.com'}
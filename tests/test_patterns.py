@@ -0,0 +1,56 @@
+import pytest
+
+from scanner.patterns import Pattern, PatternSpace, load_wordlist
+
+
+@pytest.mark.parametrize('pattern', ['{a|}?hb', 'b?h{a|}', '?h?h', 'x{|-y|}?h', 'ab.{c|}?h{d|}', 'a.?h.b',
+                                     '{-a|b}', '{x-|y}', '-?l', '?l-', 'a{b|}-', 'a-.?l', '?l{a|-}'])
+def test_no_label_starts_or_ends_with_hyphen(pattern):
+    try:
+        space = PatternSpace([pattern], ['.com'])
+    except ValueError as e:
+        # Шаблон, все имена которого ставят дефис на край метки, отклоняется
+        assert 'дефис на краю метки' in str(e)
+        return
+    for i in range(len(space)):
+        for label in space[i].split('.'):
+            assert label, space[i]
+            assert not label.startswith('-') and not label.endswith('-'), space[i]
+
+
+def test_options_with_edge_hyphen_are_dropped():
+    assert [PatternSpace(['{-a|b}'], ['.com'])[i] for i in range(1)] == ['b.com']
+    assert len(PatternSpace(['{x-|y}?l'], ['.com'])) == 2 * 26
+    for pattern in ('-?l', '?l-', 'a{b|}-'):
+        with pytest.raises(ValueError, match="дефис на краю метки"):
+            Pattern(pattern)
+
+
+def test_hyphen_kept_inside_label():
+    space = PatternSpace(['a?hb'], ['.com'])
+    assert 'a-b.com' in {space[i] for i in range(len(space))}
+
+
+def test_hyphen_only_charset_at_edge_is_rejected():
+    with pytest.raises(ValueError, match="пустой набор"):
+        Pattern('[-]x')
+
+
+def test_pattern_space_indexing():
+    space = PatternSpace(['?d{ab|cd}', 'x[a-c]'], ['.com', '.net'], wordlists={})
+    assert len(space) == (10 * 2 + 3) * 2
+    domains = [space[i] for i in range(len(space))]
+    assert len(set(domains)) == len(domains)
+    assert domains[0] == '0ab.com' and domains[1] == '0ab.net'
+    assert domains[-1] == 'xc.net'
+    assert space[-1] == domains[-1]
+    with pytest.raises(IndexError):
+        space[len(space)]
+
+
+def test_wordlist_slot(tmp_path):
+    words = tmp_path / 'words.txt'
+    words.write_text("Shop\nbad_word\n-x\nstore\nshop\n")
+    space = PatternSpace(['{w}?d'], ['.com'], wordlists={'w': ['shop', 'store']})
+    assert len(space) == 20
+    assert load_wordlist(str(words)) == ['shop', 'store']
@@ -0,0 +1,65 @@
+import asyncio, socket
+
+import aiohttp
+from aiohttp import web
+
+from scanner.engine import DEFAULT_SETTINGS
+from scanner.probe import Prober
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+async def handle(request):
+    if request.path == '/' and request.method == 'HEAD':
+        return web.Response(status=405)
+    status = 500 if request.host.startswith('localhost') else 200
+    return web.Response(status=status, text="<h1>" + request.host.split(':')[0] + " is for sale</h1>" * 50)
+
+
+def probe(settings, domain='127.0.0.1', schemes=None):
+    """Проверка через локальный HTTP-сервер; порт HTTPS закрыт"""
+    async def run():
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        port = free_port()
+        await web.TCPSite(runner, '127.0.0.1', port).start()
+        prober = Prober({**DEFAULT_SETTINGS, 'http_port': port, 'https_port': free_port(), **settings})
+        try:
+            async with aiohttp.ClientSession() as session:
+                return await prober.probe(session, domain, schemes)
+        finally:
+            await runner.cleanup()
+    return asyncio.run(run())
+
+
+def test_head_falls_back_to_get_and_https_to_http():
+    ok, log, result = probe({'probe_method': 'head'})
+    assert ok and result['status'] == 200 and result['scheme'] == 'http'
+    assert 'fingerprint' not in result
+
+
+def test_error_status_is_an_answer():
+    ok, log, result = probe({'probe_method': 'get'}, domain='localhost')
+    assert not ok and result['status'] == 500 and 'недоступен' in log
+
+
+def test_no_answer_has_no_result():
+    ok, log, result = probe({'probe_method': 'get'}, schemes={'https'})
+    assert not ok and result is None
+
+
+def test_fingerprint_only_for_get_with_memo():
+    assert probe({'probe_method': 'get', 'ip_memo_size': 100})[2]['fingerprint']
+    assert 'fingerprint' not in probe({'probe_method': 'head', 'ip_memo_size': 100})[2]
+    assert 'fingerprint' not in probe({'probe_method': 'get', 'ip_memo_size': 0})[2]
+
+
+def test_parallel_probe_returns_working_scheme():
+    ok, _, result = probe({'probe_method': 'get', 'probe_parallel': True})
+    assert ok and result['scheme'] == 'http'
@@ -0,0 +1,42 @@
+import asyncio, time
+
+from scanner import ratelimit
+from scanner.ratelimit import TokenBucket
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_burst_then_rate(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, 'monotonic', clock)
+    bucket = TokenBucket(10, burst=3)
+    assert [bucket.try_take() for _ in range(4)] == [True, True, True, False]
+    assert abs(bucket.wait_time() - 0.1) < 1e-9
+    clock.now += 0.25  # 2,5 токена
+    assert [bucket.try_take() for _ in range(3)] == [True, True, False]
+    clock.now += 60  # Запас не больше burst
+    assert bucket.fullness() == 1.0
+    assert sum(bucket.try_take() for _ in range(10)) == 3
+
+
+def test_zero_rate_is_unlimited():
+    bucket = TokenBucket(0)
+    assert all(bucket.try_take() for _ in range(1000))
+    assert bucket.wait_time() == 0.0 and bucket.fullness() == 1.0
+
+
+def test_take_waits_for_token():
+    bucket = TokenBucket(50, burst=1)
+
+    async def take_three():
+        started = time.monotonic()
+        for _ in range(3):
+            await bucket.take()
+        return time.monotonic() - started
+    assert asyncio.run(take_three()) >= 0.035  # Два токена по 20 мс
@@ -0,0 +1,40 @@
+import asyncio
+
+from scanner.recheck import RecheckEngine
+
+
+class ListWriter:
+    def __init__(self):
+        self.records = []
+
+    async def add(self, record):
+        self.records.append(record)
+
+
+def test_only_definite_failures_are_dead(tmp_path):
+    sites = tmp_path / 'sites.txt'
+    sites.write_text("gone.com\nerror.com\nslow.com\nservfail.com\nsilent.com\n")
+    engine = RecheckEngine([str(sites)], {
+        'recheck_alive_file': str(tmp_path / 'alive.jsonl'),
+        'recheck_dead_file': str(tmp_path / 'dead.jsonl'),
+        'recheck_unsure_file': str(tmp_path / 'unsure.jsonl'),
+        'recheck_checkpoint_file': str(tmp_path / 'state.json')
+    })
+    engine.result_writer, engine.dead_writer, engine.unsure_writer = ListWriter(), ListWriter(), ListWriter()
+    engine.generate_domains_batch(10)
+
+    async def check():
+        await engine.domain_dead('gone.com', 'NXDOMAIN')
+        await engine.domain_dead('error.com', 'HTTP', {'status': 404, 'scheme': 'https', 'latency': 0.1})
+        await engine.domain_dead('slow.com', 'TIMEOUT')
+        await engine.domain_dead('servfail.com', 'SERVFAIL')
+        await engine.domain_dead('silent.com', 'HTTP')
+
+    asyncio.run(check())
+    engine.domains.close()
+    assert [record['domain'] for record in engine.dead_writer.records] == ['gone.com', 'error.com']
+    assert not engine.result_writer.records
+    assert [(record['domain'], record['reason']) for record in engine.unsure_writer.records] == [
+        ('slow.com', 'TIMEOUT'), ('servfail.com', 'SERVFAIL'), ('silent.com', 'HTTP')]
+    assert engine.get_stats()['dead'] == 2 and engine.get_stats()['unsure'] == 3
+    assert not engine.in_flight
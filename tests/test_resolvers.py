@@ -0,0 +1,100 @@
+import asyncio
+
+import aiodns
+import pytest
+
+from scanner.ratelimit import TokenBucket
+from scanner import resolvers
+from scanner.resolvers import ResolverPool, parse_nameservers
+
+
+@pytest.fixture(autouse=True)
+def no_exploration(monkeypatch):
+    # Запрос на случайный сервер сделал бы выбор сервера в тестах непредсказуемым
+    monkeypatch.setattr(resolvers, 'EXPLORE_SHARE', 0)
+
+
+class FakeResolver:
+    """Ответ (или ошибка c-ares) после задержки"""
+
+    def __init__(self, answer=None, error=None, delay=0.0):
+        self.answer, self.error, self.delay = answer, error, delay
+        self.queries = 0
+
+    async def query(self, name, query_type):
+        self.queries += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise aiodns.error.DNSError(self.error, 'error')
+        return self.answer
+
+    async def close(self):
+        pass
+
+
+def make_pool(*resolvers):
+    pool = ResolverPool([(f"10.0.0.{i}", 0) for i in range(len(resolvers))], TokenBucket)
+    for server, resolver in zip(sorted(pool.servers, key=lambda server: server.address), resolvers):
+        server.resolver = resolver
+    return pool
+
+
+def run(coroutine_factory):
+    async def main():
+        return await asyncio.wait_for(coroutine_factory(), timeout=5)
+    return asyncio.run(main())
+
+
+def test_single_failing_server_returns_its_error():
+    async def check():
+        pool = make_pool(FakeResolver(error=12))  # TIMEOUT
+        with pytest.raises(aiodns.error.DNSError):
+            await pool.query('a.com', 'A')
+        with pytest.raises(aiodns.error.DNSError):
+            await pool.query('b.com', 'A')
+        return pool
+    pool = run(check)
+    assert pool.failovers == 0
+
+
+def test_failed_query_is_repeated_on_other_server():
+    failing, working = FakeResolver(error=3), FakeResolver(answer=['1.2.3.4'])
+    async def check():
+        pool = make_pool(failing, working)
+        for server in pool.servers:
+            server.latency = 0.1 if server.resolver is failing else 0.2  # Первым выбирается отказывающий
+        return pool, await pool.query('a.com', 'A')
+    pool, answer = run(check)
+    assert answer == ['1.2.3.4']
+    assert pool.failovers == 1 and failing.queries == 1
+
+
+def test_nxdomain_is_an_answer_not_a_failure():
+    missing, other = FakeResolver(error=4), FakeResolver(answer=['1.2.3.4'])
+    async def check():
+        pool = make_pool(missing, other)
+        for server in pool.servers:
+            server.latency = 0.1 if server.resolver is missing else 0.2
+        with pytest.raises(aiodns.error.DNSError):
+            await pool.query('a.com', 'A')
+        return pool
+    pool = run(check)
+    assert pool.failovers == 0 and other.queries == 0
+
+
+def test_slow_query_is_hedged():
+    slow, fast = FakeResolver(answer=['slow'], delay=1.0), FakeResolver(answer=['fast'])
+    async def check():
+        pool = make_pool(slow, fast)
+        for server in pool.servers:
+            server.latency = 0.1 if server.resolver is slow else 0.2
+            server.p95 = 0.05
+        return pool, await pool.query('a.com', 'A')
+    pool, answer = run(check)
+    assert answer == ['fast'] and pool.hedged == 1
+
+
+def test_parse_nameservers():
+    assert parse_nameservers('8.8.8.8, 1.1.1.1=300', 100) == [('8.8.8.8', 100), ('1.1.1.1', 300.0)]
+    with pytest.raises(ValueError):
+        parse_nameservers(' , ', 100)
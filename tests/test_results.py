@@ -0,0 +1,63 @@
+import sqlite3
+
+import pytest
+
+from scanner.results import ResultStore, parse_filter_tlds
+from scanner.sinks import SqliteSink, make_record
+
+
+def fill(path):
+    sink = SqliteSink(path)
+    sink.write([
+        make_record('abc.com', 200, 'https', 0.1),
+        make_record('abcd.org', 301, 'http', 0.2),
+        make_record('xyz.org', 200, 'https', 0.1),
+        make_record('bad.org', 500, 'https', 0.3),
+    ])
+    sink.write([make_record('abc.com', 200, 'https', 0.1), make_record('ABC.com', 200, 'https', 0.1)])
+    sink.close()
+
+
+def test_filters(tmp_path):
+    path = str(tmp_path / 'sites.db')
+    fill(path)
+    store = ResultStore(path)
+
+    def domains(**filters):
+        return [record['domain'] for record in store.query(**filters)]
+    assert domains() == ['abc.com', 'abcd.org', 'bad.org', 'xyz.org']
+    assert domains(tlds=parse_filter_tlds('org'), max_length=3, scheme='https', alive=True) == ['xyz.org']
+    assert domains(min_length=4) == ['abcd.org']
+    assert store.count(alive=True) == 3
+    stats = store.stats()
+    assert stats['total'] == 4 and dict(stats['tlds']) == {'.org': 3, '.com': 1}
+    assert store.check_duplicates() == {'total': 6, 'unique': 4, 'duplicates': 2, 'top': [('abc.com', 3)]}
+    store.close()
+
+
+def test_export(tmp_path):
+    path = str(tmp_path / 'sites.db')
+    fill(path)
+    store = ResultStore(path)
+    assert store.export(str(tmp_path / 'org.txt'), tlds=['.org'], alive=True) == 2
+    assert (tmp_path / 'org.txt').read_text() == 'abcd.org\nxyz.org\n'
+    with pytest.raises(ValueError):
+        store.export(path)
+    store.stop()
+    assert store.export(str(tmp_path / 'stopped.txt')) is None
+    assert not (tmp_path / 'stopped.txt').exists()
+    store.close()
+
+
+def test_table_of_first_version_is_upgraded(tmp_path):
+    path = str(tmp_path / 'old.db')
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE sites (domain TEXT PRIMARY KEY, status INTEGER, scheme TEXT, latency REAL, found_at REAL)")
+    db.execute("INSERT INTO sites VALUES ('shop.co.uk', 200, 'https', 0.1, 1.0)")
+    db.commit()
+    db.close()
+
+    store = ResultStore(path)
+    assert store.db.execute("SELECT tld, length, found_count, parked FROM sites").fetchone() == ('.co.uk', 4, 1, 0)
+    assert [record['domain'] for record in store.query(tlds=['.co.uk'], max_length=4)] == ['shop.co.uk']
+    store.close()
@@ -0,0 +1,39 @@
+import time
+
+from scanner.seen import SeenFilter
+
+
+def test_added_domains_are_found(tmp_path):
+    path = str(tmp_path / 'seen.bin')
+    seen = SeenFilter(path, capacity=1000, error_rate=0.01)
+    domains = [f"d{i}.com" for i in range(1000)]
+    for domain in domains:
+        seen.add(domain)
+    assert all(seen.contains(domain) for domain in domains)
+    false_positives = sum(seen.contains(f"x{i}.org") for i in range(10000))
+    assert false_positives < 300
+    seen.close()
+
+    # Другой процесс или запуск видит те же домены
+    reopened = SeenFilter(path)
+    assert all(reopened.contains(domain) for domain in domains)
+    reopened.close()
+
+
+def test_rotation_is_not_repeated_by_other_process(tmp_path):
+    path = str(tmp_path / 'seen.bin')
+    first = SeenFilter(path, capacity=1000, ttl_hours=0.0001)  # Половина - 0,18 с
+    second = SeenFilter(path)
+    first.add('old.com')
+    time.sleep(0.2)
+
+    first.checked_rotation = second.checked_rotation = 0
+    first.rotate_if_due()
+    first.add('new.com')
+    # Второй процесс тоже увидел срок, но половину уже сменили
+    second.checked_rotation = 0
+    second.rotate_if_due()
+    assert second.current == first.current
+    assert second.contains('new.com') and second.contains('old.com')
+    first.close()
+    second.close()
@@ -0,0 +1,79 @@
+from scanner.engine import ScanEngine, ScanEvents
+from scanner.checkpoint import save_checkpoint
+from scanner.sharding import ShardedScan, create_scan, resume_scan, split_range
+from scanner.sinks import ResultBuffer, make_record
+
+SETTINGS = {'negative_cache_file': '', 'seen_filter_file': '', 'self_test': False, 'seed': 7}
+
+
+class FailingSink:
+    def __init__(self):
+        self.failing = True
+        self.domains = []
+
+    def write(self, records):
+        if self.failing:
+            raise OSError("Нет места на диске")
+        self.domains.extend(record['domain'] for record in records)
+
+    def sync(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FoundEvents(ScanEvents):
+    def __init__(self):
+        self.found, self.errors = [], []
+
+    def on_found(self, record):
+        self.found.append(record['domain'])
+
+    def on_log(self, message, category=None):
+        self.errors.append(message)
+
+
+def test_split_range_covers_space_without_gaps():
+    for total, parts in ((10, 3), (3, 8), (0, 4), (1000, 7)):
+        ranges = split_range(total, parts)
+        assert ranges[0][0] == 0 and ranges[-1][1] == total
+        assert all(stop == start for (_, stop), (start, _) in zip(ranges, ranges[1:]))
+        assert max(stop - start for start, stop in ranges) - min(stop - start for start, stop in ranges) <= 1
+
+
+def test_limits_are_shared_between_processes():
+    scan = ShardedScan(1, 2, {**SETTINGS, 'http_workers': 100, 'dns_workers': 0}, tlds=['.com'], processes=4)
+    settings = scan.shard_settings()
+    assert len(scan.ranges) == 4
+    assert settings['http_workers'] == 25 and settings['dns_workers'] == 0
+    assert settings['rate_share'] == 0.25 and settings['checkpoint_file'] == ''
+
+
+def test_found_record_is_counted_when_write_fails(tmp_path):
+    events = FoundEvents()
+    scan = ShardedScan(1, 2, SETTINGS, tlds=['.com'], events=events, processes=2)
+    scan.results = ResultBuffer(str(tmp_path / 'sites.txt'), max_records=1)
+    scan.results.sink = FailingSink()
+
+    scan.add_found(make_record('a.com'))
+    assert scan.valid_count == 1 and events.found == ['a.com'] and events.errors
+    # Запись осталась в буфере и попадает в файл при следующем сбросе
+    scan.results.sink.failing = False
+    scan.add_found(make_record('b.com'))
+    assert scan.results.sink.domains == ['a.com', 'b.com'] and scan.valid_count == 2
+
+
+def test_create_and_resume_sharded_scan(tmp_path):
+    settings = {**SETTINGS, 'checkpoint_file': str(tmp_path / 'state.json')}
+    assert isinstance(create_scan(1, 2, {**settings, 'processes': 1}, tlds=['.com']), ScanEngine)
+    scan = create_scan(1, 2, {**settings, 'processes': 3}, tlds=['.com'])
+    assert isinstance(scan, ShardedScan)
+
+    save_checkpoint(settings['checkpoint_file'], {
+        'min_length': 1, 'max_length': 2, 'tlds': ['.com'], 'patterns': '', 'wordlists': '', 'seed': scan.seed,
+        'finished': False, 'shards': [scan.shard_states[shard_id] for shard_id in range(3)]
+    })
+    resumed = resume_scan({**settings, 'processes': 8})
+    assert isinstance(resumed, ShardedScan)
+    assert resumed.ranges == scan.ranges and resumed.seed == scan.seed
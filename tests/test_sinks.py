@@ -0,0 +1,83 @@
+import asyncio, json
+
+import pytest
+
+from scanner.results import ResultStore
+from scanner.sinks import BufferedResultWriter, JsonlSink, ResultBuffer, SqliteSink, TextSink, make_record, open_sink
+
+
+class FailingSink:
+    def __init__(self):
+        self.failing = True
+        self.domains = []
+
+    def write(self, records):
+        if self.failing:
+            raise OSError("Нет места на диске")
+        self.domains.extend(record['domain'] for record in records)
+
+    def sync(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_failed_batch_is_kept():
+    async def run():
+        writer = BufferedResultWriter('unused', max_records=100, max_delay=0.01)
+        writer.sink = FailingSink()
+        await writer.add(make_record('a.com'))
+        await asyncio.sleep(0.05)  # Фоновый сброс не удался
+        with pytest.raises(OSError):
+            await writer.add(make_record('b.com'))
+        with pytest.raises(OSError):
+            await writer.sync()
+        writer.sink.failing = False
+        await writer.sync()
+        await writer.close()
+        return writer.sink.domains
+
+    assert asyncio.run(run()) == ['a.com', 'b.com']
+
+
+def test_result_buffer_keeps_failed_batch(tmp_path):
+    buffer = ResultBuffer(str(tmp_path / 'sites.txt'))
+    buffer.sink.close()
+    buffer.sink = FailingSink()
+    buffer.add(make_record('a.com'))
+    with pytest.raises(OSError):
+        buffer.flush()
+    buffer.sink.failing = False
+    buffer.add(make_record('b.com'))
+    buffer.flush()
+    assert buffer.sink.domains == ['a.com', 'b.com']
+
+
+def test_sink_format_is_chosen_by_extension(tmp_path):
+    for name, kind in (('a.txt', TextSink), ('a.jsonl', JsonlSink), ('a.ndjson', JsonlSink), ('a.db', SqliteSink)):
+        sink = open_sink(str(tmp_path / name))
+        assert type(sink) is kind
+        sink.close()
+    sink = open_sink(str(tmp_path / 'a.out'), 'jsonl')
+    sink.write([make_record('a.com', 200, 'https', 0.12345)])
+    sink.close()
+    record = json.loads((tmp_path / 'a.out').read_text())
+    assert record['domain'] == 'a.com' and record['latency'] == 0.123
+    with pytest.raises(ValueError):
+        open_sink(str(tmp_path / 'a.txt'), 'xml')
+
+
+def test_parked_records(tmp_path):
+    records = [make_record('a.com', 200, 'https', 0.1), make_record('b.com', 200, 'http', parked=True)]
+    for name in ('sites.txt', 'sites.jsonl', 'sites.db'):
+        sink = open_sink(str(tmp_path / name))
+        sink.write(records)
+        sink.close()
+    assert (tmp_path / 'sites.txt').read_text() == 'a.com\nb.com\n'
+    assert '"parked": true' in (tmp_path / 'sites.jsonl').read_text()
+
+    store = ResultStore(str(tmp_path / 'sites.db'))
+    assert [record['domain'] for record in store.query(parked=False)] == ['a.com']
+    assert store.stats()['parked'] == 1
+    store.close()
@@ -0,0 +1,39 @@
+import pytest
+
+from scanner.space import DomainSpace, DomainEnumerator, FeistelPermutation
+
+
+@pytest.mark.parametrize('n', [1, 2, 3, 5, 16, 17, 100, 1000, 4099])
+@pytest.mark.parametrize('seed', [0, 1, 12345678901234567])
+def test_permutation_visits_every_index_once(n, seed):
+    permutation = FeistelPermutation(n, seed)
+    assert sorted(permutation(i) for i in range(n)) == list(range(n))
+
+
+def test_index_round_trip():
+    space = DomainSpace('ab1', 1, 3, ['.com', '.net'])
+    assert len(space) == (3 + 9 + 27) * 2
+    for i in range(len(space)):
+        assert space.index(space[i]) == i
+
+
+def test_index_rejects_foreign_domain():
+    space = DomainSpace('ab', 1, 2, ['.com'])
+    for domain in ('abc.com', 'c.com', 'a.org'):
+        with pytest.raises(ValueError):
+            space.index(domain)
+
+
+def test_enumerator_covers_space_and_seeks():
+    space = DomainSpace('abc', 1, 3, ['.com', '.org'])
+    domains = list(DomainEnumerator(space, seed=42))
+    assert sorted(domains) == sorted(space[i] for i in range(len(space)))
+
+    enumerator = DomainEnumerator(space, seed=42)
+    enumerator.seek(30)
+    assert list(enumerator) == domains[30:]
+
+
+def test_huge_space_is_rejected():
+    with pytest.raises(ValueError):
+        DomainSpace('abcdefghijklmnopqrstuvwxyz0123456789', 1, 14, ['.com'])
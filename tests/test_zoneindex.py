@@ -0,0 +1,56 @@
+import gzip
+
+import pytest
+
+from scanner.zoneindex import ZoneFilter, ZoneImporter, ZoneIndex, ZoneParser
+
+ZONE = """$ORIGIN com.
+$TTL 86400
+@ IN SOA a.gtld-servers.net. nstld.verisign-grs.com. (
+    1 1800 900 604800 86400 )
+example NS ns1.example.net.
+ NS ns2.example.net.
+shop 172800 IN NS ns1.host.net.
+shop.com. IN NS ns2.host.net.
+www.example A 192.0.2.1 ; не делегирование второго уровня
+nosuch A 192.0.2.2
+other.net. NS ns.other.net.
+"""
+
+
+def test_parser_takes_delegated_second_level_names():
+    parser = ZoneParser()
+    assert set(parser.labels(ZONE.splitlines())) == {'example', 'shop'}
+    assert parser.tld == 'com'
+
+
+@pytest.mark.parametrize('memory_limit', [256 * 1024 * 1024, 1])
+def test_import_and_lookup(tmp_path, memory_limit):
+    zone = tmp_path / 'com.zone.gz'
+    names = [f"name{i}" for i in range(2000)]
+    with gzip.open(zone, 'wt') as f:
+        f.write(ZONE + ''.join(f"{name} NS ns.host.net.\n" for name in names))
+    report = ZoneImporter(str(zone), str(tmp_path / 'com.zidx'), memory_limit=memory_limit).run()
+    assert report['tld'] == 'com' and report['names'] == len(names) + 2
+
+    index = ZoneIndex(str(tmp_path / 'com.zidx'))
+    assert len(index) == len(names) + 2
+    assert all(name in index for name in names) and 'shop' in index
+    assert 'nosuch' not in index and 'name2000' not in index
+    index.close()
+
+    zones = ZoneFilter([str(tmp_path / 'com.zidx')])
+    assert zones.registered('shop.com') is True
+    assert zones.registered('nosuch.com') is False
+    assert zones.registered('shop.org') is None
+    zones.close()
+
+
+def test_unknown_zone_and_foreign_file_are_rejected(tmp_path):
+    zone = tmp_path / 'zone.txt'
+    zone.write_text("example NS ns.host.net.\n")
+    with pytest.raises(ValueError, match="зону"):
+        ZoneImporter(str(zone), str(tmp_path / 'x.zidx')).run()
+    assert not (tmp_path / 'x.zidx').exists()
+    with pytest.raises(ValueError):
+        ZoneIndex(str(zone))